@@ -6,17 +6,115 @@ sys.path.append(str(Path(__file__).parent.parent))
 
 from utils.api_clients import MultiSourceSearch
 from database.sqlite_db import PaperDatabase
+from database.sharded_vector_store import open_vector_store
 from database.vector_store import FAISSVectorStore
-from models.embeddings import EmbeddingModel
+from database.index_migration import IndexRegistry, start_migration
+from models.embeddings import get_embedding_model
+from utils.vector_codec import VectorCodec
+from config import (
+    CACHE_EXPIRY_DAYS,
+    EMBEDDING_BACKEND,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_DIMENSION,
+    EMBEDDING_MICRO_BATCH_SIZE,
+    EMBEDDING_MICRO_BATCH_WAIT_MS,
+    EMBEDDING_MODEL,
+    EMBEDDING_ONNX_THREADS,
+    VECTOR_STORE_MAX_SIZE,
+    VECTOR_STORE_PARTITION,
+    VECTOR_STORE_SHARDS,
+    EMBEDDING_STORAGE_PRECISION,
+    EMBEDDING_PCA_PATH,
+    EMBEDDING_REEMBED_BATCH_SIZE,
+    EMBEDDING_REEMBED_PAUSE_S,
+    VECTOR_INDEX_ROOT,
+)
 from tqdm import tqdm
 
 class SearchAgent:
     def __init__(self, semantic_scholar_key: str = None):
-        """Initialize enhanced search agent"""
+        """Initialize enhanced search agent
+
+        Indexes are versioned by embedding model (see
+        database/index_migration.py). If the configured model is not the
+        active one, the active model and its index keep serving while a
+        background job re-embeds the papers table into the new index; the
+        agent switches over once that job is done.
+        """
         self.multi_search = MultiSourceSearch(semantic_scholar_key)
         self.db = PaperDatabase()
-        self.vector_store = FAISSVectorStore()
-        self.embeddings = EmbeddingModel()
+        self.codec = VectorCodec.from_settings(EMBEDDING_STORAGE_PRECISION, EMBEDDING_PCA_PATH)
+        registry = IndexRegistry(VECTOR_INDEX_ROOT)
+        active = registry.active() or registry.legacy()
+
+        # Shared, lazily loaded: creating a SearchAgent per chat session no
+        # longer loads a model per session.
+        target = (
+            self._embedding_model(EMBEDDING_MODEL),
+            self._build_store(registry.path_for(EMBEDDING_MODEL, EMBEDDING_DIMENSION), EMBEDDING_DIMENSION),
+        )
+        self.migration = None
+        if registry.is_active(EMBEDDING_MODEL, EMBEDDING_DIMENSION):
+            self._serving = target
+            return
+
+        if active is None:
+            # First start with nothing to serve: serve the new index as the
+            # papers table is backfilled into it. The migration activates it
+            # once complete.
+            self._serving = target
+        else:
+            print(f"🔁 Re-embedding papers for {EMBEDDING_MODEL}; serving {active['model']} meanwhile")
+            self._serving = (self._embedding_model(active['model']), self._open_active(active))
+        self._target = target
+        self.migration = start_migration(
+            self.db, target[0], target[1], registry, EMBEDDING_MODEL, EMBEDDING_DIMENSION,
+            batch_size=EMBEDDING_REEMBED_BATCH_SIZE,
+            pause_seconds=EMBEDDING_REEMBED_PAUSE_S,
+            source_store=None if active is None else self._serving[1],
+        )
+
+    @staticmethod
+    def _embedding_model(model_name: str):
+        return get_embedding_model(
+            model_name,
+            backend=EMBEDDING_BACKEND,
+            intra_op_threads=EMBEDDING_ONNX_THREADS,
+            micro_batch_size=EMBEDDING_MICRO_BATCH_SIZE,
+            micro_batch_wait_ms=EMBEDDING_MICRO_BATCH_WAIT_MS,
+            batch_size=EMBEDDING_BATCH_SIZE,
+        )
+
+    def _build_store(self, path: Path, dimension: int):
+        return open_vector_store(
+            path,
+            dimension,
+            partition=VECTOR_STORE_PARTITION,
+            num_shards=VECTOR_STORE_SHARDS,
+            max_age_days=CACHE_EXPIRY_DAYS,
+            max_vectors=VECTOR_STORE_MAX_SIZE,
+            codec=self.codec,
+        )
+
+    def _open_active(self, active: Dict):
+        if active.get('legacy'):
+            # The pre-versioning store at the index root: one float32 index.
+            return FAISSVectorStore(active['dimension'], active['path'])
+        return self._build_store(Path(active['path']), active['dimension'])
+
+    def _serving_pair(self):
+        """(embedder, vector store) that serve queries, always from the same model."""
+        if self.migration is not None and self.migration.done.is_set():
+            self._serving, self.migration = self._target, None
+        return self._serving
+
+    @property
+    def embeddings(self):
+        return self._serving_pair()[0]
+
+    @property
+    def vector_store(self):
+        return self._serving_pair()[1]
     
     def search(self, query: str, max_results: int = 50) -> List[Dict]:
         """Multi-source parallel search"""
@@ -42,17 +140,34 @@ class SearchAgent:
         if unique_papers:
             abstracts = [p.get('abstract', p.get('title', '')) for p in unique_papers]
             print("🧠 Generating embeddings...")
-            embeddings = self.embeddings.encode(abstracts)
-            self.vector_store.add(embeddings, unique_papers)
+            embedder, store = self._serving_pair()
+            embeddings = embedder.encode(abstracts)
+            store.add(embeddings, unique_papers)
         
         return unique_papers[:max_results]
     
-    def semantic_search(self, query: str, k: int = 50) -> List[Dict]:
-        """Enhanced semantic search with re-ranking"""
-        query_embedding = self.embeddings.encode_single(query)
-        results = self.vector_store.search(query_embedding, k=k)
-        
-        # Re-rank by multiple factors
+    def semantic_search(self, query: str, k: int = 50, filters: Dict = None) -> List[Dict]:
+        """Enhanced semantic search with re-ranking.
+
+        ``filters`` (e.g. ``FilterManager.active_filters``) is pushed down into
+        the vector store, so k results come back even for selective filters.
+        """
+        embedder, store = self._serving_pair()
+        query_embedding = embedder.encode_single(query)
+        results = store.search(query_embedding, k=k, filters=filters)
+        return self._rerank(results)
+
+    def semantic_search_batch(self, queries: List[str], k: int = 50, filters: Dict = None) -> List[List[Dict]]:
+        """Semantic search for many queries with one encode and one FAISS call."""
+        if not queries:
+            return []
+        embedder, store = self._serving_pair()
+        query_embeddings = embedder.encode(queries)
+        batch = store.search_batch(query_embeddings, k=k, filters=filters)
+        return [self._rerank(batch.hydrate(row)) for row in range(len(batch))]
+
+    def _rerank(self, results: List[Dict]) -> List[Dict]:
+        """Re-rank by multiple factors"""
         for result in results:
             paper = result['metadata']
             
@@ -44,6 +44,7 @@ app.add_middleware(
 
 # Build the service once at startup. Degrades gracefully if deps are missing.
 _service: Optional[ResearchService] = None
+_maintenance = None
 
 
 def get_service() -> ResearchService:
@@ -53,6 +54,36 @@ def get_service() -> ResearchService:
     return _service
 
 
+@app.on_event("startup")
+def warm_up_service():
+    """Build the service (and warm the embedding model) before serving traffic."""
+    svc = get_service()
+    start_maintenance(svc)
+
+
+def start_maintenance(svc: ResearchService):
+    """Prune and compact papers.db periodically (see database/maintenance.py)."""
+    global _maintenance
+    from config import MAINTENANCE_INTERVAL_HOURS, RETENTION_DAYS
+    from database.maintenance import MaintenanceJob
+
+    if svc.search_agent is None or not MAINTENANCE_INTERVAL_HOURS:
+        return
+    _maintenance = MaintenanceJob(
+        [svc.search_agent.db.pool], RETENTION_DAYS, interval_hours=MAINTENANCE_INTERVAL_HOURS
+    ).start()
+
+
+@app.on_event("shutdown")
+def flush_write_buffers():
+    """Write out queued history/log rows before the worker exits."""
+    from database.write_buffer import close_all
+
+    if _maintenance is not None:
+        _maintenance.stop()
+    close_all()
+
+
 # ------------------------------------------------------------------- schemas
 class SearchRequest(BaseModel):
     query: str = Field(..., min_length=2, description="Natural-language search query")
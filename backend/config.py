@@ -37,10 +37,52 @@ TARGET_PAPERS = 50
 ENABLE_PARALLEL_SEARCH = True
 ENABLE_SMART_CACHING = True
 CACHE_EXPIRY_DAYS = 7
+# Vector indexes live under VECTOR_INDEX_ROOT/<model>-<dimension>/, with an
+# ACTIVE pointer naming the one that serves queries.
+VECTOR_INDEX_ROOT = CACHE_DIR / "faiss_index"
+# Upper bound on vectors kept in the FAISS store; least recently accessed
+# papers are evicted past this. None = unbounded.
+VECTOR_STORE_MAX_SIZE = int(os.getenv("VECTOR_STORE_MAX_SIZE", "200000")) or None
+# Shard the vector store by "source" or "hash"; empty = one monolithic index.
+VECTOR_STORE_PARTITION = os.getenv("VECTOR_STORE_PARTITION", "")
+VECTOR_STORE_SHARDS = int(os.getenv("VECTOR_STORE_SHARDS", "4"))
 
 # Embedding Settings
 EMBEDDING_MODEL = "all-MiniLM-L6-v2"
 EMBEDDING_DIMENSION = 384
+# Inference backend: "torch" (sentence-transformers), or ONNX Runtime on CPU
+# with "onnx" (fp32) / "onnx-int8" (dynamically quantized).
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+# ONNX Runtime intra-op threads; 0 lets ORT pick (one per physical core).
+EMBEDDING_ONNX_THREADS = int(os.getenv("EMBEDDING_ONNX_THREADS", "0"))
+# Merge concurrent encode calls into batches of up to this many texts, waiting
+# at most EMBEDDING_MICRO_BATCH_WAIT_MS for company. 0 disables micro-batching.
+EMBEDDING_MICRO_BATCH_SIZE = int(os.getenv("EMBEDDING_MICRO_BATCH_SIZE", "64"))
+EMBEDDING_MICRO_BATCH_WAIT_MS = float(os.getenv("EMBEDDING_MICRO_BATCH_WAIT_MS", "5"))
+# Texts per forward pass; inputs are sorted into length buckets of this size.
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+# Storage precision for stored vectors (FAISS store and RAG index):
+# "float32", "float16" or "int8". If EMBEDDING_PCA_PATH holds a fitted
+# VectorCodec (utils/vector_codec.py), vectors are also PCA-projected.
+EMBEDDING_STORAGE_PRECISION = os.getenv("EMBEDDING_STORAGE_PRECISION", "float32")
+EMBEDDING_PCA_PATH = os.getenv("EMBEDDING_PCA_PATH", str(CACHE_DIR / "vector_codec.npz"))
+# When EMBEDDING_MODEL/EMBEDDING_DIMENSION change, the papers table is
+# re-embedded in the background in batches of this size, pausing between them.
+EMBEDDING_REEMBED_BATCH_SIZE = int(os.getenv("EMBEDDING_REEMBED_BATCH_SIZE", "256"))
+EMBEDDING_REEMBED_PAUSE_S = float(os.getenv("EMBEDDING_REEMBED_PAUSE_S", "0.5"))
+
+# Database maintenance (database/maintenance.py): rows older than this many
+# days are deleted, then the freed space is returned to the OS. Bookmarked
+# papers are always kept. None = keep forever.
+RETENTION_DAYS = {
+    "query_history": 90,
+    "conversation_history": 180,
+    "search_history": 365,
+    "user_term_stats": 365,
+    "papers": 180,
+}
+# Hours between maintenance passes in the API process; 0 disables them.
+MAINTENANCE_INTERVAL_HOURS = float(os.getenv("MAINTENANCE_INTERVAL_HOURS", "24"))
 
 # User Settings
 DEFAULT_USERNAME = os.getenv("DEFAULT_USERNAME", "Researcher")
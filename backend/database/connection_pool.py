@@ -0,0 +1,151 @@
+"""Thread-safe SQLite access: one reader connection per thread, one writer.
+
+``PaperDatabase`` and ``UserProfileManager`` used to share a single connection
+across FastAPI's threadpool and the search executor, so every statement
+serialised on it and concurrent writers hit "database is locked". With WAL,
+readers never block the writer or each other, so the pool gives:
+
+* ``reader()`` -- this thread's own read-only connection (``query_only``),
+  opened on first use. Reads run in parallel across threads.
+* ``writer()`` -- a context manager around the single writer connection. The
+  pool's lock serialises its writers; ``BEGIN IMMEDIATE`` takes SQLite's write
+  lock up front, so writers in other pools or processes wait out
+  ``busy_timeout`` instead of failing on a lock upgrade. The block commits on
+  success and rolls back on error.
+
+``get_pool`` hands out one shared pool per database file per process, so
+however many ``PaperDatabase`` / ``UserProfileManager`` instances open a file
+(the frontend makes one per chat session), its writers share one lock and
+each instance does not open connections of its own.
+
+Every connection gets WAL, ``synchronous=NORMAL`` (durable at checkpoints,
+safe against corruption), a larger page cache, memory-mapped reads and a busy
+timeout. New files are created with ``auto_vacuum=INCREMENTAL`` so
+maintenance.py can hand freed pages back to the OS without a full VACUUM.
+Needs a file-backed database: each ``:memory:`` connection would be a separate
+database.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# abspath -> (pool, the keyword arguments it was opened with)
+_POOLS: Dict[str, Tuple["ConnectionPool", Dict]] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def get_pool(db_path: str, **kwargs) -> "ConnectionPool":
+    """The shared pool for ``db_path``'s file, created on first use.
+
+    Raises ValueError if the file is already open with different settings.
+    """
+    key = os.path.abspath(db_path)
+    with _POOLS_LOCK:
+        pool, opened_with = _POOLS.get(key, (None, None))
+        if pool is None or pool.closed:
+            pool = ConnectionPool(db_path, **kwargs)
+            _POOLS[key] = (pool, kwargs)
+        elif kwargs != opened_with:
+            raise ValueError(f"{db_path} is already open with {opened_with}, not {kwargs}")
+        return pool
+
+
+class ConnectionPool:
+    def __init__(
+        self,
+        db_path: str,
+        cache_size_kib: int = 8192,
+        mmap_size: int = 256 * 1024 * 1024,
+        busy_timeout_ms: int = 5000,
+        pragmas: Optional[Dict[str, str]] = None,
+    ):
+        self.db_path = db_path
+        self.cache_size_kib = cache_size_kib
+        self.mmap_size = mmap_size
+        self.busy_timeout_ms = busy_timeout_ms
+        self.pragmas = dict(pragmas or {})
+        self._local = threading.local()
+        self._readers: List[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+        self._write_lock = threading.RLock()
+        self._writer: Optional[sqlite3.Connection] = None
+        self.closed = False
+
+        # journal_mode is persistent in the file, so set it once up front
+        # (it can't be changed inside a transaction).
+        # auto_vacuum only takes effect on a file with no tables yet; on
+        # existing files it is a no-op until the next VACUUM.
+        self._writer = self._connect(read_only=False)
+        self._writer.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        self._writer.execute("PRAGMA journal_mode = WAL")
+
+    def _connect(self, read_only: bool) -> sqlite3.Connection:
+        # isolation_level=None: no implicit BEGINs; writer() manages transactions.
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute(f"PRAGMA cache_size = {-int(self.cache_size_kib)}")
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        if read_only:
+            conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    def reader(self) -> sqlite3.Connection:
+        """This thread's read-only connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect(read_only=True)
+            with self._readers_lock:
+                self._readers.append(conn)
+        return conn
+
+    @contextmanager
+    def writer(self, transaction: bool = True) -> Iterator[sqlite3.Connection]:
+        """Exclusive use of the writer connection inside one transaction.
+
+        Re-entrant within a thread: a nested ``writer()`` joins the outer
+        transaction. ``transaction=False`` only takes the lock, for statements
+        that cannot run in a transaction (``VACUUM``, checkpoints).
+        """
+        with self._write_lock:
+            if self._writer is None:
+                self._writer = self._connect(read_only=False)
+            conn = self._writer
+            if conn.in_transaction or not transaction:  # nested: the outermost block commits
+                yield conn
+                return
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                if conn.in_transaction:
+                    conn.rollback()
+                raise
+            else:
+                if conn.in_transaction:
+                    conn.commit()
+
+    def close(self):
+        self.closed = True
+        with self._readers_lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers.clear()
+        self._local = threading.local()
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
@@ -0,0 +1,308 @@
+"""Columnar (Parquet) snapshots of the paper corpus.
+
+Analytics and offline benchmarks used to read ``papers.db`` row by row, and a
+new worker had to re-crawl and re-embed everything. A snapshot is a directory::
+
+    snapshot/
+        manifest.json                counts, embedding model, vector space
+        papers/part-00000.parquet    the papers table
+        vectors/part-00000.parquet   paper_id, vector, metadata (JSON)
+
+``export_snapshot`` streams the papers table (keyset pages) and the vector
+store (a memory-mapped read of its published snapshot) in batches of
+``batch_size`` rows, starting a new part file every ``rows_per_file`` rows, so
+memory is bounded by one batch whatever the corpus size. Vector rows carry the
+same ``paper_id`` as the papers files, so the two join on it. Vectors are
+written as stored in the index -- after the codec's projection and scaling --
+and the manifest records that vector space. The export is built in a sibling
+temporary directory and moved into place when complete, so ``path`` only ever
+holds a finished snapshot; it refuses to overwrite anything that isn't one.
+
+``import_snapshot`` bulk-loads a snapshot into a ``PaperDatabase`` (one
+transaction per batch) and a vector store (through ``bulk()``, so the index is
+published once). The store's codec must match the exported vector space.
+
+From ``backend/``::
+
+    python -m database.corpus_snapshot export cache/snapshots/latest
+    python -m database.corpus_snapshot import cache/snapshots/latest
+
+``pyarrow`` is only needed here and is imported on use.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .file_lock import atomic_write_bytes
+
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+
+# (column, arrow type name) of papers/*.parquet, in order.
+PAPER_COLUMNS = [
+    ("paper_id", "string"),
+    ("title", "string"),
+    ("authors", "string"),
+    ("abstract", "string"),
+    ("year", "int64"),
+    ("venue", "string"),
+    ("citations", "int64"),
+    ("url", "string"),
+    ("pdf_url", "string"),
+    ("created_at", "string"),
+]
+
+
+def vector_space(store) -> Dict:
+    """What a stored vector means: vectors only transfer between equal spaces."""
+    codec = store.codec
+    pca = None
+    if codec.components is not None:
+        pca = hashlib.sha1(codec.components.tobytes() + codec.mean.tobytes()).hexdigest()[:16]
+    return {
+        "dimension": store.dimension,
+        "width": codec.output_dim(store.dimension),
+        "precision": codec.precision,
+        "max_abs": codec.max_abs,
+        "pca": pca,
+    }
+
+
+class _PartWriter:
+    """Writes record batches to ``part-NNNNN.parquet`` files of ~``rows_per_file`` rows."""
+
+    def __init__(self, directory: Path, schema, rows_per_file: int, compression: str):
+        self.directory = directory
+        self.schema = schema
+        self.rows_per_file = rows_per_file
+        self.compression = compression
+        self.files: List[str] = []
+        self.rows = 0
+        self._writer = None
+        self._file_rows = 0
+        directory.mkdir(parents=True, exist_ok=True)
+
+    def write(self, batch):
+        import pyarrow.parquet as pq
+
+        if self._writer is None or self._file_rows >= self.rows_per_file:
+            self.close()
+            name = f"part-{len(self.files):05d}.parquet"
+            self._writer = pq.ParquetWriter(
+                str(self.directory / name), self.schema, compression=self.compression
+            )
+            self.files.append(f"{self.directory.name}/{name}")
+            self._file_rows = 0
+        self._writer.write_batch(batch)
+        self._file_rows += batch.num_rows
+        self.rows += batch.num_rows
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+def export_snapshot(
+    db,
+    store,
+    path,
+    model_name: Optional[str] = None,
+    batch_size: int = 10_000,
+    rows_per_file: int = 250_000,
+    compression: str = "zstd",
+) -> Dict:
+    """Write ``db``'s papers and ``store``'s vectors (if given) to ``path``.
+
+    Returns the manifest. The snapshot is written to a sibling temporary
+    directory and swapped in once complete, replacing an existing snapshot at
+    ``path``. Anything else at ``path`` (a non-empty directory without a
+    manifest, a file) is left alone and raises ValueError.
+    """
+    path = Path(path)
+    if path.exists() and not (path.is_dir() and (_is_snapshot(path) or not any(path.iterdir()))):
+        raise ValueError(f"{path} exists and is not a snapshot; refusing to replace it")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir()
+    try:
+        manifest = _export(db, store, tmp, model_name, batch_size, rows_per_file, compression)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    # A directory can't be renamed over a non-empty one, so move the old
+    # snapshot aside first.
+    old = path.with_name(f".{path.name}.{os.getpid()}.old")
+    if path.exists():
+        os.replace(path, old)
+    os.replace(tmp, path)
+    shutil.rmtree(old, ignore_errors=True)
+    return manifest
+
+
+def _is_snapshot(path: Path) -> bool:
+    return (path / MANIFEST).is_file()
+
+
+def _export(db, store, path: Path, model_name, batch_size, rows_per_file, compression) -> Dict:
+    import pyarrow as pa
+
+    started = time.perf_counter()
+
+    schema = pa.schema([(name, pa.type_for_alias(kind)) for name, kind in PAPER_COLUMNS])
+    papers = _PartWriter(path / "papers", schema, rows_per_file, compression)
+    for rows in db.iter_papers(batch_size=batch_size):
+        columns = {name: [row.get(name) for row in rows] for name, _ in PAPER_COLUMNS}
+        papers.write(pa.RecordBatch.from_pydict(columns, schema=schema))
+    papers.close()
+
+    manifest = {
+        "format": FORMAT_VERSION,
+        "created_at": time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime()),
+        "model": model_name,
+        "papers": {"rows": papers.rows, "files": papers.files},
+        "vectors": None,
+    }
+
+    if store is not None:
+        from .vector_store import FAISSVectorStore
+
+        space = vector_space(store)
+        vector_schema = pa.schema([
+            ("paper_id", pa.string()),
+            ("vector", pa.list_(pa.float32(), space["width"])),
+            ("metadata", pa.string()),
+        ])
+        vectors = _PartWriter(path / "vectors", vector_schema, rows_per_file, compression)
+        for metadata, matrix in store.iter_vectors(batch_size):
+            vectors.write(pa.RecordBatch.from_arrays([
+                pa.array([FAISSVectorStore._key(item) for item in metadata], pa.string()),
+                pa.FixedSizeListArray.from_arrays(
+                    pa.array(np.ascontiguousarray(matrix, dtype="float32").ravel()), space["width"]
+                ),
+                pa.array([json.dumps(item, default=str) for item in metadata], pa.string()),
+            ], schema=vector_schema))
+        vectors.close()
+        manifest["vectors"] = {"rows": vectors.rows, "files": vectors.files, "space": space}
+
+    manifest["seconds"] = round(time.perf_counter() - started, 3)
+    atomic_write_bytes(path / MANIFEST, json.dumps(manifest, indent=2).encode())
+    return manifest
+
+
+def read_manifest(path) -> Dict:
+    manifest = json.loads((Path(path) / MANIFEST).read_text())
+    if manifest.get("format") != FORMAT_VERSION:
+        raise ValueError(f"unsupported snapshot format {manifest.get('format')!r}")
+    return manifest
+
+
+def import_snapshot(path, db, store=None, batch_size: int = 10_000) -> Dict:
+    """Load the snapshot at ``path`` into ``db`` and ``store`` (if given).
+
+    Existing papers with the same ``paper_id`` are replaced; vectors already
+    in the store are skipped. Returns rows loaded per table.
+    """
+    import pyarrow.parquet as pq
+
+    path = Path(path)
+    manifest = read_manifest(path)
+    started = time.perf_counter()
+    loaded = {"papers": 0, "vectors": 0}
+
+    for name in manifest["papers"]["files"]:
+        for batch in pq.ParquetFile(str(path / name)).iter_batches(batch_size=batch_size):
+            papers = batch.to_pylist()
+            for paper in papers:
+                paper["id"] = paper.pop("paper_id")
+            loaded["papers"] += db.add_papers(papers)
+
+    vectors = manifest.get("vectors")
+    if store is not None and vectors:
+        if vectors["space"] != vector_space(store):
+            raise ValueError(
+                f"snapshot vectors are in {vectors['space']}, the store expects {vector_space(store)}"
+            )
+        width = vectors["space"]["width"]
+        with store.bulk():
+            for name in vectors["files"]:
+                parquet = pq.ParquetFile(str(path / name))
+                for batch in parquet.iter_batches(batch_size=batch_size, columns=["vector", "metadata"]):
+                    matrix = batch.column("vector").flatten().to_numpy().reshape(-1, width)
+                    metadata = [json.loads(m) for m in batch.column("metadata").to_pylist()]
+                    loaded["vectors"] += store.add(matrix, metadata, prepared=True)
+
+    loaded["seconds"] = round(time.perf_counter() - started, 3)
+    return loaded
+
+
+def _open_store(path, dimension: int):
+    from config import (
+        CACHE_EXPIRY_DAYS,
+        EMBEDDING_PCA_PATH,
+        EMBEDDING_STORAGE_PRECISION,
+        VECTOR_STORE_MAX_SIZE,
+        VECTOR_STORE_PARTITION,
+        VECTOR_STORE_SHARDS,
+    )
+    from utils.vector_codec import VectorCodec
+    from .sharded_vector_store import open_vector_store
+
+    return open_vector_store(
+        path,
+        dimension,
+        partition=VECTOR_STORE_PARTITION,
+        num_shards=VECTOR_STORE_SHARDS,
+        max_age_days=CACHE_EXPIRY_DAYS,
+        max_vectors=VECTOR_STORE_MAX_SIZE,
+        codec=VectorCodec.from_settings(EMBEDDING_STORAGE_PRECISION, EMBEDDING_PCA_PATH),
+    )
+
+
+def main(argv=None):
+    import argparse
+
+    from config import DB_PATH, VECTOR_INDEX_ROOT
+    from .index_migration import IndexRegistry
+    from .sqlite_db import PaperDatabase
+
+    parser = argparse.ArgumentParser(description="Export or import a Parquet corpus snapshot.")
+    parser.add_argument("command", choices=["export", "import"])
+    parser.add_argument("path")
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    args = parser.parse_args(argv)
+
+    db = PaperDatabase(str(DB_PATH))
+    registry = IndexRegistry(VECTOR_INDEX_ROOT)
+    if args.command == "export":
+        active = registry.active()
+        store = _open_store(active["path"], active["dimension"]) if active else None
+        result = export_snapshot(
+            db, store, args.path, model_name=active and active["model"], batch_size=args.batch_size
+        )
+    else:
+        manifest = read_manifest(args.path)
+        store = None
+        if manifest["vectors"] and manifest["model"]:
+            dimension = manifest["vectors"]["space"]["dimension"]
+            store = _open_store(registry.path_for(manifest["model"], dimension), dimension)
+        result = import_snapshot(args.path, db, store, batch_size=args.batch_size)
+        if store is not None:
+            # Serve the imported index rather than re-embedding into a new one.
+            registry.activate(manifest["model"], dimension)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
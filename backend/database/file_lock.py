@@ -0,0 +1,92 @@
+"""Advisory inter-process file locks.
+
+Used to give on-disk caches (the FAISS index, the embedding cache) a single
+writer across every process that shares ``cache/`` -- the API workers, the
+Chainlit app and ``backend/main.py``. Readers don't take the lock; they rely on
+writers publishing immutable snapshots with an atomic rename.
+
+POSIX uses ``fcntl.flock``; Windows falls back to ``msvcrt.locking``, which
+only supports exclusive locks, so shared locks are exclusive there.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+
+try:  # POSIX
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """Re-entrant (per thread) exclusive or shared lock on ``path``.
+
+    Usage::
+
+        with FileLock(cache_dir / ".lock"):
+            ...  # only one process/thread at a time gets here
+    """
+
+    def __init__(self, path, shared: bool = False):
+        self.path = Path(path)
+        self.shared = shared
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def acquire(self, blocking: bool = True):
+        """Take the lock and return self; with ``blocking=False``, return None if it is held."""
+        if not self._thread_lock.acquire(blocking):
+            return None
+        if self._depth == 0:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(str(self.path), os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if fcntl is not None:
+                    mode = fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX
+                    fcntl.flock(fd, mode if blocking else mode | fcntl.LOCK_NB)
+                else:  # pragma: no cover - Windows
+                    msvcrt.locking(fd, msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+            except BaseException as exc:
+                os.close(fd)
+                self._thread_lock.release()
+                if not blocking and isinstance(exc, OSError):
+                    return None
+                raise
+            self._fd = fd
+        self._depth += 1
+        return self
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            try:
+                if fcntl is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+                else:  # pragma: no cover - Windows
+                    msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+            finally:
+                os.close(self._fd)
+                self._fd = None
+        self._thread_lock.release()
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def atomic_write_bytes(path, data: bytes):
+    """Write ``data`` to ``path`` so readers see either the old or new file."""
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
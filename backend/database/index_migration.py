@@ -0,0 +1,282 @@
+"""Model-versioned vector indexes and zero-downtime re-embedding.
+
+Vectors from different embedding models (or dimensions) cannot share an index,
+so every index now lives in its own directory under the FAISS cache root,
+named after the model that produced it::
+
+    cache/faiss_index/
+        ACTIVE                           {"model": ..., "dimension": ..., "path": ...}
+        all-MiniLM-L6-v2-384/            the FAISSVectorStore (or shards) for that model
+        all-mpnet-base-v2-768/
+
+``ACTIVE`` names the index that serves queries. When ``EMBEDDING_MODEL`` or
+``EMBEDDING_DIMENSION`` changes, the old index (and the old model, for query
+embeddings) keeps serving while ``IndexMigration`` re-embeds the ``papers``
+table into the new index in throttled batches on a background thread. When it
+reaches the end of the table it rewrites ``ACTIVE`` atomically and sets
+``done``, which ``SearchAgent`` checks to swap model and index together; other
+processes pick the new index up on their next start.
+
+On first start there is no ``ACTIVE`` yet. A store left at the root itself by
+releases before versioning (``IndexRegistry.legacy``) serves as the old index
+meanwhile; without one the new index serves as it fills. Either way ``ACTIVE``
+is only written once the backfill is complete.
+
+Progress is checkpointed in the new index directory, so an interrupted
+migration resumes from the last paper it indexed. A lock file there makes sure
+only one process migrates into an index; the others wait for ``ACTIVE`` to
+switch (and take over if the migrating process dies).
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import threading
+from itertools import islice
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .file_lock import FileLock, atomic_write_bytes
+
+
+# The model and dimension every store was built with before versioning.
+LEGACY_MODEL = "all-MiniLM-L6-v2"
+LEGACY_DIMENSION = 384
+
+
+class IndexRegistry:
+    """Tracks which model's index is active under ``root``."""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def _active_path(self) -> Path:
+        return self.root / "ACTIVE"
+
+    def path_for(self, model_name: str, dimension: int) -> Path:
+        slug = re.sub(r"[^A-Za-z0-9._-]+", "_", model_name).strip("_")
+        return self.root / f"{slug}-{dimension}"
+
+    def active(self) -> Optional[Dict]:
+        """The active ``{"model", "dimension", "path"}`` record, or None."""
+        try:
+            return json.loads(self._active_path.read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def activate(self, model_name: str, dimension: int) -> Dict:
+        """Point ``ACTIVE`` at this model's index (an atomic file replace)."""
+        record = {
+            "model": model_name,
+            "dimension": dimension,
+            "path": str(self.path_for(model_name, dimension)),
+        }
+        atomic_write_bytes(self._active_path, json.dumps(record).encode())
+        return record
+
+    def legacy(self) -> Optional[Dict]:
+        """An active-style record for a pre-versioning store at the root, or None."""
+        if not any((self.root / name).exists() for name in ("CURRENT", "index.faiss")):
+            return None
+        return {
+            "model": LEGACY_MODEL,
+            "dimension": LEGACY_DIMENSION,
+            "path": str(self.root),
+            "legacy": True,
+        }
+
+    def is_active(self, model_name: str, dimension: int) -> bool:
+        record = self.active()
+        return bool(record) and record["model"] == model_name and record["dimension"] == dimension
+
+
+def paper_from_row(row: Dict) -> Dict:
+    """Map a ``papers`` table row back to the paper dict the search path uses."""
+    paper = {k: v for k, v in row.items() if k not in ("id", "paper_id", "created_at", "venue_id")}
+    paper["id"] = row.get("paper_id")
+    return paper
+
+
+def embedding_text(paper: Dict) -> str:
+    """The text a paper is embedded from (matches ``SearchAgent.search``)."""
+    return paper.get("abstract") or paper.get("title") or ""
+
+
+# One migration per target index per process, however many SearchAgents ask.
+_RUNNING: Dict[str, "IndexMigration"] = {}
+_RUNNING_LOCK = threading.Lock()
+
+
+def start_migration(db, embedder, store, registry: "IndexRegistry", model_name: str,
+                    dimension: int, **kwargs) -> "IndexMigration":
+    """Start (or return the already running) migration to this model's index."""
+    key = str(registry.path_for(model_name, dimension))
+    with _RUNNING_LOCK:
+        migration = _RUNNING.get(key)
+        if migration is None or migration.error is not None:
+            migration = _RUNNING[key] = IndexMigration(
+                db, embedder, store, registry, model_name, dimension, **kwargs
+            ).start()
+        return migration
+
+
+class IndexMigration:
+    """Background re-embed of the ``papers`` table into a new model's index.
+
+    ``store`` is the new, empty (or partially filled) vector store; ``embedder``
+    the new model. Each batch of ``batch_size`` papers is embedded and added,
+    then the job sleeps ``pause_seconds`` so it never monopolises the CPU that
+    is also serving queries. The store publishes (and progress is
+    checkpointed) once every ``batches_per_publish`` batches rather than per
+    batch, since each publish rewrites the whole index. A process that finds
+    another one migrating polls every ``poll_seconds``.
+
+    ``source_store`` is the index being replaced, if any. Paper metadata the
+    ``papers`` table has no column for (``source``, ``fields``, ...) is copied
+    from it, so source/domain filters and source sharding keep working.
+    """
+
+    CHECKPOINT = "MIGRATION.json"
+    LOCK = ".migration.lock"
+
+    def __init__(
+        self,
+        db,
+        embedder,
+        store,
+        registry: IndexRegistry,
+        model_name: str,
+        dimension: int,
+        batch_size: int = 256,
+        pause_seconds: float = 0.5,
+        batches_per_publish: int = 16,
+        poll_seconds: float = 5.0,
+        source_store=None,
+    ):
+        self.db = db
+        self.embedder = embedder
+        self.store = store
+        self.source_store = source_store
+        self._extra_metadata: Dict[str, Dict] = {}
+        self.registry = registry
+        self.model_name = model_name
+        self.dimension = dimension
+        self.batch_size = batch_size
+        self.pause_seconds = pause_seconds
+        self.batches_per_publish = batches_per_publish
+        self.poll_seconds = poll_seconds
+        self.indexed = 0
+        self.done = threading.Event()
+        self.error: Optional[BaseException] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._checkpoint = registry.path_for(model_name, dimension) / self.CHECKPOINT
+        self._lock = FileLock(registry.path_for(model_name, dimension) / self.LOCK)
+
+    def start(self) -> "IndexMigration":
+        """Run the migration on a daemon thread; returns immediately."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="index-migration", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None):
+        """Ask the job to stop after the current batch (progress is kept)."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self.done.wait(timeout)
+
+    def _run(self):
+        try:
+            self.run()
+        except BaseException as exc:  # surfaced via .error; the old index keeps serving
+            self.error = exc
+            print(f"[index-migration] {self.model_name} failed: {exc}")
+
+    def run(self) -> bool:
+        """Re-embed everything, then switch ``ACTIVE``. Returns False if stopped.
+
+        If another process is already migrating into this index, waits for it
+        to finish instead, resuming its work if it exits without finishing.
+        """
+        while not self._lock.acquire(blocking=False):
+            if self.registry.is_active(self.model_name, self.dimension):
+                self.done.set()
+                return True
+            if self._stop.wait(self.poll_seconds):
+                return False
+        try:
+            if self.registry.is_active(self.model_name, self.dimension):
+                # Finished by another process between our polls.
+                self.done.set()
+                return True
+            return self._migrate()
+        finally:
+            self._lock.release()
+
+    def _migrate(self) -> bool:
+        self._extra_metadata = self._load_extra_metadata()
+        batches = self.db.iter_papers(self._load_checkpoint(), self.batch_size)
+        while True:
+            last_id = None
+            with self.store.bulk():
+                for rows in islice(batches, self.batches_per_publish):
+                    if self._stop.is_set():
+                        break
+                    self._index_batch(rows)
+                    last_id = rows[-1]["id"]
+                    if self._stop.wait(self.pause_seconds):
+                        break
+            # Checkpoint only what the store has published.
+            if last_id is not None:
+                self._save_checkpoint(last_id)
+            if self._stop.is_set():
+                return False
+            if last_id is None:
+                break
+
+        self.registry.activate(self.model_name, self.dimension)
+        self._checkpoint.unlink(missing_ok=True)
+        self.done.set()
+        return True
+
+    def _load_extra_metadata(self) -> Dict[str, Dict]:
+        """{paper key: metadata without a papers column} from ``source_store``."""
+        if self.source_store is None:
+            return {}
+        from .vector_store import FAISSVectorStore
+
+        columns = {row[1] for row in self.db.pool.reader().execute("PRAGMA table_info(papers)")}
+        columns.add("id")
+        extra = {}
+        for metadata, _ in self.source_store.iter_vectors():
+            for item in metadata:
+                fields = {k: v for k, v in item.items() if k not in columns}
+                if fields:
+                    extra[FAISSVectorStore._key(item)] = fields
+        return extra
+
+    def _index_batch(self, rows: List[Dict]):
+        papers = [paper_from_row(r) for r in rows]
+        for paper in papers:
+            paper.update(self._extra_metadata.get(str(paper.get("id")), ()))
+        papers = [p for p in papers if p.get("id") and embedding_text(p)]
+        if papers:
+            vectors = self.embedder.encode([embedding_text(p) for p in papers])
+            self.indexed += self.store.add(vectors, papers)
+
+    def _load_checkpoint(self) -> int:
+        try:
+            return int(json.loads(self._checkpoint.read_text())["after_id"])
+        except (FileNotFoundError, ValueError, KeyError):
+            return 0
+
+    def _save_checkpoint(self, after_id: int):
+        self._checkpoint.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_bytes(self._checkpoint, json.dumps({"after_id": after_id}).encode())
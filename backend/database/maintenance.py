@@ -0,0 +1,239 @@
+"""Retention and compaction for the SQLite cache databases.
+
+``papers.db`` and ``user_profiles.db`` only ever grew: query logs, chat and
+search history and papers cached once and never seen again. ``Maintenance``
+runs over one ``ConnectionPool`` and:
+
+1. Deletes rows older than their table's retention (``RETENTION``), in small
+   batches, each its own short write transaction, pausing in between so
+   request-path writers are never held up for long. Bookmarked papers are
+   never deleted.
+2. Merges the FTS index segments.
+3. Returns freed pages to the OS with ``PRAGMA incremental_vacuum``, again in
+   batches, then truncates the WAL. Files created before the pool set
+   ``auto_vacuum=INCREMENTAL`` are converted with one full ``VACUUM`` first.
+4. Refreshes planner statistics with a bounded ``ANALYZE``.
+
+``run()`` returns a report with rows deleted per table and bytes reclaimed.
+``MaintenanceJob`` repeats that every ``interval_hours`` on a daemon thread;
+``python -m database.maintenance`` (from ``backend/``) runs one pass over the
+default databases.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, NamedTuple, Optional
+
+from .connection_pool import ConnectionPool
+
+
+class RetentionPolicy(NamedTuple):
+    key: str  # primary key column(s) (WITHOUT ROWID tables have no rowid)
+    # UTC "YYYY-MM-DD HH:MM:SS" timestamp the age is measured on; indexed
+    # unless the table is rowid-ordered by it.
+    column: str
+    condition: str = ""  # extra filter on rows that may be deleted
+
+
+# How rows age out of each table. Tables not in a database are skipped.
+RETENTION: Dict[str, RetentionPolicy] = {
+    "query_history": RetentionPolicy("rowid", "created_at"),
+    "conversation_history": RetentionPolicy("rowid", "created_at"),
+    "search_history": RetentionPolicy("rowid", "created_at"),
+    # add_paper replaces the row, so created_at is when it was last fetched.
+    "papers": RetentionPolicy(
+        "rowid",
+        "created_at",
+        "NOT EXISTS (SELECT 1 FROM bookmarks b WHERE b.paper_id = papers.paper_id)",
+    ),
+    "user_term_stats": RetentionPolicy("user_id, term", "last_seen"),
+}
+
+
+class Maintenance:
+    """One maintenance pass over a database.
+
+    ``retention_days`` maps table name to days to keep (None = forever).
+    ``batch_size`` rows are deleted (and pages vacuumed) per write
+    transaction, with ``pause_seconds`` between batches.
+    """
+
+    def __init__(
+        self,
+        pool: ConnectionPool,
+        retention_days: Dict[str, Optional[float]],
+        batch_size: int = 500,
+        pause_seconds: float = 0.01,
+        analysis_limit: int = 1000,
+    ):
+        self.pool = pool
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+        self.pause_seconds = pause_seconds
+        self.analysis_limit = analysis_limit
+
+    def run(self, now: Optional[datetime] = None) -> Dict:
+        """Prune, compact and analyze. Returns what was done."""
+        started = time.perf_counter()
+        size_before = self._file_size()
+        deleted = self.prune(now)
+        self._optimize_fts()
+        pages = self.vacuum()
+        self._analyze()
+        size_after = self._file_size()
+        report = {
+            "db": self.pool.db_path,
+            "deleted": deleted,
+            "pages_freed": pages,
+            "bytes_before": size_before,
+            "bytes_after": size_after,
+            "bytes_reclaimed": size_before - size_after,
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+        print(
+            f"[maintenance] {report['db']}: deleted {sum(deleted.values())} rows, "
+            f"reclaimed {report['bytes_reclaimed']} bytes in {report['seconds']}s"
+        )
+        return report
+
+    # ------------------------------------------------------------ retention
+    def prune(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Delete expired rows batch by batch. Returns rows deleted per table."""
+        now = now or datetime.now(timezone.utc)
+        tables = self._tables()
+        deleted = {}
+        for table, days in self.retention_days.items():
+            policy = RETENTION.get(table)
+            if days is None or policy is None or table not in tables:
+                continue
+            cutoff = (now - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+            deleted[table] = self._delete_before(table, policy, cutoff)
+        return deleted
+
+    def _delete_before(self, table: str, policy: RetentionPolicy, cutoff: str) -> int:
+        where = f"{policy.column} < ?"
+        if policy.condition:
+            where += f" AND {policy.condition}"
+        # Each batch finds its rows through an index on the age column, or,
+        # for rowid tables appended in time order, near the start of the
+        # table -- either way without scanning all of it.
+        sql = (
+            f"DELETE FROM {table} WHERE ({policy.key}) IN "
+            f"(SELECT {policy.key} FROM {table} WHERE {where} LIMIT ?)"
+        )
+        total = 0
+        while True:
+            with self.pool.writer() as conn:
+                count = conn.execute(sql, (cutoff, self.batch_size)).rowcount
+            total += count
+            if count < self.batch_size:
+                return total
+            time.sleep(self.pause_seconds)
+
+    # ----------------------------------------------------------- compaction
+    def vacuum(self) -> int:
+        """Return free pages to the OS. Returns pages freed."""
+        with self.pool.writer(transaction=False) as conn:
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                # Pre-existing file: switching modes needs one full rebuild.
+                freed = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                conn.execute("VACUUM")
+                self._checkpoint(conn)
+                return freed
+
+        freed = 0
+        while True:
+            with self.pool.writer() as conn:
+                free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                if not free:
+                    break
+                conn.execute(f"PRAGMA incremental_vacuum({self.batch_size})").fetchall()
+                left = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if left >= free:
+                break
+            freed += free - left
+            time.sleep(self.pause_seconds)
+        with self.pool.writer(transaction=False) as conn:
+            self._checkpoint(conn)
+        return freed
+
+    @staticmethod
+    def _checkpoint(conn):
+        # The main file only shrinks once the WAL is checkpointed into it.
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+
+    def _optimize_fts(self):
+        if "papers_fts" in self._tables():
+            with self.pool.writer() as conn:
+                conn.execute("INSERT INTO papers_fts (papers_fts) VALUES ('optimize')")
+
+    def _analyze(self):
+        # analysis_limit samples each index instead of reading all of it.
+        with self.pool.writer() as conn:
+            conn.execute(f"PRAGMA analysis_limit = {int(self.analysis_limit)}")
+            conn.execute("ANALYZE")
+            conn.execute("PRAGMA optimize")
+
+    def _tables(self) -> set:
+        rows = self.pool.reader().execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+        return {name for (name,) in rows}
+
+    def _file_size(self) -> int:
+        return sum(
+            os.path.getsize(path)
+            for path in (self.pool.db_path, self.pool.db_path + "-wal")
+            if os.path.exists(path)
+        )
+
+
+class MaintenanceJob:
+    """Runs ``Maintenance`` over several pools every ``interval_hours``."""
+
+    def __init__(self, pools: List[ConnectionPool], retention_days: Dict[str, Optional[float]],
+                 interval_hours: float = 24.0, **kwargs):
+        self.tasks = [Maintenance(pool, retention_days, **kwargs) for pool in pools]
+        self.interval = interval_hours * 3600
+        self.reports: List[Dict] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "MaintenanceJob":
+        """Run on a daemon thread, first pass after one interval; returns immediately."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="db-maintenance", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run_once(self) -> List[Dict]:
+        reports = []
+        for task in self.tasks:
+            try:
+                reports.append(task.run())
+            except Exception as e:  # a failed pass is retried next interval
+                print(f"[maintenance] {task.pool.db_path} failed: {e}")
+        self.reports = reports
+        return reports
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.run_once()
+
+
+if __name__ == "__main__":
+    from config import CACHE_DIR, DB_PATH, RETENTION_DAYS
+
+    paths = [str(p) for p in (DB_PATH, CACHE_DIR / "user_profiles.db") if p.exists()]
+    pools = [ConnectionPool(path, pragmas={"foreign_keys": "ON"}) for path in paths]
+    job = MaintenanceJob(pools, RETENTION_DAYS)
+    for report in job.run_once():
+        print(report)
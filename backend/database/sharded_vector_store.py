@@ -0,0 +1,248 @@
+"""Sharded vector store with parallel scatter-gather search.
+
+A single ``FAISSVectorStore`` serialises every write (each add rewrites the
+whole index file) and searches on one index. ``ShardedVectorStore`` splits the
+corpus across several independent ``FAISSVectorStore`` shards, each with its
+own directory under ``cache_path``, and exposes the same interface:
+
+* ``add`` partitions papers by source (``partition="source"``) or by a stable
+  hash of the paper key (``partition="hash"``), then writes the touched shards
+  concurrently -- each shard only rewrites its own, smaller, files.
+* ``search``/``search_batch`` fan out to every shard on a thread pool (FAISS
+  releases the GIL while searching) and merge the per-shard top-k with a heap.
+
+Shards are loaded lazily on first use and can be loaded or persisted on their
+own via ``shard(name)``, which is the seam for moving them into separate
+processes later. Only subdirectories named like shards are opened, and a
+directory holding a single ``FAISSVectorStore`` is refused. ``max_vectors``
+caps the whole store, not each shard: past it, the least recently accessed
+vectors across all shards are evicted.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import heapq
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .vector_store import BatchSearchResult, FAISSVectorStore
+from utils.vector_codec import VectorCodec
+
+# What a single FAISSVectorStore keeps at its root; a shard root has none.
+_STORE_FILES = ("CURRENT", "snapshots", "index.faiss", "metadata.pkl")
+# Shard directory names shard_for produces, per partition scheme.
+_SHARD_NAMES = {
+    "hash": re.compile(r"shard_\d{2,}"),
+    "source": re.compile(r"[a-z0-9]+(?:_[a-z0-9]+)*"),
+}
+
+
+def open_vector_store(path, dimension: int, partition: str = "", num_shards: int = 4, **store_kwargs):
+    """A ``ShardedVectorStore`` when ``partition`` is set, else one ``FAISSVectorStore``."""
+    if partition:
+        return ShardedVectorStore(dimension, str(path), partition=partition, num_shards=num_shards, **store_kwargs)
+    return FAISSVectorStore(dimension, str(path), **store_kwargs)
+
+
+class ShardedVectorStore:
+    def __init__(
+        self,
+        dimension: int = 384,
+        cache_path: str = "cache/faiss_index/shards",
+        partition: str = "hash",
+        num_shards: int = 4,
+        max_workers: Optional[int] = None,
+        **store_kwargs,
+    ):
+        if partition not in ("hash", "source"):
+            raise ValueError("partition must be 'hash' or 'source'")
+        self.dimension = dimension
+        self.cache_path = Path(cache_path)
+        found = [name for name in _STORE_FILES if (self.cache_path / name).exists()]
+        if found:
+            raise ValueError(
+                f"{cache_path} holds a non-sharded vector store ({', '.join(found)}); "
+                "refusing to open it as shards"
+            )
+        self.cache_path.mkdir(parents=True, exist_ok=True)
+        self.partition = partition
+        self.num_shards = num_shards
+        # A global cap, enforced here rather than per shard.
+        self.max_vectors = store_kwargs.pop('max_vectors', None)
+        self._store_kwargs = store_kwargs
+        self._codec = store_kwargs.get('codec') or VectorCodec()
+        self._shards: Dict[str, FAISSVectorStore] = {}
+        # Guards _shards, so concurrent callers never open one shard twice.
+        self._shards_lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="vector-shard")
+        # Inside bulk(): shards entered so far (they publish on exit).
+        self._bulk: Optional[ExitStack] = None
+        self._bulk_shards: set = set()
+
+    @property
+    def codec(self) -> VectorCodec:
+        """The shards' codec: the one they were written with, if any exist."""
+        shards = self._all_shards()
+        return shards[0].codec if shards else self._codec
+
+    # ----------------------------------------------------------------- shards
+    def shard_names(self) -> List[str]:
+        """Names of all shards, on disk or in memory."""
+        pattern = _SHARD_NAMES[self.partition]
+        on_disk = {p.name for p in self.cache_path.iterdir() if p.is_dir() and pattern.fullmatch(p.name)}
+        with self._shards_lock:
+            return sorted(on_disk | set(self._shards))
+
+    def shard(self, name: str) -> FAISSVectorStore:
+        """Load (or create) one shard without touching the others."""
+        with self._shards_lock:
+            if name not in self._shards:
+                self._shards[name] = FAISSVectorStore(
+                    self.dimension, str(self.cache_path / name), **self._store_kwargs
+                )
+            return self._shards[name]
+
+    def shard_for(self, item: dict) -> str:
+        if self.partition == "source":
+            source = str(item.get('source') or 'unknown').lower()
+            return re.sub(r"[^a-z0-9]+", "_", source).strip("_") or "unknown"
+        key = FAISSVectorStore._key(item).encode("utf-8")
+        # md5 rather than hash(): it must be stable across processes.
+        bucket = int.from_bytes(hashlib.md5(key).digest()[:4], "little") % self.num_shards
+        return f"shard_{bucket:02d}"
+
+    def _all_shards(self) -> List[FAISSVectorStore]:
+        return [self.shard(name) for name in self.shard_names()]
+
+    def __len__(self) -> int:
+        return sum(len(s) for s in self._all_shards())
+
+    # ------------------------------------------------------------------ write
+    def add(self, embeddings: np.ndarray, metadata: list, prepared: bool = False) -> int:
+        """Route each paper to its shard and add the groups in parallel."""
+        if self.max_vectors is not None and self._bulk is None:
+            # The add and the cap's evictions then publish each touched shard
+            # once between them, instead of once each.
+            with self.bulk():
+                return self.add(embeddings, metadata, prepared)
+
+        embeddings = np.asarray(embeddings, dtype='float32')
+        if embeddings.ndim == 1:
+            embeddings = embeddings.reshape(1, -1)
+
+        groups: Dict[str, List[int]] = {}
+        for i, item in enumerate(metadata):
+            groups.setdefault(self.shard_for(item), []).append(i)
+
+        if self._bulk is not None:
+            # Shard write locks are held by this thread until bulk() exits.
+            added = 0
+            for name, rows in groups.items():
+                if name not in self._bulk_shards:
+                    self._bulk.enter_context(self.shard(name).bulk())
+                    self._bulk_shards.add(name)
+                added += self.shard(name).add(embeddings[rows], [metadata[r] for r in rows], prepared)
+        else:
+            futures = [
+                self._pool.submit(self.shard(name).add, embeddings[rows], [metadata[r] for r in rows], prepared)
+                for name, rows in groups.items()
+            ]
+            added = sum(f.result() for f in futures)
+        self._enforce_cap()
+        return added
+
+    def _enforce_cap(self) -> int:
+        """Evict the least recently accessed vectors, across shards, past ``max_vectors``."""
+        if self.max_vectors is None:
+            return 0
+        shards = self._all_shards()
+        sizes = [len(s.metadata) for s in shards]
+        overflow = sum(sizes) - self.max_vectors
+        if overflow <= 0:
+            return 0
+        last_access = np.concatenate([s._columns['last_access'] for s in shards])
+        owners = np.repeat(np.arange(len(shards)), sizes)
+        starts = np.cumsum([0] + sizes[:-1])
+        evict: Dict[int, List[str]] = {}
+        for pos in np.argsort(last_access, kind='stable')[:overflow]:
+            owner = int(owners[pos])
+            item = shards[owner].metadata[pos - starts[owner]]
+            evict.setdefault(owner, []).append(FAISSVectorStore._key(item))
+        return sum(shards[owner].remove(keys) for owner, keys in evict.items())
+
+    @contextmanager
+    def bulk(self):
+        """Publish each touched shard once, when the block exits (see FAISSVectorStore.bulk)."""
+        with ExitStack() as stack:
+            self._bulk, self._bulk_shards = stack, set()
+            try:
+                yield self
+            finally:
+                self._bulk = None
+
+    def iter_vectors(self, batch_size: int = 10_000) -> Iterator[Tuple[List[dict], np.ndarray]]:
+        """Every shard's ``iter_vectors``, one shard after another."""
+        for shard in self._all_shards():
+            yield from shard.iter_vectors(batch_size)
+
+    def remove(self, ids: Iterable[str]) -> int:
+        ids = list(ids)
+        return sum(self._pool.map(lambda s: s.remove(ids), self._all_shards()))
+
+    def expire(self, max_age_days: Optional[float] = None) -> int:
+        return sum(self._pool.map(lambda s: s.expire(max_age_days), self._all_shards()))
+
+    # ----------------------------------------------------------------- search
+    def search(self, query_embedding: np.ndarray, k: int = 10, filters: Optional[Dict] = None):
+        query_embedding = np.asarray(query_embedding, dtype='float32').reshape(1, -1)
+        return self.search_batch(query_embedding, k, filters=filters).hydrate(0)
+
+    def search_batch(
+        self,
+        queries: np.ndarray,
+        k: int = 10,
+        filters: Optional[Dict] = None,
+    ) -> BatchSearchResult:
+        """Scatter the queries to every shard, then gather the global top-k.
+
+        The returned ``BatchSearchResult`` indexes into a metadata list holding
+        only this batch's hits, so ``hydrate`` works as for a single store.
+        """
+        queries = np.ascontiguousarray(queries, dtype='float32')
+        if queries.ndim == 1:
+            queries = queries.reshape(1, -1)
+
+        shards = self._all_shards()
+        partials = list(self._pool.map(lambda s: s.search_batch(queries, k, filters=filters), shards))
+
+        metadata: list = []
+        rows_d, rows_i = [], []
+        for row in range(len(queries)):
+            candidates = (
+                (float(part.distances[row][j]), s, int(idx))
+                for s, part in enumerate(partials)
+                for j, idx in enumerate(part.indices[row])
+                if idx >= 0
+            )
+            best = heapq.nsmallest(k, candidates, key=lambda c: c[0])
+            rows_d.append([d for d, _, _ in best])
+            rows_i.append(list(range(len(metadata), len(metadata) + len(best))))
+            metadata.extend(partials[s]._metadata[idx] for _, s, idx in best)
+
+        width = max((len(r) for r in rows_i), default=0)
+        distances = np.full((len(queries), width), np.inf, dtype='float32')
+        indices = np.full((len(queries), width), -1, dtype='int64')
+        for row, (d, i) in enumerate(zip(rows_d, rows_i)):
+            distances[row, :len(d)] = d
+            indices[row, :len(i)] = i
+        return BatchSearchResult(distances, indices, metadata)
+
+    def close(self):
+        self._pool.shutdown(wait=True)
@@ -2,82 +2,416 @@ import sqlite3
 from datetime import datetime
 from typing import List, Dict, Optional
 
+import re
 import sqlite3
+import threading
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional, Sequence, Tuple
 from pathlib import Path
 
+from .connection_pool import get_pool
+from .write_buffer import get_write_buffer
+
+
+def split_authors(authors) -> List[str]:
+    """Author names from the legacy comma-joined string (or a list), in order."""
+    names = authors.split(',') if isinstance(authors, str) else (authors or [])
+    seen, result = set(), []
+    for name in (n.strip() for n in names):
+        if name and name_key(name) not in seen:
+            seen.add(name_key(name))
+            result.append(name)
+    return result
+
+
+def name_key(name: str) -> str:
+    """Lookup key for author and venue names: case, dots and spacing ignored."""
+    return " ".join(name.casefold().replace(".", " ").split())
+
+
 class PaperDatabase:
-    def __init__(self, db_path: str = "cache/papers.db"):
-        """Initialize SQLite database"""
+    def __init__(self, db_path: str = "cache/papers.db", write_behind: bool = True):
+        """Initialize SQLite database
+
+        With ``write_behind``, ``log_query`` rows are queued and written in
+        batches by a background thread (see write_buffer.py).
+        """
         # Create cache directory if it doesn't exist
         cache_dir = Path(db_path).parent
         cache_dir.mkdir(parents=True, exist_ok=True)
         
         self.db_path = db_path
-        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        # Per-thread readers + one writer over WAL, shared by every instance
+        # opened on this file (see connection_pool.py).
+        # add_paper uses INSERT OR REPLACE; the implicit delete of the old row
+        # only fires the FTS delete trigger with recursive triggers on.
+        self.pool = get_pool(
+            db_path, pragmas={"recursive_triggers": "ON", "foreign_keys": "ON"}
+        )
+        self.fts_enabled = False
         self._create_tables()
+        self.write_buffer = get_write_buffer(self.pool) if write_behind else None
     
     def _create_tables(self):
         """Create database schema"""
-        cursor = self.conn.cursor()
+        with self.pool.writer() as conn:
+            cursor = conn.cursor()
+        
+            # Papers table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS papers (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    paper_id TEXT UNIQUE,
+                    title TEXT NOT NULL,
+                    authors TEXT,
+                    abstract TEXT,
+                    year INTEGER,
+                    venue TEXT,
+                    citations INTEGER DEFAULT 0,
+                    url TEXT,
+                    pdf_url TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    venue_id INTEGER REFERENCES venues (id)
+                )
+            ''')
+        
+            # Query history
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS query_history (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    query TEXT NOT NULL,
+                    refined_query TEXT,
+                    results_count INTEGER,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+        
+            # Bookmark collections; every user gets "default" on first bookmark
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS collections (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE (user_id, name)
+                )
+            ''')
         
-        # Papers table
+            # Bookmarks reference papers by their stable paper_id: add_paper's
+            # INSERT OR REPLACE gives a re-stored paper a new rowid.
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS bookmarks (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id TEXT NOT NULL,
+                    paper_id TEXT NOT NULL REFERENCES papers (paper_id),
+                    collection_id INTEGER NOT NULL REFERENCES collections (id) ON DELETE CASCADE,
+                    notes TEXT,
+                    bookmarked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE (user_id, collection_id, paper_id)
+                )
+            ''')
+            # Newest-first pages of one collection, or of all of a user's
+            # bookmarks, are index range scans on these.
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_bookmarks_user_collection
+                ON bookmarks (user_id, collection_id, bookmarked_at, id)
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_bookmarks_user_time
+                ON bookmarks (user_id, bookmarked_at, id)
+            ''')
+            # Child-side index for the papers foreign key.
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_bookmarks_paper ON bookmarks (paper_id)
+            ''')
+            self._create_author_tables(cursor)
+        self._create_fts()
+        if self._author_tables_created and self.pool.reader().execute('SELECT 1 FROM papers LIMIT 1').fetchone():
+            # Papers stored before the author tables existed: index them.
+            self.rebuild_author_index(background=True)
+
+    def _create_author_tables(self, cursor):
+        """Authors and venues, interned once and linked to papers by id.
+
+        ``papers.authors`` / ``papers.venue`` stay as the legacy display
+        strings; lookups go through these tables instead of LIKE scans.
+        """
+        self._author_tables_created = not cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'paper_authors'"
+        ).fetchone()
         cursor.execute('''
-            CREATE TABLE IF NOT EXISTS papers (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                paper_id TEXT UNIQUE,
-                title TEXT NOT NULL,
-                authors TEXT,
-                abstract TEXT,
-                year INTEGER,
-                venue TEXT,
-                citations INTEGER DEFAULT 0,
-                url TEXT,
-                pdf_url TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            CREATE TABLE IF NOT EXISTS authors (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                name_key TEXT NOT NULL UNIQUE
             )
         ''')
-        
-        # Query history
         cursor.execute('''
-            CREATE TABLE IF NOT EXISTS query_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                query TEXT NOT NULL,
-                refined_query TEXT,
-                results_count INTEGER,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            CREATE TABLE IF NOT EXISTS venues (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                name_key TEXT NOT NULL UNIQUE
             )
         ''')
-        
-        self.conn.commit()
+        # Cascades when add_paper replaces or maintenance deletes a paper;
+        # add_paper writes the links again after the replace.
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS paper_authors (
+                paper_id TEXT NOT NULL REFERENCES papers (paper_id) ON DELETE CASCADE,
+                position INTEGER NOT NULL,
+                author_id INTEGER NOT NULL REFERENCES authors (id),
+                PRIMARY KEY (paper_id, position)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_paper_authors_author
+            ON paper_authors (author_id, paper_id)
+        ''')
+        columns = {row[1] for row in cursor.execute("PRAGMA table_info(papers)")}
+        if 'venue_id' not in columns:
+            cursor.execute('ALTER TABLE papers ADD COLUMN venue_id INTEGER REFERENCES venues (id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_papers_venue ON papers (venue_id)')
+    
+    def _create_fts(self):
+        """Full-text index over papers, kept in sync by triggers.
+
+        An external-content FTS5 table stores only the inverted index (the
+        text stays in ``papers``). ``prefix`` builds extra indexes so short
+        prefix queries don't scan the term list, and the default rank is bm25
+        with titles weighted over abstracts. SQLite builds without FTS5 fall
+        back to the old LIKE scan in ``search_papers``.
+        """
+        try:
+            with self.pool.writer() as conn:
+                self._create_fts_schema(conn.cursor())
+        except sqlite3.OperationalError as e:  # SQLite compiled without FTS5
+            print(f"[db] full-text search unavailable, using LIKE: {e}")
+            return
+        self.fts_enabled = True
+
+    @staticmethod
+    def _create_fts_schema(cursor):
+        exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'papers_fts'"
+        ).fetchone()
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts USING fts5(
+                title, abstract,
+                content='papers', content_rowid='id',
+                tokenize='porter unicode61', prefix='2 3'
+            )
+        ''')
+        for statement in (
+            '''
+                CREATE TRIGGER IF NOT EXISTS papers_fts_insert AFTER INSERT ON papers BEGIN
+                    INSERT INTO papers_fts(rowid, title, abstract)
+                    VALUES (new.id, new.title, new.abstract);
+                END
+            ''',
+            '''
+                CREATE TRIGGER IF NOT EXISTS papers_fts_delete AFTER DELETE ON papers BEGIN
+                    INSERT INTO papers_fts(papers_fts, rowid, title, abstract)
+                    VALUES ('delete', old.id, old.title, old.abstract);
+                END
+            ''',
+            '''
+                CREATE TRIGGER IF NOT EXISTS papers_fts_update AFTER UPDATE OF title, abstract ON papers BEGIN
+                    INSERT INTO papers_fts(papers_fts, rowid, title, abstract)
+                    VALUES ('delete', old.id, old.title, old.abstract);
+                    INSERT INTO papers_fts(rowid, title, abstract)
+                    VALUES (new.id, new.title, new.abstract);
+                END
+            ''',
+        ):
+            cursor.execute(statement)
+        if not exists:
+            # Index rows written before the FTS table existed.
+            cursor.execute("INSERT INTO papers_fts(papers_fts) VALUES ('rebuild')")
+            cursor.execute(
+                "INSERT INTO papers_fts(papers_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0)')"
+            )
     
     def add_paper(self, paper: Dict) -> int:
-        """Add or update paper"""
-        cursor = self.conn.cursor()
+        """Add or update paper
+
+        A ``created_at`` in the dict (e.g. from a snapshot) is kept; otherwise
+        it is now.
+        """
+        authors = paper.get('authors')
+        if isinstance(authors, (list, tuple)):
+            authors = ', '.join(authors)
+        with self.pool.writer() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                INSERT OR REPLACE INTO papers 
+                (paper_id, title, authors, abstract, year, venue, citations, url, pdf_url, venue_id, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))
+            ''', (
+                paper.get('id'),
+                paper['title'],
+                authors,
+                paper.get('abstract'),
+                paper.get('year'),
+                paper.get('venue'),
+                paper.get('citations', 0),
+                paper.get('url'),
+                paper.get('pdf_url'),
+                self._intern(conn, 'venues', paper.get('venue')),
+                paper.get('created_at'),
+            ))
+            self._link_authors(conn, paper.get('id'), authors)
         
+        return cursor.lastrowid
+
+    def add_papers(self, papers: Sequence[Dict]) -> int:
+        """``add_paper`` for many papers in one transaction. Returns the count."""
+        with self.pool.writer():
+            for paper in papers:
+                self.add_paper(paper)
+        return len(papers)
+
+    @staticmethod
+    def _intern(conn, table: str, name: Optional[str]) -> Optional[int]:
+        """Id of ``name`` in ``authors``/``venues``, inserting it if new."""
+        key = name_key(name or '')
+        if not key:
+            return None
+        conn.execute(f'INSERT OR IGNORE INTO {table} (name, name_key) VALUES (?, ?)', (name.strip(), key))
+        return conn.execute(f'SELECT id FROM {table} WHERE name_key = ?', (key,)).fetchone()[0]
+
+    def _link_authors(self, conn, paper_id: Optional[str], authors):
+        if not paper_id:
+            return
+        conn.execute('DELETE FROM paper_authors WHERE paper_id = ?', (paper_id,))
+        conn.executemany(
+            'INSERT INTO paper_authors (paper_id, position, author_id) VALUES (?, ?, ?)',
+            [(paper_id, i, self._intern(conn, 'authors', name))
+             for i, name in enumerate(split_authors(authors))],
+        )
+
+    def rebuild_author_index(self, background: bool = False, batch_size: int = 500):
+        """(Re)build authors, venues and paper links from the legacy columns.
+
+        Runs one write transaction per batch of papers. With
+        ``background=True`` it runs on a daemon thread, which is returned;
+        otherwise returns the number of papers indexed.
+        """
+        if background:
+            worker = threading.Thread(
+                target=self.rebuild_author_index, kwargs={'batch_size': batch_size},
+                name="author-index-rebuild", daemon=True,
+            )
+            worker.start()
+            return worker
+
+        indexed = 0
+        for rows in self.iter_papers(batch_size=batch_size):
+            with self.pool.writer() as conn:
+                # Re-read under the write lock: a paper add_paper replaced
+                # meanwhile has a new id and already has its links.
+                batch = conn.execute(
+                    'SELECT id, paper_id, authors, venue FROM papers WHERE id BETWEEN ? AND ?',
+                    (rows[0]['id'], rows[-1]['id']),
+                ).fetchall()
+                for rowid, paper_id, authors, venue in batch:
+                    conn.execute(
+                        'UPDATE papers SET venue_id = ? WHERE id = ?',
+                        (self._intern(conn, 'venues', venue), rowid),
+                    )
+                    self._link_authors(conn, paper_id, authors)
+            indexed += len(batch)
+        return indexed
+
+    def get_papers_by_author(self, author: str, limit: int = 50) -> List[Dict]:
+        """Papers listing ``author``, newest first (a lookup on the author index)."""
+        cursor = self.pool.reader().cursor()
         cursor.execute('''
-            INSERT OR REPLACE INTO papers 
-            (paper_id, title, authors, abstract, year, venue, citations, url, pdf_url)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            paper.get('id'),
-            paper['title'],
-            paper.get('authors'),
-            paper.get('abstract'),
-            paper.get('year'),
-            paper.get('venue'),
-            paper.get('citations', 0),
-            paper.get('url'),
-            paper.get('pdf_url')
-        ))
+            SELECT p.* FROM authors a
+            JOIN paper_authors pa ON pa.author_id = a.id
+            JOIN papers p ON p.paper_id = pa.paper_id
+            WHERE a.name_key = ?
+            ORDER BY p.year DESC, p.citations DESC
+            LIMIT ?
+        ''', (name_key(author), limit))
         
-        self.conn.commit()
-        return cursor.lastrowid
+        columns = [desc[0] for desc in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def get_coauthors(self, author: str, limit: int = 20) -> List[Dict]:
+        """Authors who share papers with ``author``, most shared papers first."""
+        cursor = self.pool.reader().cursor()
+        cursor.execute('''
+            SELECT co.name, COUNT(*) AS papers
+            FROM authors a
+            JOIN paper_authors mine ON mine.author_id = a.id
+            JOIN paper_authors theirs ON theirs.paper_id = mine.paper_id
+                                     AND theirs.author_id != a.id
+            JOIN authors co ON co.id = theirs.author_id
+            WHERE a.name_key = ?
+            GROUP BY co.id
+            ORDER BY papers DESC, co.name
+            LIMIT ?
+        ''', (name_key(author), limit))
+        return [{'name': name, 'papers': count} for name, count in cursor.fetchall()]
+
+    def get_papers_by_venue(self, venue: str, limit: int = 50) -> List[Dict]:
+        """Papers published at ``venue``, newest first."""
+        cursor = self.pool.reader().cursor()
+        cursor.execute('''
+            SELECT p.* FROM venues v
+            JOIN papers p ON p.venue_id = v.id
+            WHERE v.name_key = ?
+            ORDER BY p.year DESC, p.citations DESC
+            LIMIT ?
+        ''', (name_key(venue), limit))
+        
+        columns = [desc[0] for desc in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
     
     def search_papers(self, query: str, limit: int = 20) -> List[Dict]:
-        """Search papers by title/abstract"""
-        cursor = self.conn.cursor()
+        """Search papers by title/abstract
+
+        Uses the FTS5 index: every query word must match (the last one as a
+        prefix, for search-as-you-type), results are ranked by bm25 and each
+        row carries a ``snippet`` of matching abstract text with hits in
+        [brackets]. Without FTS5 this is the old LIKE scan by citations.
+        """
+        match = self._fts_query(query)
+        if not self.fts_enabled or not match:
+            return self._search_papers_like(query, limit)
+
+        cursor = self.pool.reader().cursor()
+        cursor.execute('''
+            SELECT papers.*,
+                   snippet(papers_fts, 1, '[', ']', '…', 16) AS snippet,
+                   papers_fts.rank AS score
+            FROM papers_fts
+            JOIN papers ON papers.id = papers_fts.rowid
+            WHERE papers_fts MATCH ?
+            ORDER BY papers_fts.rank
+            LIMIT ?
+        ''', (match, limit))
+        
+        columns = [desc[0] for desc in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    @staticmethod
+    def _fts_query(query: str) -> str:
+        """Turn free text into an FTS5 MATCH expression.
+
+        Words are quoted so user input can't inject FTS syntax (AND, NEAR,
+        column filters); the last word becomes a prefix query.
+        """
+        words = re.findall(r"\w+", query or "")
+        if not words:
+            return ""
+        terms = [f'"{w}"' for w in words]
+        terms[-1] += "*"
+        return " ".join(terms)
+
+    def _search_papers_like(self, query: str, limit: int) -> List[Dict]:
+        cursor = self.pool.reader().cursor()
         
         cursor.execute('''
             SELECT * FROM papers 
@@ -89,11 +423,188 @@ class PaperDatabase:
         columns = [desc[0] for desc in cursor.description]
         return [dict(zip(columns, row)) for row in cursor.fetchall()]
     
+    def iter_papers(self, after_id: int = 0, batch_size: int = 500) -> Iterator[List[Dict]]:
+        """Yield every paper with ``id > after_id`` in pages of ``batch_size``.
+
+        Pages are keyed on the rowid (``WHERE id > last``), so each page is an
+        index seek and rows inserted while iterating are still reached.
+        """
+        cursor = self.pool.reader().cursor()
+        while True:
+            cursor.execute('''
+                SELECT * FROM papers WHERE id > ? ORDER BY id LIMIT ?
+            ''', (after_id, batch_size))
+            columns = [desc[0] for desc in cursor.description]
+            rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            if not rows:
+                return
+            yield rows
+            after_id = rows[-1]['id']
+
     def log_query(self, query: str, refined_query: str, results_count: int):
         """Log user query"""
-        cursor = self.conn.cursor()
-        cursor.execute('''
+        sql = '''
             INSERT INTO query_history (query, refined_query, results_count)
             VALUES (?, ?, ?)
-        ''', (query, refined_query, results_count))
-        self.conn.commit()
\ No newline at end of file
+        '''
+        params = (query, refined_query, results_count)
+        if self.write_buffer is not None:
+            self.write_buffer.add(sql, params, key="query_history")
+            return
+        with self.pool.writer() as conn:
+            conn.execute(sql, params)
+
+    def get_query_history_page(
+        self,
+        limit: int = 50,
+        before_id: Optional[int] = None,
+    ) -> Tuple[List[Dict], Optional[int]]:
+        """One page of logged queries, newest first, plus the cursor for the next page.
+
+        The table is keyed by its rowid, so ``id < before_id ORDER BY id DESC``
+        walks the primary-key B-tree directly; no extra index is needed.
+        """
+        if self.write_buffer is not None:
+            self.write_buffer.flush_pending("query_history")
+        cursor = self.pool.reader().cursor()
+        if before_id is None:
+            cursor.execute('''
+                SELECT * FROM query_history ORDER BY id DESC LIMIT ?
+            ''', (limit,))
+        else:
+            cursor.execute('''
+                SELECT * FROM query_history WHERE id < ? ORDER BY id DESC LIMIT ?
+            ''', (before_id, limit))
+        
+        columns = [desc[0] for desc in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        next_cursor = rows[-1]['id'] if len(rows) == limit else None
+        return rows, next_cursor
+
+    # ------------------------------------------------------------ bookmarks
+    def create_collection(self, user_id: str, name: str) -> bool:
+        """Create a collection; False if the user already has one by that name."""
+        try:
+            with self.pool.writer() as conn:
+                conn.execute(
+                    'INSERT INTO collections (user_id, name) VALUES (?, ?)', (user_id, name)
+                )
+            return True
+        except sqlite3.IntegrityError:
+            return False
+
+    def get_collections(self, user_id: str) -> List[Dict]:
+        """The user's collections with their bookmark counts."""
+        cursor = self.pool.reader().cursor()
+        cursor.execute('''
+            SELECT c.name, c.created_at,
+                   (SELECT COUNT(*) FROM bookmarks b
+                    WHERE b.user_id = c.user_id AND b.collection_id = c.id) AS count
+            FROM collections c
+            WHERE c.user_id = ?
+            ORDER BY c.name
+        ''', (user_id,))
+        columns = [desc[0] for desc in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def add_bookmark(self, user_id: str, paper_id: str, collection_name: str = "default",
+                     notes: Optional[str] = None, paper: Optional[Dict] = None) -> bool:
+        """Bookmark one paper (see ``add_bookmarks``). True if it was saved."""
+        try:
+            self.add_bookmarks(user_id, [paper_id], collection_name, notes,
+                               papers=[paper] if paper else None)
+            return True
+        except sqlite3.Error as e:
+            print(f"Bookmark error: {e}")
+            return False
+
+    def add_bookmarks(self, user_id: str, paper_ids: Sequence[str], collection_name: str = "default",
+                      notes: Optional[str] = None, papers: Optional[Sequence[Dict]] = None) -> int:
+        """Bookmark many papers into one collection in a single transaction.
+
+        The collection is created if needed. ``papers`` (full paper dicts) are
+        stored first if not already in the papers table, so bookmarking a
+        search result never trips the foreign key. Already-bookmarked papers
+        are skipped. Returns the number of bookmarks added.
+        """
+        with self.pool.writer() as conn:
+            for paper in papers or ():
+                if not conn.execute('SELECT 1 FROM papers WHERE paper_id = ?', (paper.get('id'),)).fetchone():
+                    self.add_paper(paper)
+            collection_id = self._collection_id(conn, user_id, collection_name)
+            before = conn.total_changes
+            conn.executemany('''
+                INSERT OR IGNORE INTO bookmarks (user_id, paper_id, collection_id, notes)
+                VALUES (?, ?, ?, ?)
+            ''', [(user_id, pid, collection_id, notes) for pid in paper_ids])
+            return conn.total_changes - before
+
+    def remove_bookmarks(self, user_id: str, paper_ids: Sequence[str],
+                         collection_name: Optional[str] = None) -> int:
+        """Remove papers from one collection, or from all of the user's. Returns rows removed."""
+        with self.pool.writer() as conn:
+            before = conn.total_changes
+            if collection_name is None:
+                conn.executemany(
+                    'DELETE FROM bookmarks WHERE user_id = ? AND paper_id = ?',
+                    [(user_id, pid) for pid in paper_ids],
+                )
+            else:
+                conn.executemany('''
+                    DELETE FROM bookmarks
+                    WHERE user_id = ? AND paper_id = ? AND collection_id =
+                        (SELECT id FROM collections WHERE user_id = ? AND name = ?)
+                ''', [(user_id, pid, user_id, collection_name) for pid in paper_ids])
+            return conn.total_changes - before
+
+    def get_bookmarks(self, user_id: str, collection_name: Optional[str] = None,
+                      limit: int = 50) -> List[Dict]:
+        """Most recent bookmarks (first page of ``get_bookmarks_page``)."""
+        bookmarks, _ = self.get_bookmarks_page(user_id, collection_name, limit)
+        return bookmarks
+
+    def get_bookmarks_page(
+        self,
+        user_id: str,
+        collection_name: Optional[str] = None,
+        limit: int = 50,
+        before: Optional[Tuple[str, int]] = None,
+    ) -> Tuple[List[Dict], Optional[Tuple[str, int]]]:
+        """One page of bookmarks, newest first, plus the cursor for the next page.
+
+        Rows are paper columns plus ``bookmark_id``, ``collection_name``,
+        ``notes`` and ``bookmarked_at``. The cursor is the last row's
+        (bookmarked_at, bookmark_id); pass it back as ``before``. Each page is
+        a range scan on (user_id[, collection_id], bookmarked_at, id).
+        """
+        where = ['b.user_id = ?']
+        params: list = [user_id]
+        if collection_name is not None:
+            where.append('b.collection_id = (SELECT id FROM collections WHERE user_id = ? AND name = ?)')
+            params += [user_id, collection_name]
+        if before is not None:
+            where.append('(b.bookmarked_at, b.id) < (?, ?)')
+            params += list(before)
+        cursor = self.pool.reader().cursor()
+        cursor.execute(f'''
+            SELECT p.*, b.id AS bookmark_id, c.name AS collection_name,
+                   b.notes, b.bookmarked_at
+            FROM bookmarks b
+            JOIN collections c ON c.id = b.collection_id
+            JOIN papers p ON p.paper_id = b.paper_id
+            WHERE {' AND '.join(where)}
+            ORDER BY b.bookmarked_at DESC, b.id DESC
+            LIMIT ?
+        ''', params + [limit])
+        
+        columns = [desc[0] for desc in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        next_cursor = (rows[-1]['bookmarked_at'], rows[-1]['bookmark_id']) if len(rows) == limit else None
+        return rows, next_cursor
+
+    @staticmethod
+    def _collection_id(conn, user_id: str, name: str) -> int:
+        conn.execute('INSERT OR IGNORE INTO collections (user_id, name) VALUES (?, ?)', (user_id, name))
+        return conn.execute(
+            'SELECT id FROM collections WHERE user_id = ? AND name = ?', (user_id, name)
+        ).fetchone()[0]
@@ -1,95 +1,184 @@
 import sqlite3
-from typing import Dict, List, Optional
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
 import json
 
+from .connection_pool import get_pool
+from .write_buffer import get_write_buffer
+
+# Upper bound for "no cursor yet" in keyset queries (SQLite's max rowid).
+_MAX_ID = 2**63 - 1
+
+# Search terms lose half their weight in suggestions every TERM_HALF_LIFE_DAYS.
+# Changing it requires recompute_term_stats().
+TERM_HALF_LIFE_DAYS = 30.0
+# Weights are stored as 2^((t - _TERM_EPOCH) / half-life) rather than decayed
+# in place: every stored weight would shrink by the same factor as time
+# passes, so the ranking never changes and nothing has to be rewritten.
+_TERM_EPOCH = 1_700_000_000
+
+_UPSERT_TERM = '''
+    INSERT INTO user_term_stats (user_id, term, weight, last_seen)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT (user_id, term) DO UPDATE SET
+        weight = weight + excluded.weight,
+        last_seen = MAX(last_seen, excluded.last_seen)
+'''
+
+
+def query_terms(query: str) -> Counter:
+    """Topic terms of a search query, with repeat counts."""
+    return Counter(word for word in query.lower().split() if len(word) > 4)  # Skip short words
+
+
+def _term_weight(timestamp: float) -> float:
+    return 2.0 ** ((timestamp - _TERM_EPOCH) / (TERM_HALF_LIFE_DAYS * 86400))
+
+
+def _parse_timestamp(value: str) -> float:
+    # CURRENT_TIMESTAMP is UTC, "YYYY-MM-DD HH:MM:SS".
+    return datetime.strptime(value, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc).timestamp()
+
 class UserProfileManager:
     """Manages user profiles, preferences, and conversation history"""
     
-    def __init__(self, db_path: str = "cache/user_profiles.db"):
+    def __init__(self, db_path: str = "cache/user_profiles.db", write_behind: bool = True):
+        """Open (or create) the profile database.
+
+        With ``write_behind``, chat messages and search history are queued and
+        written in batches by a background thread (see write_buffer.py);
+        history reads still see the caller's own session's writes.
+        """
         cache_dir = Path(db_path).parent
         cache_dir.mkdir(parents=True, exist_ok=True)
         
         self.db_path = db_path
-        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        # Per-thread readers + one writer over WAL, shared by every instance
+        # opened on this file (see connection_pool.py).
+        self.pool = get_pool(db_path)
         self._create_tables()
+        self.write_buffer = get_write_buffer(self.pool) if write_behind else None
+        if self._term_stats_created and self.pool.reader().execute(
+            "SELECT 1 FROM search_history LIMIT 1"
+        ).fetchone():
+            # Databases from before user_term_stats: backfill from history.
+            self.recompute_term_stats(background=True)
     
     def _create_tables(self):
-        cursor = self.conn.cursor()
+        with self.pool.writer() as conn:
+            cursor = conn.cursor()
         
-        # User profiles
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_profiles (
-                user_id TEXT PRIMARY KEY,
-                name TEXT NOT NULL,
-                email TEXT,
-                research_domains TEXT,  -- JSON array
-                favorite_authors TEXT,  -- JSON array
-                preferred_sources TEXT, -- JSON array
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                last_active TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Conversation history
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS conversation_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id TEXT NOT NULL,
-                session_id TEXT NOT NULL,
-                role TEXT NOT NULL,  -- 'user' or 'assistant'
-                content TEXT NOT NULL,
-                metadata TEXT,  -- JSON
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES user_profiles (user_id)
-            )
-        ''')
+            # User profiles
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS user_profiles (
+                    user_id TEXT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    email TEXT,
+                    research_domains TEXT,  -- JSON array
+                    favorite_authors TEXT,  -- JSON array
+                    preferred_sources TEXT, -- JSON array
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    last_active TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
         
-        # User preferences
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_preferences (
-                user_id TEXT PRIMARY KEY,
-                summary_style TEXT DEFAULT 'concise',
-                citation_format TEXT DEFAULT 'APA',
-                results_per_page INTEGER DEFAULT 20,
-                enable_notifications BOOLEAN DEFAULT 1,
-                theme TEXT DEFAULT 'dark',
-                FOREIGN KEY (user_id) REFERENCES user_profiles (user_id)
-            )
-        ''')
+            # Conversation history
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS conversation_history (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id TEXT NOT NULL,
+                    session_id TEXT NOT NULL,
+                    role TEXT NOT NULL,  -- 'user' or 'assistant'
+                    content TEXT NOT NULL,
+                    metadata TEXT,  -- JSON
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (user_id) REFERENCES user_profiles (user_id)
+                )
+            ''')
         
-        # Search history
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS search_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id TEXT NOT NULL,
-                query TEXT NOT NULL,
-                results_count INTEGER,
-                filters_applied TEXT,  -- JSON
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES user_profiles (user_id)
-            )
-        ''')
+            # User preferences
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS user_preferences (
+                    user_id TEXT PRIMARY KEY,
+                    summary_style TEXT DEFAULT 'concise',
+                    citation_format TEXT DEFAULT 'APA',
+                    results_per_page INTEGER DEFAULT 20,
+                    enable_notifications BOOLEAN DEFAULT 1,
+                    theme TEXT DEFAULT 'dark',
+                    FOREIGN KEY (user_id) REFERENCES user_profiles (user_id)
+                )
+            ''')
         
-        self.conn.commit()
+            # Search history
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS search_history (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id TEXT NOT NULL,
+                    query TEXT NOT NULL,
+                    results_count INTEGER,
+                    filters_applied TEXT,  -- JSON
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (user_id) REFERENCES user_profiles (user_id)
+                )
+            ''')
+
+            # History reads seek on these instead of scanning and sorting the
+            # table. Ordering by id (insertion order) rather than created_at
+            # keeps the key unique, which keyset pagination needs.
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_conversation_user_session
+                ON conversation_history (user_id, session_id, id)
+            ''')
+            # Covering: every column get_search_history_page reads.
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_search_history_user
+                ON search_history (user_id, id, query, results_count, filters_applied, created_at)
+            ''')
+
+            # Per-user topic weights, maintained as searches are logged.
+            self._term_stats_created = not cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'user_term_stats'"
+            ).fetchone()
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS user_term_stats (
+                    user_id TEXT NOT NULL,
+                    term TEXT NOT NULL,
+                    weight REAL NOT NULL,  -- time-decayed count, see _TERM_EPOCH
+                    last_seen TIMESTAMP,
+                    PRIMARY KEY (user_id, term)
+                ) WITHOUT ROWID
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_user_term_stats_top
+                ON user_term_stats (user_id, weight DESC)
+            ''')
+            # Retention (maintenance.py) deletes by age; the table is keyed
+            # on (user_id, term), so without this every batch is a full scan.
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_user_term_stats_last_seen
+                ON user_term_stats (last_seen)
+            ''')
     
     def create_or_update_profile(self, user_id: str, name: str, **kwargs) -> bool:
         """Create or update user profile"""
         try:
-            cursor = self.conn.cursor()
+            with self.pool.writer() as conn:
+                cursor = conn.cursor()
             
-            research_domains = json.dumps(kwargs.get('research_domains', []))
-            favorite_authors = json.dumps(kwargs.get('favorite_authors', []))
-            preferred_sources = json.dumps(kwargs.get('preferred_sources', []))
+                research_domains = json.dumps(kwargs.get('research_domains', []))
+                favorite_authors = json.dumps(kwargs.get('favorite_authors', []))
+                preferred_sources = json.dumps(kwargs.get('preferred_sources', []))
             
-            cursor.execute('''
-                INSERT OR REPLACE INTO user_profiles 
-                (user_id, name, email, research_domains, favorite_authors, preferred_sources, last_active)
-                VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-            ''', (user_id, name, kwargs.get('email'), research_domains, favorite_authors, preferred_sources))
+                cursor.execute('''
+                    INSERT OR REPLACE INTO user_profiles 
+                    (user_id, name, email, research_domains, favorite_authors, preferred_sources, last_active)
+                    VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ''', (user_id, name, kwargs.get('email'), research_domains, favorite_authors, preferred_sources))
             
-            self.conn.commit()
             return True
         except Exception as e:
             print(f"Profile error: {e}")
@@ -97,7 +186,7 @@ class UserProfileManager:
     
     def get_profile(self, user_id: str) -> Optional[Dict]:
         """Get user profile"""
-        cursor = self.conn.cursor()
+        cursor = self.pool.reader().cursor()
         cursor.execute('SELECT * FROM user_profiles WHERE user_id = ?', (user_id,))
         
         row = cursor.fetchone()
@@ -116,76 +205,210 @@ class UserProfileManager:
     
     def add_conversation_message(self, user_id: str, session_id: str, role: str, content: str, metadata: Dict = None):
         """Add message to conversation history"""
-        cursor = self.conn.cursor()
-        cursor.execute('''
+        self._write('''
             INSERT INTO conversation_history (user_id, session_id, role, content, metadata)
             VALUES (?, ?, ?, ?, ?)
-        ''', (user_id, session_id, role, content, json.dumps(metadata or {})))
-        self.conn.commit()
+        ''', (user_id, session_id, role, content, json.dumps(metadata or {})),
+            key=('conversation', user_id, session_id))
     
     def get_conversation_history(self, user_id: str, session_id: str, limit: int = 10) -> List[Dict]:
         """Get recent conversation history"""
-        cursor = self.conn.cursor()
+        messages, _ = self.get_conversation_page(user_id, session_id, limit)
+        return messages
+
+    def get_conversation_page(
+        self,
+        user_id: str,
+        session_id: str,
+        limit: int = 50,
+        before_id: Optional[int] = None,
+    ) -> Tuple[List[Dict], Optional[int]]:
+        """One page of a session, oldest first, plus the cursor for the page before it.
+
+        Keyset pagination on the message id: pass the returned cursor as
+        ``before_id`` to load older messages; it is None on the first page.
+        The (user_id, session_id, id) index makes every page an index seek,
+        however long the history grows.
+        """
+        self._read_your_writes(('conversation', user_id, session_id))
+        cursor = self.pool.reader().cursor()
         cursor.execute('''
-            SELECT role, content, metadata, created_at
+            SELECT id, role, content, metadata, created_at
             FROM conversation_history
-            WHERE user_id = ? AND session_id = ?
-            ORDER BY created_at DESC
+            WHERE user_id = ? AND session_id = ? AND id < ?
+            ORDER BY id DESC
             LIMIT ?
-        ''', (user_id, session_id, limit))
+        ''', (user_id, session_id, _MAX_ID if before_id is None else before_id, limit))
         
         messages = []
         for row in cursor.fetchall():
             messages.append({
-                'role': row[0],
-                'content': row[1],
-                'metadata': json.loads(row[2]),
-                'timestamp': row[3]
+                'id': row[0],
+                'role': row[1],
+                'content': row[2],
+                'metadata': json.loads(row[3]),
+                'timestamp': row[4]
             })
         
-        return list(reversed(messages))
+        next_cursor = messages[-1]['id'] if len(messages) == limit else None
+        return list(reversed(messages)), next_cursor
     
     def add_search_to_history(self, user_id: str, query: str, results_count: int, filters: Dict = None):
-        """Log search query"""
-        cursor = self.conn.cursor()
-        cursor.execute('''
+        """Log search query (and fold its terms into user_term_stats)"""
+        now = time.time()
+        last_seen = datetime.fromtimestamp(now, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        statements = [('''
             INSERT INTO search_history (user_id, query, results_count, filters_applied)
             VALUES (?, ?, ?, ?)
-        ''', (user_id, query, results_count, json.dumps(filters or {})))
-        self.conn.commit()
+        ''', (user_id, query, results_count, json.dumps(filters or {})))]
+        statements += [
+            (_UPSERT_TERM, (user_id, term, count * _term_weight(now), last_seen))
+            for term, count in query_terms(query).items()
+        ]
+        self._write_all(statements, key=('search', user_id))
+
+    def _write(self, sql: str, params: tuple, key):
+        self._write_all([(sql, params)], key)
+
+    def _write_all(self, statements: List[Tuple[str, tuple]], key):
+        """Queue on the write-behind buffer, or write now (one transaction) without one."""
+        if self.write_buffer is not None:
+            for sql, params in statements:
+                self.write_buffer.add(sql, params, key=key)
+            return
+        with self.pool.writer() as conn:
+            for sql, params in statements:
+                conn.execute(sql, params)
+
+    def _read_your_writes(self, key):
+        if self.write_buffer is not None:
+            self.write_buffer.flush_pending(key)
     
     def get_search_history(self, user_id: str, limit: int = 20) -> List[Dict]:
         """Get user's search history"""
-        cursor = self.conn.cursor()
+        searches, _ = self.get_search_history_page(user_id, limit)
+        return searches
+
+    def get_search_history_page(
+        self,
+        user_id: str,
+        limit: int = 20,
+        before_id: Optional[int] = None,
+    ) -> Tuple[List[Dict], Optional[int]]:
+        """One page of searches, newest first, plus the cursor for the next page.
+
+        Served entirely from the covering (user_id, id, ...) index.
+        """
+        self._read_your_writes(('search', user_id))
+        cursor = self.pool.reader().cursor()
         cursor.execute('''
-            SELECT query, results_count, filters_applied, created_at
+            SELECT id, query, results_count, filters_applied, created_at
             FROM search_history
-            WHERE user_id = ?
-            ORDER BY created_at DESC
+            WHERE user_id = ? AND id < ?
+            ORDER BY id DESC
             LIMIT ?
-        ''', (user_id, limit))
+        ''', (user_id, _MAX_ID if before_id is None else before_id, limit))
         
+        rows = cursor.fetchall()
         columns = ['query', 'results_count', 'filters_applied', 'created_at']
-        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        searches = [dict(zip(columns, row[1:])) for row in rows]
+        next_cursor = rows[-1][0] if len(rows) == limit else None
+        return searches, next_cursor
     
     def get_personalized_suggestions(self, user_id: str) -> Dict:
-        """Get personalized research suggestions based on history"""
+        """Get personalized research suggestions based on history
+
+        Trending topics are the user's top terms by time-decayed search
+        count, read straight off idx_user_term_stats_top.
+        """
         profile = self.get_profile(user_id)
-        search_history = self.get_search_history(user_id, limit=10)
-        
-        # Extract common topics from search history
-        common_terms = {}
-        for search in search_history:
-            words = search['query'].lower().split()
-            for word in words:
-                if len(word) > 4:  # Skip short words
-                    common_terms[word] = common_terms.get(word, 0) + 1
-        
-        # Sort by frequency
-        trending_topics = sorted(common_terms.items(), key=lambda x: x[1], reverse=True)[:5]
+        self._read_your_writes(('search', user_id))
+        cursor = self.pool.reader().cursor()
+        cursor.execute('''
+            SELECT term FROM user_term_stats
+            WHERE user_id = ?
+            ORDER BY weight DESC
+            LIMIT 5
+        ''', (user_id,))
         
         return {
             'research_domains': profile.get('research_domains', []) if profile else [],
-            'trending_topics': [topic[0] for topic in trending_topics],
+            'trending_topics': [row[0] for row in cursor.fetchall()],
             'favorite_authors': profile.get('favorite_authors', []) if profile else []
-        }
\ No newline at end of file
+        }
+
+    def term_stats(self, user_id: str, limit: int = 20) -> List[Dict]:
+        """Top terms with their decayed counts as of now."""
+        self._read_your_writes(('search', user_id))
+        scale = 1.0 / _term_weight(time.time())
+        rows = self.pool.reader().execute('''
+            SELECT term, weight, last_seen FROM user_term_stats
+            WHERE user_id = ?
+            ORDER BY weight DESC
+            LIMIT ?
+        ''', (user_id, limit)).fetchall()
+        return [{'term': t, 'count': w * scale, 'last_seen': seen} for t, w, seen in rows]
+
+    def recompute_term_stats(self, user_id: Optional[str] = None, background: bool = False):
+        """Rebuild user_term_stats from search_history (one user, or everyone).
+
+        For backfilling existing databases or after changing
+        TERM_HALF_LIFE_DAYS. History is read in keyset pages outside the write
+        lock; the swap happens in one transaction that also folds in searches
+        logged meanwhile, so concurrent logging is neither lost nor counted
+        twice. With ``background=True`` it runs on a daemon thread, which is
+        returned. Otherwise returns the number of (user, term) rows written.
+        """
+        if background:
+            worker = threading.Thread(
+                target=self._recompute_in_background, args=(user_id,),
+                name="term-stats-recompute", daemon=True,
+            )
+            worker.start()
+            return worker
+
+        if self.write_buffer is not None:
+            self.write_buffer.flush()
+        reader = self.pool.reader()
+        upto = reader.execute("SELECT COALESCE(MAX(id), 0) FROM search_history").fetchone()[0]
+        stats = self._term_stats_from_history(reader, user_id, 0, upto)
+
+        with self.pool.writer() as conn:
+            self._term_stats_from_history(conn, user_id, upto, _MAX_ID, stats)
+            if user_id is None:
+                conn.execute("DELETE FROM user_term_stats")
+            else:
+                conn.execute("DELETE FROM user_term_stats WHERE user_id = ?", (user_id,))
+            conn.executemany(_UPSERT_TERM, [
+                (user, term, weight, last_seen) for (user, term), (weight, last_seen) in stats.items()
+            ])
+        return len(stats)
+
+    def _recompute_in_background(self, user_id: Optional[str]):
+        try:
+            self.recompute_term_stats(user_id)
+        except Exception as e:
+            print(f"Term stats error: {e}")
+
+    @staticmethod
+    def _term_stats_from_history(conn, user_id, after_id, upto_id, stats=None, page=1000):
+        """Accumulate {(user, term): [weight, last_seen]} over history ids in (after_id, upto_id]."""
+        stats = {} if stats is None else stats
+        user_filter = "" if user_id is None else "AND user_id = ?"
+        while True:
+            params = (after_id, upto_id) + (() if user_id is None else (user_id,)) + (page,)
+            rows = conn.execute(f'''
+                SELECT id, user_id, query, created_at FROM search_history
+                WHERE id > ? AND id <= ? {user_filter}
+                ORDER BY id
+                LIMIT ?
+            ''', params).fetchall()
+            if not rows:
+                return stats
+            for _, user, query, created_at in rows:
+                weight = _term_weight(_parse_timestamp(created_at))
+                for term, count in query_terms(query).items():
+                    entry = stats.setdefault((user, term), [0.0, created_at])
+                    entry[0] += count * weight
+                    entry[1] = max(entry[1], created_at)
+            after_id = rows[-1][0]
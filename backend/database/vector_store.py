@@ -1,96 +1,654 @@
 import faiss
 import numpy as np
+import os
 import pickle
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .file_lock import FileLock, atomic_write_bytes
+from utils.vector_codec import VectorCodec
+
+# Field-of-study vocabulary is interned into a 64-bit mask per vector.
+# Semantic Scholar uses ~20 fields, so this is never hit in practice; fields
+# beyond the cap are simply not indexed for domain filtering.
+MAX_DOMAIN_FIELDS = 64
+
+# Published snapshots kept on disk. Readers may still be loading an older one
+# when a writer publishes, so keep a few rather than deleting immediately.
+SNAPSHOTS_TO_KEEP = 3
+
+# An add() that only refreshes last-seen times of papers already indexed does
+# not publish a snapshot unless the last one is at least this old; any real
+# change publishes the refreshed times along with it. Expiry works in days.
+LAST_SEEN_PUBLISH_SECONDS = 3600
+
+
+@dataclass
+class BatchSearchResult:
+    """Raw results of ``FAISSVectorStore.search_batch``.
+
+    ``distances`` and ``indices`` are (n_queries, k) arrays straight from FAISS;
+    missing hits have index -1. Metadata is only looked up when asked for, via
+    ``hydrate``, so callers that just need ids/scores never build dicts.
+    """
+    distances: np.ndarray
+    indices: np.ndarray
+    _metadata: list
+
+    @property
+    def similarities(self) -> np.ndarray:
+        return 1 / (1 + self.distances)
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def metadata(self, row: int) -> List[dict]:
+        """Metadata for the hits of query ``row``, in rank order."""
+        return [self._metadata[i] for i in self.indices[row] if 0 <= i < len(self._metadata)]
+
+    def hydrate(self, row: int) -> List[dict]:
+        """Hits for query ``row`` in the same dict format ``search`` returns."""
+        results = []
+        for dist, idx in zip(self.distances[row], self.indices[row]):
+            if 0 <= idx < len(self._metadata):
+                results.append({
+                    'metadata': self._metadata[idx],
+                    'distance': float(dist),
+                    'similarity': 1 / (1 + float(dist))
+                })
+        return results
+
+    def hydrate_all(self) -> List[List[dict]]:
+        return [self.hydrate(row) for row in range(len(self))]
 
 
 class FAISSVectorStore:
-    def __init__(self, dimension: int = 384, cache_path: str = "cache/faiss_index"):
+    def __init__(
+        self,
+        dimension: int = 384,
+        cache_path: str = "cache/faiss_index",
+        max_age_days: Optional[float] = None,
+        max_vectors: Optional[int] = None,
+        codec: Optional[VectorCodec] = None,
+    ):
         """Initialize FAISS index with id-based deduplication.
 
         Previously every search() re-embedded its results and add()-ed them to
         the same index with no dedup, so the store accumulated duplicate vectors
         across sessions and semantic-search quality decayed over time. We now
         track seen paper ids and skip anything already indexed.
+
+        The store is also bounded: ``max_age_days`` expires papers that have not
+        been seen by ``add()`` for that long (see ``expire``), and ``max_vectors``
+        caps the index size by evicting the least recently accessed vectors.
+        Both default to ``None`` (unbounded), matching the old behaviour.
+
+        Several processes (API workers, the Chainlit app, main.py) may share
+        one ``cache_path``. Writers serialise on an exclusive file lock, reload
+        the latest snapshot, apply their change and publish a new immutable
+        ``snapshots/vNNNNNNNN`` directory by atomically replacing the
+        ``CURRENT`` pointer. Readers never take the file lock: each search
+        checks ``CURRENT`` and swaps in a newer snapshot if one was published.
+        Within a process, searches and writers share a short in-memory lock;
+        a writer copies the state under it and writes the snapshot to disk
+        after releasing it, so searches don't wait on disk writes.
+
+        ``codec`` sets the storage precision and optional PCA projection shared
+        with the RAG index (see utils/vector_codec.py). float16 and int8 map to
+        FAISS scalar-quantizer indexes; since those have no per-vector scales,
+        int8 here uses one corpus-wide scale from ``codec.max_abs``. Each
+        snapshot records its codec, and a store already on disk keeps the one
+        it was written with -- its vectors only compare in that space -- so a
+        different ``codec`` here is ignored with a warning.
         """
         self.dimension = dimension
+        self.codec = codec or VectorCodec()
         self.cache_path = Path(cache_path)
         self.cache_path.mkdir(parents=True, exist_ok=True)
+        self.max_age_days = max_age_days
+        self.max_vectors = max_vectors
 
         # Create index
-        self.index = faiss.IndexFlatL2(dimension)
+        self.index = self._new_index()
         self.metadata = []
-        # Set of paper ids already present in the index, for dedup on insert.
-        self._seen_ids = set()
+        # Per-vector attributes, aligned with index positions and self.metadata.
+        #   last_seen   -- last time add() was given this paper (drives expiry)
+        #   last_access -- last time the vector was returned by search (drives LRU)
+        #   year, citations, source, domains -- filter predicates (see _filter_mask)
+        self._columns: Dict[str, np.ndarray] = self._empty_columns()
+        # Interned strings behind the 'source' codes and 'domains' bits.
+        self._sources: List[str] = []
+        self._fields: List[str] = []
+        # Paper key -> index position, for dedup on insert and remove() by id.
+        self._positions: Dict[str, int] = {}
+
+        # Snapshot version currently loaded, and the CURRENT file stat it came
+        # from (so unchanged snapshots are detected with a single stat call).
+        self._version = 0
+        self._current_stat = None
+        self._write_lock = FileLock(self.cache_path / ".write.lock")
+        self._state_lock = threading.RLock()
+        # Inside bulk(): changes are published once, on exit.
+        self._bulk_depth = 0
+        self._bulk_dirty = False
+        # Nesting of _writing() blocks, and whether the outermost publishes.
+        self._writing_depth = 0
+        self._publish_pending = False
+        self._published_at = time.time()
 
         self._load_cache()
 
+    def _new_index(self):
+        dim = self.codec.output_dim(self.dimension)
+        if self.codec.precision == "float16":
+            return faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_L2)
+        if self.codec.precision == "int8":
+            return faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit_direct_signed, faiss.METRIC_L2)
+        return faiss.IndexFlatL2(dim)
+
+    @property
+    def _int8_scale(self) -> float:
+        """Multiplier mapping codec output onto the int8 code range."""
+        return 127.0 / self.codec.max_abs if self.codec.precision == "int8" else 1.0
+
+    def _prepare(self, vectors: np.ndarray) -> np.ndarray:
+        """Project and scale vectors into the index's space (adds and queries)."""
+        vectors = self.codec.transform(vectors)
+        if self.codec.precision == "int8":
+            vectors = np.clip(vectors * self._int8_scale, -127, 127)
+        return np.ascontiguousarray(vectors, dtype='float32')
+
     @staticmethod
     def _key(item: dict) -> str:
         """Stable dedup key for a paper. Falls back to title if no id."""
         return str(item.get('id') or item.get('paper_id') or item.get('title') or '')
 
-    def add(self, embeddings: np.ndarray, metadata: list):
+    @staticmethod
+    def _empty_columns() -> Dict[str, np.ndarray]:
+        return {
+            'last_seen': np.empty(0, dtype='float64'),
+            'last_access': np.empty(0, dtype='float64'),
+            'year': np.empty(0, dtype='int32'),
+            'citations': np.empty(0, dtype='int64'),
+            'source': np.empty(0, dtype='int32'),
+            'domains': np.empty(0, dtype='uint64'),
+        }
+
+    def _intern(self, table: List[str], value: str, limit: Optional[int] = None) -> int:
+        try:
+            return table.index(value)
+        except ValueError:
+            if limit is not None and len(table) >= limit:
+                return -1
+            table.append(value)
+            return len(table) - 1
+
+    def _columns_for(self, items: list, now: float) -> Dict[str, np.ndarray]:
+        """Build column values for new metadata items."""
+        years, citations, sources, domains = [], [], [], []
+        for item in items:
+            years.append(_as_int(item.get('year')))
+            citations.append(_as_int(item.get('citations')))
+            sources.append(self._intern(self._sources, str(item.get('source') or '')))
+            fields = item.get('fields') or []
+            if isinstance(fields, str):
+                fields = [fields]
+            mask = 0
+            for field in fields:
+                bit = self._intern(self._fields, str(field).lower(), MAX_DOMAIN_FIELDS)
+                if bit >= 0:
+                    mask |= 1 << bit
+            domains.append(mask)
+        stamps = np.full(len(items), now, dtype='float64')
+        return {
+            'last_seen': stamps,
+            'last_access': stamps.copy(),
+            'year': np.asarray(years, dtype='int32'),
+            'citations': np.asarray(citations, dtype='int64'),
+            'source': np.asarray(sources, dtype='int32'),
+            'domains': np.asarray(domains, dtype='uint64'),
+        }
+
+    def __len__(self) -> int:
+        return self.index.ntotal
+
+    def add(self, embeddings: np.ndarray, metadata: list, prepared: bool = False):
         """Add embeddings to the index, skipping papers already indexed.
 
         embeddings[i] must correspond to metadata[i]. Returns the number of
-        new (non-duplicate) vectors actually added.
+        new (non-duplicate) vectors actually added. Papers that are already
+        indexed have their last-seen time refreshed so they don't expire; a
+        refresh alone is published lazily (see ``LAST_SEEN_PUBLISH_SECONDS``).
+        ``prepared`` vectors are already in index space (from
+        ``iter_vectors`` of a store with the same codec) and go in as-is.
         """
         embeddings = np.asarray(embeddings, dtype='float32')
         if embeddings.ndim == 1:
             embeddings = embeddings.reshape(1, -1)
 
-        new_vectors = []
-        new_metadata = []
-        for vec, item in zip(embeddings, metadata):
+        with self._writing():
+            now = time.time()
+            new_vectors = []
+            new_metadata = []
+            batch_keys = set()
+            refreshed = False
+            for vec, item in zip(embeddings, metadata):
+                key = self._key(item)
+                if key and key in self._positions:
+                    self._columns['last_seen'][self._positions[key]] = now
+                    refreshed = True
+                    continue  # already indexed — skip duplicate
+                if key and key in batch_keys:
+                    continue
+                if key:
+                    batch_keys.add(key)
+                new_vectors.append(vec)
+                new_metadata.append(item)
+
+            if new_vectors:
+                start = len(self.metadata)
+                vectors = np.asarray(new_vectors, dtype='float32')
+                self.index.add(np.ascontiguousarray(vectors) if prepared else self._prepare(vectors))
+                self.metadata.extend(new_metadata)
+                for offset, item in enumerate(new_metadata):
+                    key = self._key(item)
+                    if key:
+                        self._positions[key] = start + offset
+                fresh = self._columns_for(new_metadata, now)
+                self._columns = {
+                    name: np.concatenate([col, fresh[name]]) for name, col in self._columns.items()
+                }
+
+            removed = self._enforce_limits(now)
+            stale = refreshed and now - self._published_at >= LAST_SEEN_PUBLISH_SECONDS
+            if new_vectors or removed or stale:
+                self._save_cache()
+            return len(new_vectors)
+
+    def search(self, query_embedding: np.ndarray, k: int = 10, filters: Optional[Dict] = None):
+        """Search for similar embeddings.
+
+        ``filters`` takes the same keys as ``FilterManager.active_filters``
+        (see ``search_batch``) and is applied before ranking.
+        """
+        query_embedding = np.asarray(query_embedding, dtype='float32').reshape(1, -1)
+        return self.search_batch(query_embedding, k, filters=filters).hydrate(0)
+
+    def search_batch(
+        self,
+        queries: np.ndarray,
+        k: int = 10,
+        filters: Optional[Dict] = None,
+    ) -> BatchSearchResult:
+        """Search many query vectors in a single FAISS call.
+
+        ``queries`` is an (n, dim) matrix. One call lets FAISS parallelise
+        across queries internally and avoids per-query Python overhead.
+
+        ``filters`` may set ``min_year``/``max_year``, ``min_citations``/
+        ``max_citations``, ``sources`` and ``domains``, with the same semantics
+        as ``FilterManager.apply_filters``. They are evaluated on the attribute
+        columns and passed to FAISS as an ID selector, so each query gets the
+        top-k *matching* papers rather than a filtered-down top-k. Keyword
+        filters are text predicates and are left to the caller.
+        """
+        queries = np.ascontiguousarray(queries, dtype='float32')
+        if queries.ndim == 1:
+            queries = queries.reshape(1, -1)
+
+        with self._state_lock:
+            self._refresh()
+            return self._search_locked(queries, k, filters)
+
+    def _search_locked(self, queries: np.ndarray, k: int, filters: Optional[Dict]) -> BatchSearchResult:
+        queries = self._prepare(queries)
+        mask = self._filter_mask(filters or {})
+        candidates = self.index.ntotal if mask is None else int(mask.sum())
+        k = min(k, candidates)
+        if k == 0:
+            empty = np.empty((len(queries), 0))
+            return BatchSearchResult(empty.astype('float32'), empty.astype('int64'), self.metadata)
+
+        if mask is None:
+            distances, indices = self.index.search(queries, k)
+        else:
+            # The selector holds a raw pointer, so keep `bitmap` alive past search.
+            bitmap = np.packbits(mask, bitorder='little')
+            selector = faiss.IDSelectorBitmap(len(mask), faiss.swig_ptr(bitmap))
+            params = faiss.SearchParameters(sel=selector)
+            distances, indices = self.index.search(queries, k, params=params)
+        if self.codec.precision == "int8":
+            distances = distances / self._int8_scale ** 2
+
+        # Access times only live in memory until the next save; losing them on
+        # a crash just makes LRU slightly less accurate.
+        hits = indices[indices >= 0]
+        if hits.size:
+            self._columns['last_access'][hits] = time.time()
+        return BatchSearchResult(distances, indices, self.metadata)
+
+    def _filter_mask(self, filters: Dict) -> Optional[np.ndarray]:
+        """Boolean mask of vectors passing ``filters``, or None if unfiltered."""
+        cols = self._columns
+        mask = None
+
+        def narrow(cond):
+            nonlocal mask
+            mask = cond if mask is None else mask & cond
+
+        # Falsy bounds mean "not set", as in FilterManager. Unknown years are
+        # stored as 0 and never satisfy a year bound.
+        if filters.get('min_year'):
+            narrow((cols['year'] > 0) & (cols['year'] >= filters['min_year']))
+        if filters.get('max_year'):
+            narrow((cols['year'] > 0) & (cols['year'] <= filters['max_year']))
+        if filters.get('min_citations'):
+            narrow(cols['citations'] >= filters['min_citations'])
+        if filters.get('max_citations'):
+            narrow(cols['citations'] <= filters['max_citations'])
+        if filters.get('sources'):
+            codes = [i for i, name in enumerate(self._sources) if name in set(filters['sources'])]
+            narrow(np.isin(cols['source'], codes))
+        if filters.get('domains'):
+            wanted = [d.lower() for d in filters['domains']]
+            bits = 0
+            for i, field in enumerate(self._fields):
+                if any(d in field for d in wanted):
+                    bits |= 1 << i
+            # Papers with no field info are kept, matching FilterManager.
+            domains = cols['domains']
+            narrow((domains == 0) | ((domains & np.uint64(bits)) != 0))
+        return mask
+
+    def iter_vectors(self, batch_size: int = 10_000) -> Iterator[Tuple[List[dict], np.ndarray]]:
+        """Yield ``(metadata, vectors)`` for every stored vector, in batches.
+
+        Vectors are as stored: after the codec's projection and scaling (see
+        ``add(prepared=True)``). Reads the latest published snapshot through a
+        memory map, so it blocks neither searches nor writers and never holds
+        a second copy of the index in memory.
+        """
+        with self._state_lock:
+            self._refresh()
+            version = self._version
+        if not version:
+            index_path, metadata_path = self.cache_path / "index.faiss", self.cache_path / "metadata.pkl"
+            if not index_path.exists():
+                return
+            index, metadata = self._open_mapped(index_path, metadata_path)
+        else:
+            for _ in range(5):  # a writer may prune the snapshot; follow CURRENT
+                directory = self._snapshot_dir(version)
+                try:
+                    index, metadata = self._open_mapped(directory / "index.faiss", directory / "metadata.pkl")
+                    break
+                except (FileNotFoundError, RuntimeError):
+                    version = self._read_current()
+            else:
+                raise RuntimeError(f"could not open a vector store snapshot in {self.cache_path}")
+        for start in range(0, index.ntotal, batch_size):
+            count = min(batch_size, index.ntotal - start)
+            yield metadata[start:start + count], index.reconstruct_n(start, count)
+
+    @staticmethod
+    def _open_mapped(index_path: Path, metadata_path: Path):
+        with open(metadata_path, 'rb') as f:
+            payload = pickle.load(f)
+        metadata = payload['metadata'] if isinstance(payload, dict) else payload
+        return faiss.read_index(str(index_path), faiss.IO_FLAG_MMAP), metadata
+
+    @contextmanager
+    def bulk(self):
+        """Group many ``add``/``remove`` calls into one published snapshot.
+
+        Each change normally rewrites the whole index file; bulk loads would
+        pay that per batch. Holds the write lock until the block exits.
+        """
+        with self._writing():
+            self._bulk_depth += 1
+            try:
+                yield self
+            finally:
+                self._bulk_depth -= 1
+                if not self._bulk_depth and self._bulk_dirty:
+                    self._bulk_dirty = False
+                    self._save_cache()
+
+    # ------------------------------------------------------------- eviction
+    def remove(self, ids: Iterable[str]) -> int:
+        """Remove papers by id (the same key used for dedup). Returns count removed."""
+        with self._writing():
+            positions = [self._positions[str(i)] for i in ids if str(i) in self._positions]
+            removed = self._remove_positions(positions)
+            if removed:
+                self._save_cache()
+            return removed
+
+    def expire(self, max_age_days: Optional[float] = None, now: Optional[float] = None) -> int:
+        """Drop papers whose last-seen time is older than ``max_age_days``.
+
+        Defaults to the store's own ``max_age_days``; a no-op when neither is set.
+        Returns the number of vectors removed.
+        """
+        with self._writing():
+            removed = self._expire(max_age_days, time.time() if now is None else now)
+            if removed:
+                self._save_cache()
+            return removed
+
+    def _expire(self, max_age_days: Optional[float], now: float) -> int:
+        max_age_days = self.max_age_days if max_age_days is None else max_age_days
+        if max_age_days is None or not len(self.metadata):
+            return 0
+        cutoff = now - max_age_days * 86400
+        stale = np.flatnonzero(self._columns['last_seen'] < cutoff)
+        return self._remove_positions(stale)
+
+    def _enforce_limits(self, now: float) -> int:
+        """Apply the expiry sweep, then evict least-recently-accessed past the cap."""
+        removed = self._expire(None, now)
+        if self.max_vectors is not None and len(self.metadata) > self.max_vectors:
+            overflow = len(self.metadata) - self.max_vectors
+            lru = np.argsort(self._columns['last_access'], kind='stable')[:overflow]
+            removed += self._remove_positions(lru)
+        return removed
+
+    def _remove_positions(self, positions) -> int:
+        """Delete vectors at the given positions and compact metadata/columns.
+
+        IndexFlat.remove_ids shifts the surviving vectors down in order, so we
+        apply the same keep-mask to metadata and columns to stay aligned.
+        """
+        positions = np.unique(np.asarray(positions, dtype='int64'))
+        if positions.size == 0:
+            return 0
+        self.index.remove_ids(positions)
+        keep = np.ones(len(self.metadata), dtype=bool)
+        keep[positions] = False
+        self.metadata = [m for m, k in zip(self.metadata, keep) if k]
+        self._columns = {name: col[keep] for name, col in self._columns.items()}
+        self._rebuild_positions()
+        return int(positions.size)
+
+    def _rebuild_positions(self):
+        self._positions = {}
+        for pos, item in enumerate(self.metadata):
             key = self._key(item)
-            if key and key in self._seen_ids:
-                continue  # already indexed — skip duplicate
             if key:
-                self._seen_ids.add(key)
-            new_vectors.append(vec)
-            new_metadata.append(item)
+                self._positions[key] = pos
 
-        if not new_vectors:
-            return 0
+    # ---------------------------------------------------------- persistence
+    @contextmanager
+    def _writing(self):
+        """Hold the cross-process write lock on top of the latest snapshot.
 
-        self.index.add(np.asarray(new_vectors, dtype='float32'))
-        self.metadata.extend(new_metadata)
-        self._save_cache()
-        return len(new_vectors)
+        Refreshing first means a writer never overwrites additions another
+        process published since this one last loaded.
+        """
+        with self._write_lock:
+            with self._state_lock:
+                self._refresh()
+                self._writing_depth += 1
+                try:
+                    yield
+                finally:
+                    self._writing_depth -= 1
+                    state = None
+                    if not self._writing_depth and self._publish_pending:
+                        self._publish_pending = False
+                        state = self._copy_state()
+            if state is not None:
+                self._publish(state)
 
-    def search(self, query_embedding: np.ndarray, k: int = 10):
-        """Search for similar embeddings."""
-        if self.index.ntotal == 0:
-            return []
-        query_embedding = np.asarray(query_embedding, dtype='float32').reshape(1, -1)
-        k = min(k, self.index.ntotal)
-        distances, indices = self.index.search(query_embedding, k)
+    @property
+    def _current_path(self) -> Path:
+        return self.cache_path / "CURRENT"
 
-        results = []
-        for i, idx in enumerate(indices[0]):
-            if 0 <= idx < len(self.metadata):
-                results.append({
-                    'metadata': self.metadata[idx],
-                    'distance': float(distances[0][i]),
-                    'similarity': 1 / (1 + float(distances[0][i]))
-                })
+    def _snapshot_dir(self, version: int) -> Path:
+        return self.cache_path / "snapshots" / f"v{version:08d}"
 
-        return results
+    def _refresh(self):
+        """Swap in a newer published snapshot, if there is one."""
+        try:
+            stat = os.stat(self._current_path)
+        except FileNotFoundError:
+            return
+        key = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        if key == self._current_stat:
+            return
+        version = self._read_current()
+        if version and version != self._version:
+            self._load_snapshot(version)
+        self._current_stat = key
+
+    def _read_current(self) -> int:
+        try:
+            return int(self._current_path.read_text().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
 
     def _save_cache(self):
-        """Save index and metadata."""
-        faiss.write_index(self.index, str(self.cache_path / "index.faiss"))
-        with open(self.cache_path / "metadata.pkl", 'wb') as f:
-            pickle.dump(self.metadata, f)
+        """Publish index and metadata as a new snapshot when the outermost
+        ``_writing()`` block exits. Caller is inside ``_writing()``."""
+        if self._bulk_depth:
+            self._bulk_dirty = True
+            return
+        self._publish_pending = True
+
+    def _copy_state(self) -> Tuple[np.ndarray, Dict]:
+        """Serialized index and copied metadata to publish. Caller holds ``_state_lock``."""
+        return faiss.serialize_index(self.index), {
+            'codec': self.codec.to_dict(),
+            'metadata': list(self.metadata),
+            'columns': {name: col.copy() for name, col in self._columns.items()},
+            'sources': list(self._sources),
+            'fields': list(self._fields),
+        }
+
+    def _publish(self, state: Tuple[np.ndarray, Dict]):
+        """Write a snapshot copied by ``_copy_state``. Holds only the write lock."""
+        index_bytes, payload = state
+        version = max(self._version, self._read_current()) + 1
+        final = self._snapshot_dir(version)
+        tmp = final.with_name(f".{final.name}.{os.getpid()}.tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        with open(tmp / "index.faiss", 'wb') as f:
+            f.write(index_bytes.tobytes())
+        with open(tmp / "metadata.pkl", 'wb') as f:
+            pickle.dump(payload, f)
+        os.replace(tmp, final)
+        with self._state_lock:
+            # Together, so a search never reloads the snapshot it already has.
+            atomic_write_bytes(self._current_path, str(version).encode())
+            self._version = version
+            self._published_at = time.time()
+        self._prune_snapshots()
+
+    def _prune_snapshots(self):
+        root = self.cache_path / "snapshots"
+        published = sorted(p for p in root.iterdir() if p.name.startswith("v"))
+        for old in published[:-SNAPSHOTS_TO_KEEP]:
+            shutil.rmtree(old, ignore_errors=True)
 
     def _load_cache(self):
-        """Load cached index and rebuild the dedup set."""
-        index_path = self.cache_path / "index.faiss"
-        metadata_path = self.cache_path / "metadata.pkl"
-
-        if index_path.exists() and metadata_path.exists():
-            self.index = faiss.read_index(str(index_path))
-            with open(metadata_path, 'rb') as f:
-                self.metadata = pickle.load(f)
-            self._seen_ids = {self._key(m) for m in self.metadata if self._key(m)}
+        """Load the current snapshot, or a pre-snapshot cache from cache_path."""
+        with self._state_lock:
+            self._refresh()
+            if self._version:
+                return
+            index_path = self.cache_path / "index.faiss"
+            metadata_path = self.cache_path / "metadata.pkl"
+            if index_path.exists() and metadata_path.exists():
+                self._load_files(index_path, metadata_path)
+
+    def _load_snapshot(self, version: int):
+        # A writer may prune this snapshot while we read it; follow CURRENT.
+        for _ in range(5):
+            directory = self._snapshot_dir(version)
+            try:
+                self._load_files(directory / "index.faiss", directory / "metadata.pkl")
+                self._version = version
+                return
+            except (FileNotFoundError, RuntimeError):
+                version = self._read_current()
+        raise RuntimeError(f"could not load a vector store snapshot from {self.cache_path}")
+
+    def _load_files(self, index_path: Path, metadata_path: Path):
+        """Load an index/metadata pair and rebuild the dedup map.
+
+        Older caches pickled a bare metadata list, or lack some columns; those
+        are rebuilt from metadata with every vector stamped as seen/accessed
+        now, so nothing expires on upgrade.
+        """
+        with open(metadata_path, 'rb') as f:
+            payload = pickle.load(f)
+        self.index = faiss.read_index(str(index_path))
+        if isinstance(payload, list):
+            payload = {'metadata': payload, 'columns': {}}
+        self.metadata = payload['metadata']
+        self._sources = payload.get('sources', [])
+        self._fields = payload.get('fields', [])
+        self._adopt_codec(payload.get('codec'))
+        self._columns = payload['columns']
+        if set(self._columns) != set(self._empty_columns()):
+            self._sources, self._fields = [], []
+            rebuilt = self._columns_for(self.metadata, time.time())
+            rebuilt.update({k: v for k, v in self._columns.items() if k in ('last_seen', 'last_access')})
+            self._columns = rebuilt
+        self._rebuild_positions()
+
+    def _adopt_codec(self, stored: Optional[Dict]):
+        """Switch to the codec the loaded index was written with, if it differs."""
+        codec = VectorCodec(**stored) if stored else self._infer_codec()
+        if codec != self.codec:
+            print(f"[vector_store] {self.cache_path} was written with {codec!r}; "
+                  f"ignoring the configured {self.codec!r}")
+            self.codec = codec
+
+    def _infer_codec(self) -> VectorCodec:
+        """Codec of a snapshot written before codecs were recorded."""
+        precision = "float32"
+        if isinstance(self.index, faiss.IndexScalarQuantizer):
+            fp16 = self.index.sq.qtype == faiss.ScalarQuantizer.QT_fp16
+            precision = "float16" if fp16 else "int8"
+        if self.codec.precision == precision and self.codec.output_dim(self.dimension) == self.index.d:
+            return self.codec
+        if self.index.d == self.dimension:
+            return VectorCodec(precision)
+        raise ValueError(
+            f"{self.cache_path} holds a {self.index.d}-dimensional {precision} index "
+            f"that {self.codec!r} cannot have written"
+        )
+
+
+def _as_int(value) -> int:
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
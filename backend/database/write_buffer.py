@@ -0,0 +1,191 @@
+"""Write-behind buffering for high-frequency, low-value inserts.
+
+Query logs, chat messages and search history used to be one INSERT plus one
+commit each, inside the request. ``WriteBehindBuffer`` queues those rows and a
+background thread writes them in a single transaction every
+``flush_interval_ms`` or as soon as ``max_rows`` are waiting, whichever comes
+first. Consecutive rows for the same statement go through one
+``executemany``.
+
+Read-your-writes: each row may carry a ``key`` (e.g. the chat session). Reads
+that need to see their own writes call ``flush_pending(key)``, which flushes
+only if rows for that key are still queued -- so loading one session never
+forces a flush on behalf of the others.
+
+If a batch fails, its rows are written one by one, so a single bad row (a
+constraint violation, an unbindable parameter) does not hold up the rest. A
+row that fails ``max_attempts`` flushes is logged and moved to
+``dead_letters`` instead of being retried forever.
+
+``close()`` (also registered with ``atexit``) stops the thread and flushes
+whatever is left. Rows queued when the process is killed outright are lost,
+which is the trade-off for not committing per row.
+"""
+
+from __future__ import annotations
+
+import atexit
+import sqlite3
+import os
+import threading
+from collections import Counter
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+from .connection_pool import ConnectionPool
+
+Row = Tuple[str, Sequence, Optional[Hashable], int]  # sql, params, key, failed attempts
+
+# One buffer (and flush thread) per database file per process, however many
+# PaperDatabase / UserProfileManager instances open it.
+_BUFFERS: Dict[str, "WriteBehindBuffer"] = {}
+_BUFFERS_LOCK = threading.Lock()
+
+
+def get_write_buffer(pool: ConnectionPool, **kwargs) -> "WriteBehindBuffer":
+    """The shared buffer for ``pool``'s database file, created on first use."""
+    key = os.path.abspath(pool.db_path)
+    with _BUFFERS_LOCK:
+        buffer = _BUFFERS.get(key)
+        if buffer is None or buffer._closed:
+            buffer = _BUFFERS[key] = WriteBehindBuffer(pool, **kwargs)
+        return buffer
+
+
+def close_all():
+    """Flush and stop every shared buffer (for explicit shutdown hooks)."""
+    with _BUFFERS_LOCK:
+        buffers = list(_BUFFERS.values())
+    for buffer in buffers:
+        buffer.close()
+
+
+class WriteBehindBuffer:
+    def __init__(
+        self,
+        pool: ConnectionPool,
+        flush_interval_ms: float = 50.0,
+        max_rows: int = 256,
+        max_attempts: int = 5,
+    ):
+        self.pool = pool
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.max_rows = max_rows
+        self.max_attempts = max_attempts
+        self.dead_letters: List[Row] = []
+        self._rows: List[Row] = []
+        self._pending_keys: Counter = Counter()
+        self._cond = threading.Condition()
+        # Serialises flushes, so rows reach the database in the order queued.
+        self._flush_lock = threading.Lock()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name="sqlite-write-behind", daemon=True)
+        self._worker.start()
+        atexit.register(self.close)
+
+    def add(self, sql: str, params: Sequence, key: Optional[Hashable] = None):
+        """Queue one row; ``key`` marks it for ``flush_pending``."""
+        with self._cond:
+            if not self._closed:
+                self._rows.append((sql, params, key, 0))
+                if key is not None:
+                    self._pending_keys[key] += 1
+                if len(self._rows) >= self.max_rows:
+                    self._cond.notify()
+                return
+        # After shutdown, fall back to a direct write.
+        with self.pool.writer() as conn:
+            conn.execute(sql, params)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def flush_pending(self, key: Hashable) -> bool:
+        """Flush if rows for ``key`` are queued. Returns whether it flushed."""
+        if not self._pending_keys.get(key):
+            return False
+        self.flush()
+        return True
+
+    def flush(self) -> int:
+        """Write every queued row in one transaction. Returns rows written."""
+        with self._flush_lock:
+            with self._cond:
+                rows, self._rows = self._rows, []
+            if not rows:
+                return 0
+            try:
+                with self.pool.writer() as conn:
+                    for sql, params in _runs(rows):
+                        conn.executemany(sql, params)
+            except Exception as e:
+                print(f"[db] write-behind flush failed, writing rows one by one: {e}")
+                written, retry, dropped = self._write_each(rows)
+            else:
+                written, retry, dropped = len(rows), [], []
+            with self._cond:
+                # Retries go back in front of anything queued since.
+                self._rows[:0] = retry
+                self.dead_letters.extend(dropped)
+                self._pending_keys.subtract(key for _, _, key, _ in rows if key is not None)
+                self._pending_keys.update(key for _, _, key, _ in retry if key is not None)
+                self._pending_keys += Counter()  # drop keys that reached zero
+            return written
+
+    def _write_each(self, rows: List[Row]) -> Tuple[int, List[Row], List[Row]]:
+        """Write rows in their own transactions. Returns (written, retry, dropped)."""
+        written, retry, dropped = 0, [], []
+        for i, (sql, params, key, attempts) in enumerate(rows):
+            try:
+                with self.pool.writer() as conn:
+                    conn.execute(sql, params)
+                written += 1
+                continue
+            except sqlite3.OperationalError as e:
+                # Locked, busy or I/O: the database is at fault, not the row.
+                # Leave the rest for the next flush rather than fail each in turn.
+                error, rest = e, rows[i + 1:]
+            except Exception as e:
+                error, rest = e, []
+            row = (sql, params, key, attempts + 1)
+            if row[3] >= self.max_attempts:
+                print(f"[db] dropping write-behind row after {row[3]} attempts: {error}")
+                dropped.append(row)
+            else:
+                retry.append(row)
+            if rest:
+                retry.extend(rest)
+                break
+        return written, retry, dropped
+
+    def close(self):
+        """Stop the background thread and flush what is left."""
+        if self._closed:
+            return
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._worker.join()
+        self.flush()
+        atexit.unregister(self.close)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._closed and len(self._rows) < self.max_rows:
+                    self._cond.wait(self.flush_interval)
+                if self._closed:
+                    return
+            self.flush()
+
+
+def _runs(rows: List[Row]):
+    """Group consecutive rows with the same SQL into (sql, [params, ...])."""
+    run_sql, run_params = None, []
+    for sql, params, *_ in rows:
+        if sql != run_sql and run_params:
+            yield run_sql, run_params
+            run_params = []
+        run_sql = sql
+        run_params.append(params)
+    if run_params:
+        yield run_sql, run_params
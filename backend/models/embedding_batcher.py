@@ -0,0 +1,86 @@
+"""Cross-request micro-batching for embedding inference.
+
+Under concurrent API load every request encodes its own query (and a handful
+of abstracts) independently, so the model runs many tiny batches and
+throughput flattens out. ``MicroBatcher`` puts a queue in front of the encoder:
+a background worker takes the first pending request, keeps collecting more for
+up to ``max_wait_ms`` or until ``max_batch`` texts are queued, runs one encode
+over all of them, and resolves each caller's future with its own rows.
+
+With one caller this costs at most ``max_wait_ms`` of extra latency; with many
+it turns N small forward passes into one large one.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List, Sequence, Tuple
+
+import numpy as np
+
+
+class MicroBatcher:
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str]], np.ndarray],
+        max_batch: int = 64,
+        max_wait_ms: float = 5.0,
+    ):
+        self.encode_fn = encode_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: "queue.Queue[Tuple[List[str], Future]]" = queue.Queue()
+        self._worker = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, texts: Sequence[str]) -> Future:
+        """Queue ``texts`` for encoding; the future resolves to their (n, dim) array."""
+        future: Future = Future()
+        self._ensure_worker()
+        self._queue.put((list(texts), future))
+        return future
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        return self.submit(texts).result()
+
+    def _ensure_worker(self):
+        if self._worker is None:
+            with self._start_lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(
+                        target=self._run, name="embedding-micro-batcher", daemon=True
+                    )
+                    self._worker.start()
+
+    def _run(self):
+        while True:
+            pending = [self._queue.get()]
+            size = len(pending[0][0])
+            deadline = time.monotonic() + self.max_wait
+            while size < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                pending.append(item)
+                size += len(item[0])
+            self._flush(pending)
+
+    def _flush(self, pending: List[Tuple[List[str], Future]]):
+        texts = [t for batch, _ in pending for t in batch]
+        try:
+            vectors = np.asarray(self.encode_fn(texts)) if texts else None
+        except BaseException as exc:  # hand the failure to every waiting caller
+            for _, future in pending:
+                future.set_exception(exc)
+            return
+        start = 0
+        for batch, future in pending:
+            future.set_result(vectors[start:start + len(batch)] if batch else np.zeros((0, 0), dtype='float32'))
+            start += len(batch)
@@ -0,0 +1,155 @@
+"""Persistent content-addressed cache of text embeddings.
+
+The same abstracts get encoded again and again -- by ``SearchAgent.search`` on
+every query that returns them, by the verifier's ``ingest_papers``, and after
+every restart. This cache stores each vector once, keyed by the SHA-256 of the
+text, in a per-model directory so switching ``EMBEDDING_MODEL`` can never serve
+stale vectors:
+
+    <cache_dir>/<model>/keys.bin      16-byte digest per row, append-only
+    <cache_dir>/<model>/vectors.f32   float32 rows, memory-mapped for reads
+    <cache_dir>/<model>/meta.json     {"model": ..., "dimension": ...}
+
+The digest -> row index is rebuilt from ``keys.bin`` on open (16 bytes per
+entry, so a million cached texts is a 16 MB read). Appends take the shared
+cache-directory file lock, and readers pick up rows other processes appended
+by noticing ``keys.bin`` grew.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from database.file_lock import FileLock
+
+DIGEST_BYTES = 16
+
+
+def text_digest(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8")).digest()[:DIGEST_BYTES]
+
+
+class EmbeddingCache:
+    def __init__(self, cache_dir: str, model_name: str):
+        slug = re.sub(r"[^A-Za-z0-9._-]+", "_", model_name).strip("_")
+        self.path = Path(cache_dir) / slug
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.model_name = model_name
+        self._keys_path = self.path / "keys.bin"
+        self._vectors_path = self.path / "vectors.f32"
+        self._meta_path = self.path / "meta.json"
+        self._lock = FileLock(self.path / ".lock")
+        self._mutex = threading.RLock()
+
+        self.dimension: Optional[int] = None
+        self._rows: Dict[bytes, int] = {}
+        self._keys_size = 0
+        self._vectors: Optional[np.memmap] = None
+        self._load_meta()
+        self._sync()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    # ------------------------------------------------------------------ read
+    def lookup(self, texts: Sequence[str]) -> Tuple[Optional[np.ndarray], List[int]]:
+        """Return (vectors, missing) for ``texts``.
+
+        ``vectors`` is an (n, dim) float32 array with cached rows filled in (or
+        None while the cache is still empty); ``missing`` lists the positions
+        in ``texts`` that need encoding.
+        """
+        with self._mutex:
+            self._sync()
+            digests = [text_digest(t) for t in texts]
+            if self.dimension is None:
+                return None, list(range(len(texts)))
+            out = np.zeros((len(texts), self.dimension), dtype="float32")
+            missing = []
+            for i, digest in enumerate(digests):
+                row = self._rows.get(digest)
+                if row is None:
+                    missing.append(i)
+                else:
+                    out[i] = self._vectors[row]
+            return out, missing
+
+    # ----------------------------------------------------------------- write
+    def put(self, texts: Sequence[str], vectors: np.ndarray):
+        """Append vectors for ``texts``; texts already cached are skipped."""
+        vectors = np.asarray(vectors, dtype="float32")
+        if len(texts) == 0:
+            return
+        with self._lock, self._mutex:
+            self._sync()
+            if self.dimension is None:
+                self.dimension = int(vectors.shape[1])
+                self._meta_path.write_text(json.dumps(
+                    {"model": self.model_name, "dimension": self.dimension}
+                ))
+            elif vectors.shape[1] != self.dimension:
+                raise ValueError(
+                    f"embedding cache for {self.model_name} holds {self.dimension}-d vectors, "
+                    f"got {vectors.shape[1]}-d"
+                )
+
+            new_keys, new_rows, seen = [], [], set()
+            for text, vec in zip(texts, vectors):
+                digest = text_digest(text)
+                if digest in self._rows or digest in seen:
+                    continue
+                seen.add(digest)
+                new_keys.append(digest)
+                new_rows.append(vec)
+            if not new_keys:
+                return
+
+            n = self._keys_size // DIGEST_BYTES
+            row_bytes = self.dimension * 4
+            # Vectors first, keys second: a key on disk always has its row.
+            # Truncating drops rows orphaned by a crash between the two writes.
+            with open(self._vectors_path, "ab") as f:
+                f.truncate(n * row_bytes)
+                f.write(np.asarray(new_rows, dtype="float32").tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            with open(self._keys_path, "ab") as f:
+                f.write(b"".join(new_keys))
+            self._sync()
+
+    # -------------------------------------------------------------- internal
+    def _load_meta(self):
+        if self._meta_path.exists():
+            meta = json.loads(self._meta_path.read_text())
+            self.dimension = int(meta["dimension"])
+
+    def _sync(self):
+        """Index any rows appended (by us or another process) since last sync."""
+        try:
+            size = self._keys_path.stat().st_size
+        except FileNotFoundError:
+            return
+        if size == self._keys_size:
+            return
+        if self.dimension is None:
+            self._load_meta()
+        with open(self._keys_path, "rb") as f:
+            f.seek(self._keys_size)
+            tail = f.read(size - self._keys_size)
+        start = self._keys_size // DIGEST_BYTES
+        usable = len(tail) - len(tail) % DIGEST_BYTES
+        for offset in range(0, usable, DIGEST_BYTES):
+            self._rows.setdefault(tail[offset:offset + DIGEST_BYTES], start + offset // DIGEST_BYTES)
+        self._keys_size += usable
+        self._vectors = np.memmap(
+            self._vectors_path, dtype="float32", mode="r",
+            shape=(self._keys_size // DIGEST_BYTES, self.dimension),
+        )
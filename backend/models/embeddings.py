@@ -1,20 +1,296 @@
-from sentence_transformers import SentenceTransformer
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Tuple
+import inspect
+import multiprocessing
+import os
+import threading
 import numpy as np
 
+from config import CACHE_DIR
+from models.embedding_batcher import MicroBatcher
+from models.embedding_cache import EmbeddingCache
+
+# Process-wide registry, so every SearchAgent / chat session shares one model
+# (and one on-disk cache index) instead of constructing its own. Keyed on every
+# constructor argument, defaults filled in.
+_REGISTRY: Dict[Tuple, "EmbeddingModel"] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+# Anchored to the project's cache directory, not the working directory.
+EMBEDDING_CACHE_DIR = str(CACHE_DIR / "embeddings")
+
+WARM_UP_TEXTS = [
+    "warm up",
+    "A short title.",
+    "A longer abstract-sized sentence so the first real request does not pay for "
+    "kernel selection, thread pool start-up or buffer allocation at larger shapes.",
+]
+
+
+def length_sorted_order(texts) -> np.ndarray:
+    """Indices of ``texts`` from longest to shortest (stable for equal lengths)."""
+    return np.argsort([-len(t) for t in texts], kind='stable')
+
+
+def _load_sentence_transformer(model_name: str):
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
+
+
+def _load_encoder(model_name: str, backend: str, intra_op_threads: int = 0):
+    """Load the inference backend; all expose SentenceTransformer-style encode()."""
+    if backend == "torch":
+        return _load_sentence_transformer(model_name)
+    from models.onnx_embeddings import load_onnx_encoder
+    return load_onnx_encoder(model_name, backend, intra_op_threads)
+
+
+# ---------------------------------------------------------------- bulk workers
+# Each pool process builds its own uncached EmbeddingModel once, in the
+# initializer, and then only receives lists of texts.
+_WORKER_MODEL: Optional["EmbeddingModel"] = None
+
+
+def _init_bulk_worker(model_name: str, backend: str, batch_size: int, threads: int,
+                      encoder_factory: Optional[Callable] = None):
+    global _WORKER_MODEL
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    _WORKER_MODEL = EmbeddingModel(
+        model_name, cache_dir=None, backend=backend,
+        intra_op_threads=threads, batch_size=batch_size,
+    )
+    if encoder_factory is not None:
+        _WORKER_MODEL._model = encoder_factory(model_name)
+
+
+def _bulk_encode_chunk(texts: list) -> np.ndarray:
+    return _WORKER_MODEL._encode_now(texts)
+
+
+def _chunked(items: Iterable, size: int):
+    it = iter(items)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def get_embedding_model(
+    model_name: str = 'all-MiniLM-L6-v2',
+    cache_dir: Optional[str] = EMBEDDING_CACHE_DIR,
+    backend: str = "torch",
+    **kwargs,
+) -> "EmbeddingModel":
+    """Return the shared EmbeddingModel for these settings, creating it once.
+
+    ``kwargs`` are ``EmbeddingModel`` arguments and are part of the key, so
+    callers asking for different batch sizes get different instances.
+    """
+    settings = inspect.signature(EmbeddingModel).bind(model_name, cache_dir, backend, **kwargs)
+    settings.apply_defaults()
+    key = tuple(settings.arguments.items())
+    model = _REGISTRY.get(key)
+    if model is None:
+        with _REGISTRY_LOCK:
+            model = _REGISTRY.get(key)
+            if model is None:
+                model = _REGISTRY[key] = EmbeddingModel(model_name, cache_dir, backend=backend, **kwargs)
+    return model
+
+
+def warm_up(
+    model_name: str = 'all-MiniLM-L6-v2',
+    cache_dir: Optional[str] = EMBEDDING_CACHE_DIR,
+    backend: str = "torch",
+    **kwargs,
+) -> "EmbeddingModel":
+    """Load the shared model now and run a dummy batch through it."""
+    model = get_embedding_model(model_name, cache_dir, backend, **kwargs)
+    model.warm_up()
+    return model
+
+
 class EmbeddingModel:
-    def __init__(self, model_name: str = 'all-MiniLM-L6-v2'):
-        """Initialize lightweight embedding model (~80MB)"""
-        self.model = SentenceTransformer(model_name)
-        
+    def __init__(
+        self,
+        model_name: str = 'all-MiniLM-L6-v2',
+        cache_dir: Optional[str] = EMBEDDING_CACHE_DIR,
+        backend: str = "torch",
+        intra_op_threads: int = 0,
+        micro_batch_size: int = 0,
+        micro_batch_wait_ms: float = 5.0,
+        batch_size: int = 32,
+    ):
+        """Initialize lightweight embedding model (~80MB)
+
+        The model itself is loaded lazily on first encode (or by ``warm_up``),
+        so constructing this is cheap. Prefer ``get_embedding_model`` to share
+        one instance per process.
+
+        ``backend`` is "torch" (sentence-transformers), or "onnx"/"onnx-int8"
+        for ONNX Runtime on CPU (see models/onnx_embeddings.py), with
+        ``intra_op_threads`` controlling its thread pool (0 = ORT default).
+
+        Vectors are cached on disk by (model name, SHA-256 of the text), so
+        repeated abstracts are only encoded once across calls and restarts.
+        Quantized backends get their own cache, since their vectors differ
+        slightly. Pass ``cache_dir=None`` to disable the cache.
+
+        ``micro_batch_size`` > 0 routes model calls through a ``MicroBatcher``
+        that merges concurrent encode requests (up to that many texts, waiting
+        at most ``micro_batch_wait_ms``) into one forward pass. Each pass is
+        split into length-bucketed batches of ``batch_size`` texts.
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"unknown embedding backend {backend!r}; expected one of {BACKENDS}")
+        self.model_name = model_name
+        self.backend = backend
+        self.intra_op_threads = intra_op_threads
+        self.batch_size = batch_size
+        cache_key = model_name if backend == "torch" else f"{model_name}@{backend}"
+        self.cache = EmbeddingCache(cache_dir, cache_key) if cache_dir else None
+        self._model = None
+        self._load_lock = threading.Lock()
+        self._warm = False
+        self._batcher = (
+            MicroBatcher(self._encode_now, micro_batch_size, micro_batch_wait_ms)
+            if micro_batch_size > 0 else None
+        )
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    self._model = _load_encoder(self.model_name, self.backend, self.intra_op_threads)
+        return self._model
+
+    def warm_up(self):
+        """Force model load and run a dummy batch (bypassing the cache)."""
+        if not self._warm:
+            self._encode(WARM_UP_TEXTS)
+            self._warm = True
+
     def encode(self, texts: list[str]) -> np.ndarray:
-        """Generate embeddings for texts"""
+        """Generate embeddings for texts, encoding only cache misses"""
+        texts = list(texts)
+        if self.cache is None or not texts:
+            return self._encode(texts)
+
+        embeddings, missing = self.cache.lookup(texts)
+        if not missing:
+            return embeddings
+
+        # Encode each distinct missing text once, even if repeated in the batch.
+        unique = list(dict.fromkeys(texts[i] for i in missing))
+        fresh = self._encode(unique)
+        self.cache.put(unique, fresh)
+        if embeddings is None:
+            embeddings = np.zeros((len(texts), fresh.shape[1]), dtype='float32')
+        row_of = {text: row for row, text in enumerate(unique)}
+        for i in missing:
+            embeddings[i] = fresh[row_of[texts[i]]]
+        return embeddings
+
+    def _encode(self, texts: list[str]) -> np.ndarray:
+        if self._batcher is not None:
+            return self._batcher.encode(texts)
+        return self._encode_now(texts)
+
+    def _encode_now(self, texts: list[str]) -> np.ndarray:
+        """Encode in length buckets, then restore the caller's order.
+
+        Titles, 900-char RAG chunks and 2 KB abstracts arrive interleaved; a
+        batch pads to its longest member, so we sort by length and let the
+        backend cut the sorted list into ``batch_size`` slices -- each slice is
+        a bucket of similar lengths.
+        """
+        order = length_sorted_order(texts)
         embeddings = self.model.encode(
-            texts,
+            [texts[i] for i in order],
+            batch_size=self.batch_size,
             convert_to_numpy=True,
             show_progress_bar=False
         )
-        return embeddings
-    
+        embeddings = np.asarray(embeddings, dtype='float32')
+        restored = np.empty_like(embeddings)
+        restored[order] = embeddings
+        return restored
+
+    def encode_many(
+        self,
+        texts: Iterable[str],
+        output_path: str,
+        processes: Optional[int] = None,
+        chunk_size: int = 1024,
+        encoder_factory: Optional[Callable] = None,
+    ) -> np.memmap:
+        """Bulk-encode a stream of texts across a process pool.
+
+        For re-indexing the papers table, PDF ingestion or model migrations.
+        ``texts`` is consumed lazily in ``chunk_size`` slices, with at most two
+        chunks per worker in flight, and rows are appended in input order to
+        ``output_path`` as raw float32. Returns the result as a read-only
+        (n, dim) memmap, so neither input nor output has to fit in memory.
+
+        ``processes`` defaults to one per CPU; each worker gets an equal share
+        of the cores for its intra-op threads. ``processes=1`` encodes in this
+        process. The disk cache is bypassed. ``encoder_factory`` (a picklable
+        ``model_name -> encoder``) overrides backend loading in the workers.
+        """
+        processes = processes or os.cpu_count() or 1
+        chunks = _chunked(texts, chunk_size)
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        rows, dim = 0, self._dimension_hint
+
+        with open(output_path, 'wb') as out:
+            def write(block):
+                nonlocal rows, dim
+                block = np.ascontiguousarray(block, dtype='float32')
+                if len(block):
+                    out.write(block.tobytes())
+                    rows += len(block)
+                    dim = block.shape[1]
+
+            if processes == 1:
+                for chunk in chunks:
+                    write(self._encode_now(chunk))
+            else:
+                threads = max(1, (os.cpu_count() or 1) // processes)
+                pool = ProcessPoolExecutor(
+                    max_workers=processes,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_bulk_worker,
+                    initargs=(self.model_name, self.backend, self.batch_size, threads, encoder_factory),
+                )
+                with pool:
+                    in_flight = deque()
+                    for chunk in chunks:
+                        in_flight.append(pool.submit(_bulk_encode_chunk, chunk))
+                        if len(in_flight) >= 2 * processes:
+                            write(in_flight.popleft().result())
+                    while in_flight:
+                        write(in_flight.popleft().result())
+
+        if rows == 0:
+            return np.zeros((0, dim or 0), dtype='float32')
+        return np.memmap(output_path, dtype='float32', mode='r', shape=(rows, dim))
+
+    @property
+    def _dimension_hint(self) -> Optional[int]:
+        return self.cache.dimension if self.cache is not None else None
+
     def encode_single(self, text: str) -> np.ndarray:
         """Generate embedding for single text"""
-        return self.encode([text])[0]
\ No newline at end of file
+        return self.encode([text])[0]
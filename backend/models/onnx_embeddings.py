@@ -0,0 +1,141 @@
+"""ONNX Runtime CPU backend for sentence embeddings.
+
+On CPU-only API boxes, MiniLM inference through PyTorch is the largest CPU cost
+in ``SearchAgent.search``. This backend exports the same Hugging Face model to
+ONNX once, optionally applies dynamic int8 quantization to its MatMul weights,
+and runs it with ONNX Runtime using a configurable intra-op thread count.
+
+It reproduces the sentence-transformers pipeline for mean-pooled models such as
+``all-MiniLM-L6-v2`` (transformer -> mean pooling -> L2 normalize), and its
+``encode`` accepts the same arguments ``EmbeddingModel`` passes to
+``SentenceTransformer.encode``, so it is a drop-in replacement there. Select it
+with ``EMBEDDING_BACKEND=onnx`` (fp32) or ``EMBEDDING_BACKEND=onnx-int8``.
+
+Exported models are cached under ``CACHE_DIR/onnx/<model>/``. ``onnxruntime`` and
+``transformers`` are only imported when this backend is actually used.
+"""
+
+from __future__ import annotations
+
+import re
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from config import CACHE_DIR
+
+
+def _hf_model_id(model_name: str) -> str:
+    # sentence-transformers accepts bare names for its own hub models.
+    return model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+
+
+class OnnxSentenceEncoder:
+    def __init__(
+        self,
+        model_name: str = "all-MiniLM-L6-v2",
+        quantize: bool = True,
+        intra_op_threads: int = 0,
+        cache_dir: str = str(CACHE_DIR / "onnx"),
+        max_seq_length: int = 256,
+        normalize: bool = True,
+    ):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        slug = re.sub(r"[^A-Za-z0-9._-]+", "_", model_name).strip("_")
+        self.path = Path(cache_dir) / slug
+        self.model_name = model_name
+        self.max_seq_length = max_seq_length
+        self.normalize = normalize
+
+        fp32_path = self.path / "model.onnx"
+        if not fp32_path.exists():
+            self._export(fp32_path)
+        model_path = fp32_path
+        if quantize:
+            model_path = self.path / "model.int8.onnx"
+            if not model_path.exists():
+                from onnxruntime.quantization import QuantType, quantize_dynamic
+                quantize_dynamic(str(fp32_path), str(model_path), weight_type=QuantType.QInt8)
+
+        self.tokenizer = AutoTokenizer.from_pretrained(str(self.path))
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        self.session = ort.InferenceSession(
+            str(model_path), options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+    def _export(self, out_path: Path):
+        """One-time export of the Hugging Face transformer to ONNX."""
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        hf_id = _hf_model_id(self.model_name)
+        tokenizer = AutoTokenizer.from_pretrained(hf_id)
+        model = AutoModel.from_pretrained(hf_id).eval()
+        tokenizer.save_pretrained(str(out_path.parent))
+
+        dummy = tokenizer(["export"], return_tensors="pt")
+        names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in dummy]
+        dynamic = {n: {0: "batch", 1: "sequence"} for n in names}
+        dynamic["last_hidden_state"] = {0: "batch", 1: "sequence"}
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                tuple(dummy[n] for n in names),
+                str(out_path),
+                input_names=names,
+                output_names=["last_hidden_state"],
+                dynamic_axes=dynamic,
+                opset_version=17,
+            )
+
+    def encode(
+        self,
+        texts: Sequence[str],
+        batch_size: int = 32,
+        convert_to_numpy: bool = True,
+        show_progress_bar: bool = False,
+    ) -> np.ndarray:
+        """Embed ``texts``; mirrors ``SentenceTransformer.encode`` for our use."""
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, 0), dtype="float32")
+        out: List[np.ndarray] = []
+        for start in range(0, len(texts), batch_size):
+            batch = texts[start:start + batch_size]
+            tokens = self.tokenizer(
+                batch,
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np",
+            )
+            feeds = {k: v.astype("int64") for k, v in tokens.items() if k in self._input_names}
+            hidden = self.session.run(None, feeds)[0]
+            out.append(_mean_pool(hidden, tokens["attention_mask"], self.normalize))
+        return np.concatenate(out).astype("float32")
+
+
+def _mean_pool(hidden: np.ndarray, mask: np.ndarray, normalize: bool) -> np.ndarray:
+    mask = mask[..., None].astype("float32")
+    summed = (hidden * mask).sum(axis=1)
+    pooled = summed / np.clip(mask.sum(axis=1), 1e-9, None)
+    if normalize:
+        pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+    return pooled
+
+
+def load_onnx_encoder(model_name: str, backend: str, intra_op_threads: Optional[int] = 0):
+    """Build the encoder for ``EMBEDDING_BACKEND`` values ``onnx`` / ``onnx-int8``."""
+    return OnnxSentenceEncoder(
+        model_name,
+        quantize=backend == "onnx-int8",
+        intra_op_threads=intra_op_threads or 0,
+    )
@@ -99,6 +99,8 @@ class ResearchService:
             from agents.search_agent import SearchAgent
             search_agent = SearchAgent()
             embedder = search_agent.embeddings
+            # Pay model load + first-batch cost at startup, not on the first request.
+            embedder.warm_up()
         except Exception as e:  # pragma: no cover - environment dependent
             print(f"[service] search agent unavailable: {e}")
 
@@ -138,24 +140,28 @@ def _build_verifier(embedder, llm):
     Returns an engine with an extra ``ingest_papers`` method so the service can
     refresh the corpus per request.
     """
+    from config import EMBEDDING_PCA_PATH, EMBEDDING_STORAGE_PRECISION
     from utils.pdf_rag import PaperRAGIndex
+    from utils.vector_codec import VectorCodec
     from verification.engine import ClaimVerificationEngine, RAGEvidenceRetriever
 
-    index = PaperRAGIndex(embedder, chunk_size=600, overlap=80)
+    codec = VectorCodec.from_settings(EMBEDDING_STORAGE_PRECISION, EMBEDDING_PCA_PATH)
+    index = PaperRAGIndex(embedder, chunk_size=600, overlap=80, codec=codec)
     retriever = RAGEvidenceRetriever(index)
     engine = ClaimVerificationEngine(retriever, llm, evidence_per_claim=6)
 
     def ingest_papers(papers):
-        for p in papers:
-            text = p.get("abstract") or ""
-            if not text:
-                continue
-            index.add_paper(
-                paper_id=str(p.get("id") or p.get("title")),
-                full_text=text,
-                title=p.get("title", ""),
-                url=p.get("url", ""),
-            )
+        # One encode call for every new abstract in the result set.
+        index.add_papers(
+            {
+                "paper_id": str(p.get("id") or p.get("title")),
+                "full_text": p["abstract"],
+                "title": p.get("title", ""),
+                "url": p.get("url", ""),
+            }
+            for p in papers
+            if p.get("abstract")
+        )
 
     engine.ingest_papers = ingest_papers  # type: ignore[attr-defined]
     return engine
@@ -17,16 +17,23 @@ Design notes
 * Retrieval uses cosine similarity computed with numpy. No FAISS dependency
   here on purpose -- full-text chunk indices are per-session and small enough
   that an exact numpy search is simpler and just as correct.
+* Chunk vectors are stored through a ``VectorCodec`` (utils/vector_codec.py),
+  the same precision/PCA policy as the FAISS store. The default is plain
+  float32.
 """
 
 from __future__ import annotations
 
+from bisect import bisect_left
 from dataclasses import dataclass
-from typing import List, Optional, Protocol, Sequence
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Protocol, Sequence, Tuple
 import re
 
 import numpy as np
 
+from utils.vector_codec import QuantizedMatrix, VectorCodec
+
 
 class Embedder(Protocol):
     def encode(self, texts: Sequence[str]): ...
@@ -64,82 +71,160 @@ def chunk_text(
     """Split text into overlapping windows, snapping to sentence boundaries.
 
     Returns a list of (chunk_text, start_char, end_char). Overlap preserves
-    context that would otherwise be severed at a window edge.
+    context that would otherwise be severed at a window edge. See
+    ``iter_chunks`` for the streaming form.
+    """
+    return list(iter_chunks(text, chunk_size, overlap))
+
+
+def iter_chunks(
+    text: str,
+    chunk_size: int = 900,
+    overlap: int = 150,
+) -> Iterator[Tuple[str, int, int]]:
+    """``chunk_text`` as a generator: chunks are yielded as they are cut.
+
+    Linear in the length of the text. Window ends only move forward, so the
+    sentence boundary each one snaps to is found by bisecting from the
+    previous one rather than rescanning the list from the start, and
+    boundaries are only scanned for as far as the current window.
     """
     if not text:
-        return []
+        return
 
-    text = re.sub(r"\s+", " ", text).strip()
+    text = " ".join(text.split())  # same as re.sub(r"\s+", " ", text).strip(), faster
     if chunk_size <= 0:
         raise ValueError("chunk_size must be positive")
     overlap = max(0, min(overlap, chunk_size - 1))
 
-    # Sentence boundaries to snap to, so chunks don't cut mid-sentence.
-    boundaries = [m.end() for m in re.finditer(r"[.!?]\s", text)]
-    boundaries.append(len(text))
+    # Sentence boundaries to snap to, so chunks don't cut mid-sentence. They
+    # are read only as far ahead as the current window needs.
+    n = len(text)
+    sentence_ends = (m.end() for m in re.finditer(r"[.!?]\s", text))
+    boundaries: List[int] = []
 
-    chunks = []
     start = 0
-    n = len(text)
+    lo = 0
     while start < n:
         target_end = min(start + chunk_size, n)
+        while not boundaries or boundaries[-1] < target_end:
+            boundaries.append(next(sentence_ends, n))
         # Snap end forward to the nearest sentence boundary within reach.
-        snapped = next((b for b in boundaries if b >= target_end), target_end)
+        lo = bisect_left(boundaries, target_end, lo)
+        snapped = boundaries[lo]
         end = min(snapped, n) if snapped - start <= chunk_size * 1.5 else target_end
         piece = text[start:end].strip()
         if piece:
-            chunks.append((piece, start, end))
+            yield piece, start, end
         if end >= n:
             break
         start = max(end - overlap, start + 1)
-    return chunks
 
 
 class PaperRAGIndex:
     """In-memory full-text chunk index with cosine retrieval."""
 
-    def __init__(self, embedder: Embedder, chunk_size: int = 900, overlap: int = 150):
+    def __init__(
+        self,
+        embedder: Embedder,
+        chunk_size: int = 900,
+        overlap: int = 150,
+        codec: Optional[VectorCodec] = None,
+        embed_batch_size: int = 64,
+    ):
         self.embedder = embedder
         self.chunk_size = chunk_size
         self.overlap = overlap
+        self.codec = codec or VectorCodec()
+        # Chunks are embedded this many at a time as the chunker yields them.
+        self.embed_batch_size = embed_batch_size
         self._chunks: List[Chunk] = []
-        self._matrix: Optional[np.ndarray] = None  # (n_chunks, dim), L2-normalized
+        self._matrix: Optional[QuantizedMatrix] = None  # (n_chunks, dim), L2-normalized
+        # paper_id -> (start, stop) rows; a paper's chunks are always contiguous.
+        self._paper_rows: Dict[str, Tuple[int, int]] = {}
 
     @property
     def num_chunks(self) -> int:
         return len(self._chunks)
 
     def indexed_paper_ids(self) -> set:
-        return {c.paper_id for c in self._chunks}
+        return set(self._paper_rows)
 
     def add_paper(self, paper_id: str, full_text: str, title: str = "", url: str = "") -> int:
         """Chunk, embed and index one paper's full text. Returns chunks added."""
-        if paper_id in self.indexed_paper_ids():
+        if paper_id in self._paper_rows:
             return 0
-        raw_chunks = chunk_text(full_text, self.chunk_size, self.overlap)
-        if not raw_chunks:
+
+        # Embed batches as the chunker produces them; the paper is only
+        # added to the index once every batch has been embedded.
+        new_chunks: List[Chunk] = []
+        batches = []
+        raw_chunks = iter_chunks(full_text, self.chunk_size, self.overlap)
+        while True:
+            batch = [
+                Chunk(
+                    paper_id=paper_id,
+                    text=ct,
+                    start_char=s,
+                    end_char=e,
+                    chunk_index=len(self._chunks) + len(new_chunks) + i,
+                    paper_title=title,
+                    url=url,
+                )
+                for i, (ct, s, e) in enumerate(islice(raw_chunks, self.embed_batch_size))
+            ]
+            if not batch:
+                break
+            vectors = np.asarray(self.embedder.encode([c.text for c in batch]), dtype="float32")
+            batches.append(self._prepare(vectors))
+            new_chunks.extend(batch)
+        if not new_chunks:
             return 0
 
-        new_chunks = [
-            Chunk(
-                paper_id=paper_id,
-                text=ct,
-                start_char=s,
-                end_char=e,
-                chunk_index=len(self._chunks) + i,
-                paper_title=title,
-                url=url,
-            )
-            for i, (ct, s, e) in enumerate(raw_chunks)
-        ]
+        self._append(new_chunks, np.concatenate(batches))
+        return len(new_chunks)
 
-        vectors = np.asarray(self.embedder.encode([c.text for c in new_chunks]), dtype="float32")
-        vectors = _l2_normalize(vectors)
+    def add_papers(self, papers: Iterable[Dict]) -> int:
+        """Index many papers with a single ``encode`` call. Returns chunks added.
+
+        Each paper is a dict of ``add_paper``'s arguments (``paper_id``,
+        ``full_text`` and optionally ``title`` and ``url``). Papers already
+        indexed, or repeated in ``papers``, are skipped.
+        """
+        new_chunks: List[Chunk] = []
+        seen = set(self._paper_rows)
+        for paper in papers:
+            paper_id = paper["paper_id"]
+            if paper_id in seen:
+                continue
+            seen.add(paper_id)
+            for ct, s, e in iter_chunks(paper["full_text"], self.chunk_size, self.overlap):
+                new_chunks.append(Chunk(
+                    paper_id=paper_id,
+                    text=ct,
+                    start_char=s,
+                    end_char=e,
+                    chunk_index=len(self._chunks) + len(new_chunks),
+                    paper_title=paper.get("title", ""),
+                    url=paper.get("url", ""),
+                ))
+        if not new_chunks:
+            return 0
 
-        self._chunks.extend(new_chunks)
-        self._matrix = vectors if self._matrix is None else np.vstack([self._matrix, vectors])
+        vectors = np.asarray(self.embedder.encode([c.text for c in new_chunks]), dtype="float32")
+        self._append(new_chunks, self._prepare(vectors))
         return len(new_chunks)
 
+    def _append(self, chunks: List[Chunk], vectors: np.ndarray):
+        if self._matrix is None:
+            self._matrix = self.codec.new_matrix(vectors.shape[1])
+        start = len(self._chunks)
+        self._chunks.extend(chunks)
+        self._matrix.append(vectors)
+        for row, chunk in enumerate(chunks, start):
+            first, _ = self._paper_rows.get(chunk.paper_id, (row, row))
+            self._paper_rows[chunk.paper_id] = (first, row + 1)
+
     def retrieve(
         self,
         query: str,
@@ -149,26 +234,39 @@ class PaperRAGIndex:
         """Return the top-k most similar chunks to the query.
 
         If paper_ids is given, retrieval is restricted to those papers
-        (e.g. "answer this only from paper 3").
+        (e.g. "answer this only from paper 3") and only their chunks are scored.
         """
-        if self._matrix is None or not self._chunks:
+        if self._matrix is None or not self._chunks or k <= 0:
             return []
 
+        rows = None
+        if paper_ids:
+            ranges = [self._paper_rows[p] for p in dict.fromkeys(paper_ids) if p in self._paper_rows]
+            if not ranges:
+                return []
+            rows = np.concatenate([np.arange(start, stop) for start, stop in ranges])
+
         q = np.asarray(self.embedder.encode_single(query), dtype="float32").reshape(1, -1)
-        q = _l2_normalize(q)
-        sims = (self._matrix @ q.T).ravel()  # cosine, since both normalized
-
-        allowed = set(paper_ids) if paper_ids else None
-        order = np.argsort(-sims)
-        results: List[RetrievedPassage] = []
-        for idx in order:
-            chunk = self._chunks[idx]
-            if allowed is not None and chunk.paper_id not in allowed:
-                continue
-            results.append(RetrievedPassage(chunk=chunk, score=float(sims[idx])))
-            if len(results) >= k:
-                break
-        return results
+        sims = self._matrix.dot(self._prepare(q)[0], rows=rows)  # cosine, since both normalized
+
+        top = _top_k(sims, k)
+        ids = rows[top] if rows is not None else top
+        return [
+            RetrievedPassage(chunk=self._chunks[i], score=float(sims[j]))
+            for i, j in zip(ids.tolist(), top.tolist())
+        ]
+
+    def _prepare(self, vectors: np.ndarray) -> np.ndarray:
+        """Normalize, project through the codec, and renormalize."""
+        return _l2_normalize(self.codec.transform(_l2_normalize(vectors)))
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first, without a full sort."""
+    if k >= len(scores):
+        return np.argsort(-scores)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
 
 
 def _l2_normalize(matrix: np.ndarray) -> np.ndarray:
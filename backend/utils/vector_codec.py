@@ -0,0 +1,248 @@
+"""Reduced-precision and dimension-reduced embedding storage.
+
+Every vector used to be stored as 384-d float32 -- in FAISS and in
+``PaperRAGIndex``. ``VectorCodec`` is the one storage policy both now share:
+
+* ``precision`` -- "float32", "float16" (half the memory) or "int8" (a quarter,
+  plus one float32 scale per vector).
+* optional PCA -- ``VectorCodec.fit_pca`` learns a projection to ``dim``
+  components from our own corpus; ``transform`` applies it to stored vectors
+  and queries alike, shrinking both memory and matrix-multiply work.
+
+``QuantizedMatrix`` holds coded rows for numpy similarity search (the RAG
+index); ``FAISSVectorStore`` maps the same codec onto FAISS scalar-quantizer
+indexes. ``measure_recall`` checks what a codec costs in recall@k against full
+precision, so a setting can be validated on real data before it is switched on.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+PRECISIONS = ("float32", "float16", "int8")
+
+# Rows dequantized per block when scoring; bounds the float32 scratch memory.
+SCORE_BLOCK_ROWS = 65536
+
+# Smallest buffer QuantizedMatrix allocates once it holds any rows.
+MIN_CAPACITY = 64
+
+
+class VectorCodec:
+    def __init__(
+        self,
+        precision: str = "float32",
+        mean: Optional[np.ndarray] = None,
+        components: Optional[np.ndarray] = None,
+        max_abs: float = 1.0,
+    ):
+        if precision not in PRECISIONS:
+            raise ValueError(f"precision must be one of {PRECISIONS}, got {precision!r}")
+        self.precision = precision
+        self.mean = None if mean is None else np.asarray(mean, dtype="float32")
+        # (input_dim, output_dim), orthonormal columns.
+        self.components = None if components is None else np.asarray(components, dtype="float32")
+        # Largest |component| seen after transform; FAISS int8 uses it as a
+        # corpus-wide scale. Sentence-transformer outputs are unit-norm, so 1.0.
+        self.max_abs = float(max_abs)
+
+    # -------------------------------------------------------------- fitting
+    @classmethod
+    def fit_pca(cls, sample: np.ndarray, dim: int, precision: str = "float32") -> "VectorCodec":
+        """Fit a PCA projection to ``dim`` components on a corpus sample."""
+        sample = np.asarray(sample, dtype="float32")
+        if dim >= sample.shape[1]:
+            raise ValueError("PCA dim must be smaller than the embedding dimension")
+        mean = sample.mean(axis=0)
+        # Right singular vectors of the centred data are the principal axes.
+        _, _, vt = np.linalg.svd(sample - mean, full_matrices=False)
+        codec = cls(precision, mean, vt[:dim].T)
+        codec.max_abs = float(np.abs(codec.transform(sample)).max()) or 1.0
+        return codec
+
+    def output_dim(self, input_dim: int) -> int:
+        return input_dim if self.components is None else self.components.shape[1]
+
+    def transform(self, vectors: np.ndarray) -> np.ndarray:
+        """Apply the PCA projection (if any). Always returns float32."""
+        vectors = np.asarray(vectors, dtype="float32")
+        if self.components is None:
+            return vectors
+        return (vectors - self.mean) @ self.components
+
+    # ---------------------------------------------------------- persistence
+    def save(self, path):
+        arrays = {"precision": np.array(self.precision), "max_abs": np.array(self.max_abs)}
+        if self.components is not None:
+            arrays.update(mean=self.mean, components=self.components)
+        with open(path, "wb") as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, path, precision: Optional[str] = None) -> "VectorCodec":
+        """Load a saved codec; ``precision`` overrides the stored one."""
+        with np.load(path) as data:
+            return cls(
+                precision or str(data["precision"]),
+                data["mean"] if "mean" in data else None,
+                data["components"] if "components" in data else None,
+                float(data["max_abs"]),
+            )
+
+    @classmethod
+    def from_settings(cls, precision: str = "float32", pca_path: Optional[str] = None) -> "VectorCodec":
+        """Codec for the configured precision, with PCA if ``pca_path`` exists."""
+        if pca_path and Path(pca_path).exists():
+            return cls.load(pca_path, precision)
+        return cls(precision)
+
+    def to_dict(self) -> Dict:
+        """Plain-data form (for pickled payloads); ``VectorCodec(**d)`` rebuilds it."""
+        return {
+            "precision": self.precision,
+            "mean": self.mean,
+            "components": self.components,
+            "max_abs": self.max_abs,
+        }
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, VectorCodec):
+            return NotImplemented
+        return (
+            self.precision == other.precision
+            and self.max_abs == other.max_abs
+            and _same_array(self.mean, other.mean)
+            and _same_array(self.components, other.components)
+        )
+
+    __hash__ = None
+
+    def new_matrix(self, dim: int) -> "QuantizedMatrix":
+        return QuantizedMatrix(dim, self.precision)
+
+    def __repr__(self):
+        pca = f", pca={self.components.shape[1]}" if self.components is not None else ""
+        return f"VectorCodec({self.precision!r}{pca})"
+
+
+class QuantizedMatrix:
+    """Row-appendable matrix stored at reduced precision.
+
+    int8 rows carry their own scale (max |x| / 127), so vectors of any norm
+    keep full int8 resolution. Scores are computed block by block, upcasting
+    to float32 so the product still goes through BLAS.
+    """
+
+    def __init__(self, dim: int, precision: str = "float32"):
+        if precision not in PRECISIONS:
+            raise ValueError(f"precision must be one of {PRECISIONS}, got {precision!r}")
+        self.dim = dim
+        self.precision = precision
+        # Rows live in the first ``_size`` rows of buffers whose capacity
+        # doubles when full, so appending N rows one batch at a time copies
+        # O(N) in total instead of reallocating everything on every append.
+        self._size = 0
+        self._codes = np.empty((0, dim), dtype=precision)
+        self._scales = np.empty(0, dtype="float32") if precision == "int8" else None
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def capacity(self) -> int:
+        return len(self._codes)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the stored rows (excluding spare capacity)."""
+        row = self._codes.itemsize * self.dim + (4 if self._scales is not None else 0)
+        return self._size * row
+
+    def append(self, vectors: np.ndarray):
+        codes, scales = self._quantize(np.asarray(vectors, dtype="float32").reshape(-1, self.dim))
+        stop = self._size + len(codes)
+        self.reserve(stop)
+        self._codes[self._size:stop] = codes
+        if scales is not None:
+            self._scales[self._size:stop] = scales
+        self._size = stop
+
+    def reserve(self, rows: int):
+        """Grow capacity to at least ``rows`` (doubling), keeping stored rows."""
+        if rows <= self.capacity:
+            return
+        capacity = max(rows, 2 * self.capacity, MIN_CAPACITY)
+        codes = np.empty((capacity, self.dim), dtype=self.precision)
+        codes[:self._size] = self._codes[:self._size]
+        self._codes = codes
+        if self._scales is not None:
+            scales = np.empty(capacity, dtype="float32")
+            scales[:self._size] = self._scales[:self._size]
+            self._scales = scales
+
+    def _quantize(self, vectors: np.ndarray):
+        if self.precision == "int8":
+            scales = np.abs(vectors).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            codes = np.round(vectors / scales[:, None]).astype("int8")
+            return codes, scales.astype("float32")
+        return vectors.astype(self.precision), None
+
+    def rows(self, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """Dequantized float32 copy of rows ``start:stop``."""
+        block = self._codes[:self._size][start:stop].astype("float32")
+        if self._scales is not None:
+            block *= self._scales[:self._size][start:stop, None]
+        return block
+
+    def dot(self, query: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Scores ``matrix @ query`` for all rows, or only the given row indices."""
+        query = np.asarray(query, dtype="float32").ravel()
+        if rows is not None:
+            rows = np.asarray(rows)
+            if len(rows) and rows.max() >= self._size:
+                raise IndexError(f"row {rows.max()} out of range for {self._size} rows")
+            block = self._codes[rows].astype("float32") @ query
+            return block * self._scales[rows] if self._scales is not None else block
+        out = np.empty(len(self), dtype="float32")
+        for start in range(0, len(self), SCORE_BLOCK_ROWS):
+            stop = min(start + SCORE_BLOCK_ROWS, len(self))
+            block = self._codes[start:stop].astype("float32") @ query
+            out[start:stop] = block * self._scales[start:stop] if self._scales is not None else block
+        return out
+
+
+def measure_recall(
+    codec: VectorCodec,
+    corpus: np.ndarray,
+    queries: np.ndarray,
+    k: int = 10,
+) -> float:
+    """Mean recall@k of cosine search under ``codec`` vs full-precision float32."""
+    corpus = _normalize(np.asarray(corpus, dtype="float32"))
+    queries = _normalize(np.asarray(queries, dtype="float32"))
+    k = min(k, len(corpus))
+    exact = np.argsort(-(queries @ corpus.T), axis=1)[:, :k]
+
+    coded = codec.new_matrix(codec.output_dim(corpus.shape[1]))
+    coded.append(_normalize(codec.transform(corpus)))
+    hits = 0
+    for q, truth in zip(_normalize(codec.transform(queries)), exact):
+        approx = np.argsort(-coded.dot(q))[:k]
+        hits += len(set(approx.tolist()) & set(truth.tolist()))
+    return hits / (k * len(queries))
+
+
+def _same_array(a: Optional[np.ndarray], b: Optional[np.ndarray]) -> bool:
+    if a is None or b is None:
+        return a is b
+    return a.shape == b.shape and np.array_equal(a, b)
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
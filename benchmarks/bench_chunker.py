@@ -0,0 +1,79 @@
+"""Chunking throughput on long synthetic texts: streaming bisect vs the old rescan.
+
+    python benchmarks/bench_chunker.py [--sizes 100000,1000000,4000000]
+
+The old ``chunk_text`` found each window's sentence boundary by scanning the
+boundary list from the start, so its cost grew quadratically with document
+length. ``iter_chunks`` bisects forward from the previous boundary. Both are
+run on the same text and their output is checked to be identical. A
+100-page paper is roughly 300k characters.
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from utils.pdf_rag import iter_chunks
+
+WORDS = (
+    "we propose a transformer model for protein folding and evaluate it on "
+    "several benchmarks where attention improves accuracy over recurrent baselines"
+).split()
+
+
+def synthetic_text(chars, seed=0):
+    rng = random.Random(seed)
+    sentences, total = [], 0
+    while total < chars:
+        sentence = " ".join(rng.choices(WORDS, k=rng.randint(8, 30))).capitalize() + "."
+        sentences.append(sentence)
+        total += len(sentence) + 1
+    return " ".join(sentences)
+
+
+def old_chunk_text(text, chunk_size=900, overlap=150):
+    text = re.sub(r"\s+", " ", text).strip()
+    overlap = max(0, min(overlap, chunk_size - 1))
+    boundaries = [m.end() for m in re.finditer(r"[.!?]\s", text)] + [len(text)]
+    chunks, start, n = [], 0, len(text)
+    while start < n:
+        target_end = min(start + chunk_size, n)
+        snapped = next((b for b in boundaries if b >= target_end), target_end)
+        end = min(snapped, n) if snapped - start <= chunk_size * 1.5 else target_end
+        piece = text[start:end].strip()
+        if piece:
+            chunks.append((piece, start, end))
+        if end >= n:
+            break
+        start = max(end - overlap, start + 1)
+    return chunks
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="100000,300000,1000000,3000000")
+    args = parser.parse_args()
+
+    print(f"{'chars':>10} {'chunks':>7} {'old ms':>10} {'new ms':>9} {'first chunk ms':>15}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        text = synthetic_text(size)
+        old, old_s = timed(lambda: old_chunk_text(text))
+        new, new_s = timed(lambda: list(iter_chunks(text)))
+        _, first_s = timed(lambda: next(iter_chunks(text)))
+        assert new == old, "streaming chunker diverged from the old output"
+        print(f"{size:>10} {len(new):>7} {old_s * 1000:>10.1f} {new_s * 1000:>9.1f} {first_s * 1000:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Throughput of the embedding backends, in sentences per second.
+
+    python benchmarks/bench_embedding_backends.py [--n 2000] [--threads 0] [--model NAME]
+
+Encodes a mix of title-, abstract- and chunk-length texts with the PyTorch
+(sentence-transformers), ONNX fp32 and ONNX int8 backends. Backends whose
+runtime is not installed are skipped.
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from models.embeddings import EmbeddingModel
+
+WORDS = (
+    "model data learning neural attention transformer graph protein cell "
+    "clinical trial diffusion network training results method analysis"
+).split()
+
+
+def synthetic_texts(n, seed=0):
+    rng = random.Random(seed)
+    lengths = [8, 40, 150, 300]  # words: title, short abstract, chunk, long abstract
+    return [" ".join(rng.choices(WORDS, k=rng.choice(lengths))) for _ in range(n)]
+
+
+def bench(model_name, backend, texts, threads):
+    model = EmbeddingModel(model_name, cache_dir=None, backend=backend, intra_op_threads=threads)
+    try:
+        model.warm_up()
+    except ImportError as e:
+        print(f"{backend:>10}: skipped ({e})")
+        return
+    start = time.perf_counter()
+    model.encode(texts)
+    elapsed = time.perf_counter() - start
+    print(f"{backend:>10}: {len(texts) / elapsed:8.1f} sentences/s  ({elapsed:.2f}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    args = parser.parse_args()
+    texts = synthetic_texts(args.n)
+    for backend in ("torch", "onnx", "onnx-int8"):
+        bench(args.model, backend, texts, args.threads)
+
+
+if __name__ == "__main__":
+    main()
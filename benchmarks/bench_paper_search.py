@@ -0,0 +1,77 @@
+"""Latency of PaperDatabase.search_papers: FTS5 vs the old LIKE scan.
+
+    python benchmarks/bench_paper_search.py [--rows 200000] [--db PATH]
+
+Fills a throwaway papers table with synthetic titles/abstracts (bulk insert,
+so the FTS triggers run), then times the same queries through the FTS5 path
+and the LIKE fallback.
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from database.sqlite_db import PaperDatabase
+
+VOCAB = (
+    "transformer attention protein folding graph neural network diffusion model "
+    "reinforcement learning policy gradient clinical trial genome sequencing "
+    "language model retrieval augmented generation contrastive representation "
+    "quantum error correction climate forecasting robotics manipulation vision"
+).split() + [f"term{i}" for i in range(5000)]
+QUERIES = ["attention", "protein fold", "retrieval augmented", "term4217", "quantum err", "graph neural network"]
+
+
+def fill(db, rows, seed=0):
+    rng = random.Random(seed)
+    batch = []
+    insert = "INSERT INTO papers (paper_id, title, abstract, citations) VALUES (?, ?, ?, ?)"
+    for i in range(rows):
+        batch.append((
+            f"syn{i}",
+            " ".join(rng.choices(VOCAB, k=8)),
+            " ".join(rng.choices(VOCAB, k=150)),
+            rng.randint(0, 5000),
+        ))
+        if len(batch) == 10000:
+            with db.pool.writer() as conn:
+                conn.executemany(insert, batch)
+            batch = []
+    if batch:
+        with db.pool.writer() as conn:
+            conn.executemany(insert, batch)
+
+
+def time_queries(fn, repeat=5):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for q in QUERIES:
+            fn(q)
+    return (time.perf_counter() - start) / (repeat * len(QUERIES)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--db", default=None, help="database file (default: a temp file)")
+    args = parser.parse_args()
+
+    path = args.db or str(Path(tempfile.mkdtemp()) / "bench.db")
+    db = PaperDatabase(path)
+    start = time.perf_counter()
+    fill(db, args.rows)
+    print(f"inserted {args.rows} rows in {time.perf_counter() - start:.1f}s ({path})")
+
+    fts = time_queries(lambda q: db.search_papers(q, limit=20))
+    like = time_queries(lambda q: db._search_papers_like(q, limit=20), repeat=1)
+    print(f"FTS5 bm25: {fts:8.2f} ms/query")
+    print(f"LIKE scan: {like:8.2f} ms/query")
+
+
+if __name__ == "__main__":
+    main()
@@ -184,7 +184,9 @@ async def handle_paper_search(query: str, user_name: str, search_agent, filter_m
         
         # Rank
         await msg.stream_token("🎯 **Ranking by relevance...**\n\n")
-        ranked_papers = search_agent.semantic_search(query, k=min(50, len(papers)))
+        ranked_papers = search_agent.semantic_search(
+            query, k=min(50, len(papers)), filters=filter_manager.active_filters
+        )
         
         # Store in session for later commands
         cl.user_session.set("last_search_results", ranked_papers)
@@ -338,7 +340,7 @@ async def handle_bookmark_commands(query: str, user_name: str, search_agent):
     if collection_match:
         collection = collection_match.group(1).strip()
     
-    success = db.add_bookmark(user_name, paper.get('id'), collection)
+    success = db.add_bookmark(user_name, paper.get('id'), collection, paper=paper)
     
     if success:
         await msg.stream_token(f"✅ **Paper bookmarked successfully!**\n\n")
@@ -0,0 +1,79 @@
+"""Tests for the normalized authors / venues tables."""
+
+import time
+
+import pytest
+
+from database.sqlite_db import PaperDatabase, name_key, split_authors
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = PaperDatabase(str(tmp_path / "papers.db"), write_behind=False)
+    db.add_paper({"id": "a", "title": "A", "authors": "Ada Lovelace, Charles Babbage", "year": 1843,
+                  "venue": "Scientific Memoirs"})
+    db.add_paper({"id": "b", "title": "B", "authors": "Charles Babbage", "year": 1864,
+                  "venue": "scientific  memoirs"})
+    db.add_paper({"id": "c", "title": "C", "authors": ["charles babbage", "Alan Turing"], "year": 1950})
+    return db
+
+
+def test_split_and_normalize():
+    assert split_authors("A. Smith,  B Jones , , a smith") == ["A. Smith", "B Jones"]
+    assert split_authors(None) == []
+    assert name_key(" J.  R. Tolkien ") == "j r tolkien"
+
+
+def test_papers_by_author_is_case_insensitive(db):
+    assert [p["paper_id"] for p in db.get_papers_by_author("CHARLES BABBAGE")] == ["c", "b", "a"]
+    assert [p["paper_id"] for p in db.get_papers_by_author("Ada Lovelace")] == ["a"]
+    assert db.get_papers_by_author("Nobody") == []
+    # The legacy display column is kept.
+    assert db.get_papers_by_author("Alan Turing")[0]["authors"] == "charles babbage, Alan Turing"
+
+
+def test_authors_and_venues_are_interned(db):
+    conn = db.pool.reader()
+    assert conn.execute("SELECT COUNT(*) FROM authors").fetchone()[0] == 3
+    assert conn.execute("SELECT COUNT(*) FROM venues").fetchone()[0] == 1
+    assert [p["paper_id"] for p in db.get_papers_by_venue("Scientific Memoirs")] == ["b", "a"]
+
+
+def test_coauthors(db):
+    assert db.get_coauthors("Charles Babbage") == [
+        {"name": "Ada Lovelace", "papers": 1},
+        {"name": "Alan Turing", "papers": 1},
+    ]
+
+
+def test_replacing_a_paper_relinks_its_authors(db):
+    db.add_paper({"id": "a", "title": "A v2", "authors": "Ada Lovelace"})
+    assert [p["paper_id"] for p in db.get_papers_by_author("Charles Babbage")] == ["c", "b"]
+    assert [p["title"] for p in db.get_papers_by_author("Ada Lovelace")] == ["A v2"]
+
+
+def test_author_lookup_uses_indexes(db):
+    plan = " | ".join(r[-1] for r in db.pool.reader().execute(
+        "EXPLAIN QUERY PLAN SELECT p.* FROM authors a "
+        "JOIN paper_authors pa ON pa.author_id = a.id "
+        "JOIN papers p ON p.paper_id = pa.paper_id WHERE a.name_key = ?", ("x",)))
+    assert "SCAN" not in plan
+    assert "idx_paper_authors_author" in plan
+
+
+def test_existing_databases_are_backfilled(tmp_path):
+    path = str(tmp_path / "old.db")
+    db = PaperDatabase(path, write_behind=False)
+    db.add_paper({"id": "x", "title": "X", "authors": "Grace Hopper", "venue": "ACM"})
+    with db.pool.writer() as conn:
+        conn.execute("DROP TABLE paper_authors")
+        conn.execute("DELETE FROM authors")
+        conn.execute("UPDATE papers SET venue_id = NULL")
+
+    reopened = PaperDatabase(path, write_behind=False)
+    deadline = time.time() + 5
+    while not reopened.get_papers_by_author("grace hopper") and time.time() < deadline:
+        time.sleep(0.01)
+    assert [p["paper_id"] for p in reopened.get_papers_by_author("grace hopper")] == ["x"]
+    assert reopened.rebuild_author_index() == 1
+    assert [p["paper_id"] for p in reopened.get_papers_by_venue("acm")] == ["x"]
@@ -0,0 +1,90 @@
+"""Tests for PaperDatabase bookmarks and collections."""
+
+import sqlite3
+
+import pytest
+
+from database.sqlite_db import PaperDatabase
+
+
+def _paper(i):
+    return {"id": f"p{i}", "title": f"Paper {i}", "authors": "A", "year": 2020}
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = PaperDatabase(str(tmp_path / "papers.db"), write_behind=False)
+    for i in range(6):
+        db.add_paper(_paper(i))
+    return db
+
+
+def test_create_collection_rejects_duplicates(db):
+    assert db.create_collection("u", "ML")
+    assert not db.create_collection("u", "ML")
+    assert db.create_collection("v", "ML")
+    assert [c["name"] for c in db.get_collections("u")] == ["ML"]
+
+
+def test_batch_add_and_remove(db):
+    assert db.add_bookmarks("u", ["p0", "p1", "p2"], "ML") == 3
+    assert db.add_bookmarks("u", ["p2", "p3"], "ML") == 1  # p2 already saved
+    assert db.add_bookmarks("u", ["p0"]) == 1
+    assert {c["name"]: c["count"] for c in db.get_collections("u")} == {"ML": 4, "default": 1}
+
+    assert db.remove_bookmarks("u", ["p0", "p1"], "ML") == 2
+    assert {b["paper_id"] for b in db.get_bookmarks("u", "ML")} == {"p2", "p3"}
+    assert db.remove_bookmarks("u", ["p0"]) == 1
+    assert db.get_bookmarks("u", "default") == []
+
+
+def test_bookmark_rows_carry_paper_and_collection(db):
+    assert db.add_bookmark("u", "p1", "Reading", notes="later")
+    (row,) = db.get_bookmarks("u")
+    assert row["title"] == "Paper 1"
+    assert row["collection_name"] == "Reading"
+    assert row["notes"] == "later"
+    assert row["bookmarked_at"]
+
+
+def test_bookmarking_an_unstored_result_stores_it(db):
+    assert not db.add_bookmark("u", "missing")  # foreign key
+    assert db.add_bookmark("u", "p9", paper=_paper(9))
+    assert [b["title"] for b in db.get_bookmarks("u")] == ["Paper 9"]
+
+
+def test_bookmarks_survive_paper_updates(db):
+    db.add_bookmark("u", "p1")
+    db.add_paper(dict(_paper(1), title="Paper 1 (v2)"))
+    assert [b["title"] for b in db.get_bookmarks("u")] == ["Paper 1 (v2)"]
+    with pytest.raises(sqlite3.IntegrityError):
+        with db.pool.writer() as conn:
+            conn.execute("DELETE FROM papers WHERE paper_id = 'p1'")
+
+
+def test_bookmark_pages_walk_back_in_order(db):
+    db.add_bookmarks("u", [f"p{i}" for i in range(6)], "ML")
+    db.add_bookmarks("v", ["p0"], "ML")
+    seen, cursor = [], None
+    while True:
+        page, cursor = db.get_bookmarks_page("u", "ML", limit=4, before=cursor)
+        seen += [b["paper_id"] for b in page]
+        if cursor is None:
+            break
+    assert seen == [f"p{i}" for i in reversed(range(6))]
+
+
+@pytest.mark.parametrize("collection", [None, "ML"])
+def test_bookmark_pages_use_indexes(db, collection):
+    db.add_bookmarks("u", ["p0"], "ML")
+    sql = (
+        "SELECT id FROM bookmarks WHERE user_id = ? {} AND (bookmarked_at, id) < (?, ?) "
+        "ORDER BY bookmarked_at DESC, id DESC LIMIT 10"
+    )
+    if collection is None:
+        sql, params = sql.format(""), ("u", "9999", 1 << 62)
+    else:
+        sql, params = sql.format("AND collection_id = ?"), ("u", 1, "9999", 1 << 62)
+    plan = " | ".join(r[-1] for r in db.pool.reader().execute(f"EXPLAIN QUERY PLAN {sql}", params))
+    assert "idx_bookmarks_user" in plan
+    assert "TEMP B-TREE" not in plan
@@ -0,0 +1,91 @@
+"""Tests for the per-thread-reader / single-writer SQLite pool."""
+
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from database.connection_pool import ConnectionPool, get_pool
+from database.sqlite_db import PaperDatabase
+from database.user_profile import UserProfileManager
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"))
+    with pool.writer() as conn:
+        conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, v TEXT)")
+    yield pool
+    pool.close()
+
+
+def test_pragmas_are_applied(pool):
+    conn = pool.reader()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+    assert conn.execute("PRAGMA cache_size").fetchone()[0] == -8192
+
+
+def test_readers_are_per_thread_and_read_only(pool):
+    mine = pool.reader()
+    assert pool.reader() is mine
+    other = []
+    t = threading.Thread(target=lambda: other.append(pool.reader()))
+    t.start()
+    t.join()
+    assert other[0] is not mine
+    with pytest.raises(sqlite3.OperationalError):
+        mine.execute("INSERT INTO t (v) VALUES ('x')")
+
+
+def test_writer_commits_or_rolls_back(pool):
+    with pool.writer() as conn:
+        conn.execute("INSERT INTO t (v) VALUES ('kept')")
+        with pool.writer() as inner:  # nested blocks share one transaction
+            inner.execute("INSERT INTO t (v) VALUES ('also kept')")
+    with pytest.raises(RuntimeError):
+        with pool.writer() as conn:
+            conn.execute("INSERT INTO t (v) VALUES ('dropped')")
+            raise RuntimeError
+    rows = pool.reader().execute("SELECT v FROM t ORDER BY id").fetchall()
+    assert rows == [("kept",), ("also kept",)]
+
+
+def test_concurrent_reads_and_writes_do_not_lock(tmp_path):
+    path = str(tmp_path / "profiles.db")
+    profiles = UserProfileManager(path, write_behind=False)
+    # A second manager on its own pool is another writer on the same file, like
+    # a second process: the two only coordinate through BEGIN IMMEDIATE and
+    # busy_timeout.
+    other = UserProfileManager(path, write_behind=False)
+    other.pool = ConnectionPool(path)
+    assert other.pool is not profiles.pool
+
+    def work(i):
+        manager = profiles if i % 2 else other
+        manager.add_search_to_history("u", f"query {i}", i)
+        manager.add_conversation_message("u", "s", "user", f"message {i}")
+        return len(manager.get_search_history("u", limit=1000))
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        seen = list(pool.map(work, range(200)))
+
+    assert min(seen) >= 1  # each thread reads its own write
+    assert len(profiles.get_search_history("u", limit=1000)) == 200
+    assert len(other.get_conversation_history("u", "s", limit=1000)) == 200
+    other.pool.close()
+
+
+def test_instances_on_one_file_share_a_pool(tmp_path):
+    path = str(tmp_path / "shared.db")
+    first, second = PaperDatabase(path), PaperDatabase(path)
+    assert first.pool is second.pool
+    assert get_pool(str(tmp_path / ".." / tmp_path.name / "shared.db"),
+                    pragmas={"recursive_triggers": "ON", "foreign_keys": "ON"}) is first.pool
+    with pytest.raises(ValueError):
+        get_pool(path)
+
+    first.pool.close()
+    assert PaperDatabase(path).pool is not first.pool
@@ -0,0 +1,123 @@
+"""Tests for Parquet corpus snapshots and the vector store bulk/iter APIs."""
+
+import json
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from database.corpus_snapshot import export_snapshot, import_snapshot, read_manifest
+from database.sharded_vector_store import ShardedVectorStore
+from database.sqlite_db import PaperDatabase
+from database.vector_store import FAISSVectorStore
+from utils.vector_codec import VectorCodec
+
+DIM = 16
+
+
+def _corpus(tmp_path, n=50, codec=None):
+    db = PaperDatabase(str(tmp_path / "src.db"), write_behind=False)
+    store = FAISSVectorStore(DIM, str(tmp_path / "src_index"), codec=codec)
+    rng = np.random.default_rng(0)
+    papers = [{"id": f"p{i}", "title": f"Paper {i}", "authors": f"Author {i % 5}",
+               "year": 2000 + i, "source": "arxiv", "fields": ["cs"]} for i in range(n)]
+    db.add_papers(papers)
+    vectors = rng.normal(size=(n, DIM)).astype("float32")
+    store.add(vectors, papers)
+    return db, store, vectors
+
+
+def test_iter_vectors_returns_stored_vectors(tmp_path):
+    _, store, vectors = _corpus(tmp_path)
+    chunks = list(store.iter_vectors(batch_size=20))
+    assert [len(m) for m, _ in chunks] == [20, 20, 10]
+    assert [m["id"] for m in chunks[0][0][:2]] == ["p0", "p1"]
+    np.testing.assert_allclose(np.vstack([v for _, v in chunks]), vectors, rtol=1e-6)
+
+
+def test_bulk_publishes_one_snapshot(tmp_path):
+    store = FAISSVectorStore(DIM, str(tmp_path / "index"))
+    with store.bulk():
+        for i in range(5):
+            store.add(np.ones((1, DIM), dtype="float32") * i, [{"id": str(i)}])
+    assert (tmp_path / "index" / "CURRENT").read_text() == "1"
+    assert len(FAISSVectorStore(DIM, str(tmp_path / "index"))) == 5
+
+
+def test_export_writes_partitioned_parquet(tmp_path):
+    db, store, _ = _corpus(tmp_path)
+    manifest = export_snapshot(db, store, tmp_path / "snap", model_name="m",
+                               batch_size=8, rows_per_file=20)
+    assert manifest["papers"]["rows"] == 50
+    assert len(manifest["papers"]["files"]) == 3
+    assert manifest["vectors"]["rows"] == 50
+    assert manifest["vectors"]["space"]["width"] == DIM
+    assert read_manifest(tmp_path / "snap") == manifest
+
+
+def test_export_replaces_only_snapshots(tmp_path):
+    db, store, _ = _corpus(tmp_path)
+    export_snapshot(db, store, tmp_path / "snap", model_name="old")
+    export_snapshot(db, None, tmp_path / "snap", model_name="new")
+    assert read_manifest(tmp_path / "snap")["model"] == "new"
+    assert not (tmp_path / "snap" / "vectors").exists()
+    assert not [p for p in tmp_path.iterdir() if p.name.startswith(".snap")]
+
+    live = tmp_path / "cache"
+    live.mkdir()
+    (live / "papers.db").write_bytes(b"keep me")
+    with pytest.raises(ValueError):
+        export_snapshot(db, store, live)
+    assert (live / "papers.db").read_bytes() == b"keep me"
+
+
+def test_round_trip_into_a_fresh_node(tmp_path):
+    db, store, vectors = _corpus(tmp_path)
+    export_snapshot(db, store, tmp_path / "snap", batch_size=16, rows_per_file=20)
+
+    fresh_db = PaperDatabase(str(tmp_path / "fresh.db"), write_behind=False)
+    fresh_store = FAISSVectorStore(DIM, str(tmp_path / "fresh_index"))
+    loaded = import_snapshot(tmp_path / "snap", fresh_db, fresh_store, batch_size=16)
+    assert (loaded["papers"], loaded["vectors"]) == (50, 50)
+
+    original = db.pool.reader().execute(
+        "SELECT paper_id, title, year, created_at FROM papers ORDER BY paper_id").fetchall()
+    copied = fresh_db.pool.reader().execute(
+        "SELECT paper_id, title, year, created_at FROM papers ORDER BY paper_id").fetchall()
+    assert copied == original
+    assert len(fresh_db.get_papers_by_author("author 3")) == 10
+
+    query = vectors[7]
+    assert [h["metadata"]["id"] for h in fresh_store.search(query, k=5)] == \
+           [h["metadata"]["id"] for h in store.search(query, k=5)]
+    assert fresh_store.search(query, k=1, filters={"domains": ["cs"]})[0]["metadata"]["id"] == "p7"
+
+
+def test_import_into_sharded_store(tmp_path):
+    db, store, _ = _corpus(tmp_path)
+    export_snapshot(db, store, tmp_path / "snap")
+    sharded = ShardedVectorStore(DIM, str(tmp_path / "shards"), num_shards=3)
+    assert import_snapshot(tmp_path / "snap", db, sharded)["vectors"] == 50
+    assert len(sharded) == 50
+    ids = [m["id"] for metadata, _ in sharded.iter_vectors() for m in metadata]
+    assert sorted(ids) == sorted(f"p{i}" for i in range(50))
+    sharded.close()
+
+
+def test_import_rejects_a_different_vector_space(tmp_path):
+    db, store, _ = _corpus(tmp_path)
+    export_snapshot(db, store, tmp_path / "snap")
+    int8 = FAISSVectorStore(DIM, str(tmp_path / "int8"), codec=VectorCodec("int8"))
+    with pytest.raises(ValueError):
+        import_snapshot(tmp_path / "snap", db, int8)
+
+
+def test_int8_vectors_round_trip_as_stored(tmp_path):
+    codec = VectorCodec("int8")
+    db, store, vectors = _corpus(tmp_path, codec=codec)
+    export_snapshot(db, store, tmp_path / "snap")
+    fresh = FAISSVectorStore(DIM, str(tmp_path / "fresh"), codec=VectorCodec("int8"))
+    import_snapshot(tmp_path / "snap", db, fresh)
+    stored = np.vstack([v for _, v in store.iter_vectors()])
+    np.testing.assert_array_equal(np.vstack([v for _, v in fresh.iter_vectors()]), stored)
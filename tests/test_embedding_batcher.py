@@ -0,0 +1,64 @@
+"""Tests for cross-request micro-batching of embedding calls."""
+
+import threading
+
+import numpy as np
+import pytest
+
+from models.embedding_batcher import MicroBatcher
+
+
+class CountingEncoder:
+    def __init__(self):
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def __call__(self, texts):
+        with self.lock:
+            self.batches.append(list(texts))
+        return np.array([[float(len(t)), 0.0] for t in texts], dtype="float32")
+
+
+def test_each_caller_gets_its_own_rows():
+    encoder = CountingEncoder()
+    batcher = MicroBatcher(encoder, max_batch=64, max_wait_ms=1)
+    out = batcher.encode(["a", "bbb"])
+    assert out[:, 0].tolist() == [1.0, 3.0]
+
+
+def test_concurrent_requests_are_merged():
+    encoder = CountingEncoder()
+    batcher = MicroBatcher(encoder, max_batch=1000, max_wait_ms=200)
+    barrier = threading.Barrier(16)
+    results = {}
+
+    def call(i):
+        barrier.wait()
+        results[i] = batcher.encode(["x" * i])
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(1, 17)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert all(results[i][0, 0] == i for i in range(1, 17))
+    assert len(encoder.batches) < 16
+
+
+def test_max_batch_caps_merging():
+    encoder = CountingEncoder()
+    batcher = MicroBatcher(encoder, max_batch=2, max_wait_ms=50)
+    futures = [batcher.submit(["t"]) for _ in range(6)]
+    for f in futures:
+        f.result()
+    assert all(len(b) <= 2 for b in encoder.batches)
+
+
+def test_errors_reach_every_waiting_caller():
+    def broken(texts):
+        raise RuntimeError("model failed")
+
+    batcher = MicroBatcher(broken, max_wait_ms=1)
+    with pytest.raises(RuntimeError):
+        batcher.encode(["a"])
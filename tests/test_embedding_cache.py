@@ -0,0 +1,52 @@
+"""Tests for the persistent content-hash embedding cache."""
+
+import numpy as np
+import pytest
+
+from models.embedding_cache import EmbeddingCache
+
+
+def test_lookup_on_empty_cache_reports_everything_missing(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "toy-model")
+    vectors, missing = cache.lookup(["a", "b"])
+    assert vectors is None
+    assert missing == [0, 1]
+
+
+def test_put_then_lookup_returns_cached_rows(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "toy-model")
+    vecs = np.arange(12, dtype="float32").reshape(3, 4)
+    cache.put(["x", "y", "x"], vecs)
+    assert len(cache) == 2
+
+    got, missing = cache.lookup(["y", "new", "x"])
+    assert missing == [1]
+    np.testing.assert_array_equal(got[0], vecs[1])
+    np.testing.assert_array_equal(got[2], vecs[0])
+
+
+def test_cache_persists_and_sees_other_writers(tmp_path):
+    first = EmbeddingCache(str(tmp_path), "toy-model")
+    second = EmbeddingCache(str(tmp_path), "toy-model")
+    first.put(["alpha"], np.ones((1, 4), dtype="float32"))
+    got, missing = second.lookup(["alpha"])
+    assert missing == []
+    second.put(["beta"], np.full((1, 4), 2, dtype="float32"))
+
+    reopened = EmbeddingCache(str(tmp_path), "toy-model")
+    got, missing = reopened.lookup(["alpha", "beta"])
+    assert missing == []
+    assert got[1, 0] == 2
+
+
+def test_models_do_not_share_entries(tmp_path):
+    EmbeddingCache(str(tmp_path), "model/a").put(["t"], np.ones((1, 4), dtype="float32"))
+    _, missing = EmbeddingCache(str(tmp_path), "model/b").lookup(["t"])
+    assert missing == [0]
+
+
+def test_dimension_mismatch_is_rejected(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "toy-model")
+    cache.put(["t"], np.ones((1, 4), dtype="float32"))
+    with pytest.raises(ValueError):
+        cache.put(["u"], np.ones((1, 8), dtype="float32"))
@@ -0,0 +1,102 @@
+"""Tests for the shared, lazily loaded EmbeddingModel (no model download)."""
+
+import numpy as np
+
+from models import embeddings
+from models.embeddings import EmbeddingModel, get_embedding_model
+
+
+class FakeSentenceTransformer:
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, **kwargs):
+        self.calls.append(list(texts))
+        return np.array([[len(t), 1.0] for t in texts], dtype="float32")
+
+
+def _patch_loader(monkeypatch):
+    loaded = []
+
+    def load(name):
+        loaded.append(name)
+        return FakeSentenceTransformer()
+
+    monkeypatch.setattr(embeddings, "_load_sentence_transformer", load)
+    return loaded
+
+
+def test_model_is_loaded_lazily(monkeypatch):
+    loaded = _patch_loader(monkeypatch)
+    model = EmbeddingModel("toy", cache_dir=None)
+    assert loaded == []
+    model.encode_single("hello")
+    model.encode(["a", "b"])
+    assert loaded == ["toy"]
+
+
+def test_registry_shares_one_instance(monkeypatch, tmp_path):
+    _patch_loader(monkeypatch)
+    monkeypatch.setattr(embeddings, "_REGISTRY", {})
+    a = get_embedding_model("toy", str(tmp_path))
+    b = get_embedding_model("toy", str(tmp_path))
+    assert a is b
+    assert get_embedding_model("other", str(tmp_path)) is not a
+    # Explicit defaults match; different settings get their own instance.
+    assert get_embedding_model("toy", str(tmp_path), batch_size=32) is a
+    bigger = get_embedding_model("toy", str(tmp_path), batch_size=128)
+    assert bigger is not a and bigger.batch_size == 128
+    assert embeddings.warm_up("toy", str(tmp_path), batch_size=128) is bigger
+
+
+def test_warm_up_runs_one_dummy_batch(monkeypatch):
+    _patch_loader(monkeypatch)
+    monkeypatch.setattr(embeddings, "_REGISTRY", {})
+    model = embeddings.warm_up("toy", cache_dir=None)
+    model.warm_up()
+    assert len(model.model.calls) == 1
+    assert sorted(model.model.calls[0]) == sorted(embeddings.WARM_UP_TEXTS)
+
+
+def test_encode_only_encodes_cache_misses(monkeypatch, tmp_path):
+    _patch_loader(monkeypatch)
+    model = EmbeddingModel("toy", cache_dir=str(tmp_path))
+    first = model.encode(["aa", "bbb", "aa"])
+    second = model.encode(["bbb", "cccc"])
+    assert [sorted(c) for c in model.model.calls] == [["aa", "bbb"], ["cccc"]]
+    np.testing.assert_array_equal(first[1], second[0])
+    assert first[0, 0] == 2 and first[2, 0] == 2
+
+
+def test_encode_buckets_by_length_and_restores_order(monkeypatch):
+    _patch_loader(monkeypatch)
+    model = EmbeddingModel("toy", cache_dir=None, batch_size=2)
+    texts = ["bb", "a" * 900, "c", "d" * 2000, "eee"]
+    out = model.encode(texts)
+    assert out[:, 0].tolist() == [len(t) for t in texts]
+    sent = model.model.calls[0]
+    assert [len(t) for t in sent] == sorted((len(t) for t in texts), reverse=True)
+
+
+def _fake_factory(model_name):
+    return FakeSentenceTransformer()
+
+
+def test_encode_many_streams_to_memmap_in_order(monkeypatch, tmp_path):
+    _patch_loader(monkeypatch)
+    model = EmbeddingModel("toy", cache_dir=None)
+    texts = (("x" * (i % 7 + 1)) for i in range(50))
+    out = model.encode_many(texts, str(tmp_path / "vecs.f32"), processes=1, chunk_size=8)
+    assert isinstance(out, np.memmap)
+    assert out.shape == (50, 2)
+    assert out[:, 0].tolist() == [i % 7 + 1 for i in range(50)]
+
+
+def test_encode_many_across_processes(tmp_path):
+    model = EmbeddingModel("toy", cache_dir=None)
+    texts = ["y" * (i % 5 + 1) for i in range(40)]
+    out = model.encode_many(
+        iter(texts), str(tmp_path / "vecs.f32"), processes=2, chunk_size=6,
+        encoder_factory=_fake_factory,
+    )
+    assert out[:, 0].tolist() == [len(t) for t in texts]
@@ -0,0 +1,199 @@
+"""Tests for model-versioned indexes and the background re-embed job."""
+
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from database.file_lock import FileLock
+from database.index_migration import IndexMigration, IndexRegistry, start_migration
+from database.sqlite_db import PaperDatabase
+from database.vector_store import FAISSVectorStore
+
+
+DIM = 8
+
+
+class _Embedder:
+    """Deterministic per-text vectors; counts texts encoded."""
+
+    def __init__(self):
+        self.encoded = 0
+
+    def encode(self, texts):
+        self.encoded += len(texts)
+        return np.stack([
+            np.random.default_rng(abs(hash(t)) % 2**32).random(DIM, dtype=np.float32) for t in texts
+        ])
+
+
+def _db(tmp_path, n=10):
+    db = PaperDatabase(str(tmp_path / "papers.db"))
+    for i in range(n):
+        db.add_paper({"id": f"p{i}", "title": f"Paper {i}", "abstract": f"Abstract {i}", "year": 2020})
+    return db
+
+
+def _migration(tmp_path, db, embedder=None, **kwargs):
+    registry = IndexRegistry(tmp_path / "faiss")
+    store = FAISSVectorStore(DIM, str(registry.path_for("new-model", DIM)))
+    migration = IndexMigration(db, embedder or _Embedder(), store, registry, "new-model", DIM,
+                               batch_size=3, pause_seconds=0, **kwargs)
+    return registry, store, migration
+
+
+def test_registry_paths_are_per_model(tmp_path):
+    registry = IndexRegistry(tmp_path)
+    assert registry.active() is None
+    assert registry.path_for("org/model v2", 768).name == "org_model_v2-768"
+    registry.activate("a", 384)
+    assert registry.is_active("a", 384)
+    assert not registry.is_active("a", 768)
+
+
+def test_migration_reembeds_papers_then_switches(tmp_path):
+    db = _db(tmp_path)
+    registry, store, migration = _migration(tmp_path, db)
+    registry.activate("old-model", 384)
+
+    assert migration.run()
+    assert migration.done.is_set()
+    assert len(store) == 10
+    assert registry.is_active("new-model", DIM)
+    hit = store.search(_Embedder().encode(["Abstract 4"])[0], k=1)[0]
+    assert hit["metadata"]["id"] == "p4"
+    assert hit["metadata"]["title"] == "Paper 4"
+
+
+def test_migration_resumes_from_checkpoint(tmp_path):
+    db = _db(tmp_path)
+    registry, store, migration = _migration(tmp_path, db)
+    migration._save_checkpoint(6)  # rows 1..6 already done
+
+    embedder = _Embedder()
+    registry, store, migration = _migration(tmp_path, db, embedder)
+    migration.run()
+    assert embedder.encoded == 4
+    assert not (registry.path_for("new-model", DIM) / IndexMigration.CHECKPOINT).exists()
+
+
+def test_stopped_migration_does_not_switch(tmp_path):
+    db = _db(tmp_path)
+    registry, store, migration = _migration(tmp_path, db)
+    registry.activate("old-model", 384)
+    migration._stop.set()
+    assert not migration.run()
+    assert registry.is_active("old-model", 384)
+
+
+def test_start_migration_runs_once_in_background(tmp_path):
+    db = _db(tmp_path)
+    registry = IndexRegistry(tmp_path / "faiss")
+    store = FAISSVectorStore(DIM, str(registry.path_for("bg-model", DIM)))
+    first = start_migration(db, _Embedder(), store, registry, "bg-model", DIM, pause_seconds=0)
+    second = start_migration(db, _Embedder(), store, registry, "bg-model", DIM, pause_seconds=0)
+    assert first is second
+    assert first.wait(10)
+    assert registry.is_active("bg-model", DIM)
+
+
+def test_migration_publishes_once_per_window(tmp_path):
+    db = _db(tmp_path)
+    registry, store, migration = _migration(tmp_path, db, batches_per_publish=2)
+    checkpoints = []
+    save = migration._save_checkpoint
+    migration._save_checkpoint = lambda after_id: checkpoints.append(after_id) or save(after_id)
+
+    assert migration.run()
+    assert len(store) == 10
+    assert store._version == 2  # four batches of 3, published in two windows
+    assert checkpoints == [6, 10]
+
+
+def test_other_process_migration_is_followed_not_repeated(tmp_path):
+    db = _db(tmp_path)
+    embedder = _Embedder()
+    registry, store, migration = _migration(tmp_path, db, embedder, poll_seconds=0.01)
+    held = FileLock(registry.path_for("new-model", DIM) / IndexMigration.LOCK)
+    held.acquire()
+    thread = threading.Thread(target=migration.run)
+    thread.start()
+    time.sleep(0.1)
+    assert thread.is_alive() and embedder.encoded == 0
+
+    registry.activate("new-model", DIM)  # the other process finished
+    thread.join(5)
+    assert migration.done.is_set() and embedder.encoded == 0
+    held.release()
+
+
+def test_migration_takes_over_when_the_holder_exits(tmp_path):
+    db = _db(tmp_path)
+    embedder = _Embedder()
+    registry, store, migration = _migration(tmp_path, db, embedder, poll_seconds=0.01)
+    held = FileLock(registry.path_for("new-model", DIM) / IndexMigration.LOCK)
+    held.acquire()
+    thread = threading.Thread(target=migration.run)
+    thread.start()
+    time.sleep(0.05)
+    held.release()  # died without switching ACTIVE
+    thread.join(5)
+    assert embedder.encoded == 10 and registry.is_active("new-model", DIM)
+
+
+def test_migration_keeps_metadata_the_papers_table_lacks(tmp_path):
+    db = _db(tmp_path)
+    old = FAISSVectorStore(DIM, str(tmp_path / "old"))
+    old.add(_Embedder().encode([f"Abstract {i}" for i in range(10)]),
+            [{"id": f"p{i}", "title": f"Paper {i}", "source": "arXiv", "fields": ["CS"]} for i in range(10)])
+    registry, store, migration = _migration(tmp_path, db, source_store=old)
+
+    assert migration.run()
+    assert {m["source"] for m in store.metadata} == {"arXiv"}
+    assert all(m["fields"] == ["CS"] and m["abstract"] for m in store.metadata)
+    hits = store.search(_Embedder().encode(["Abstract 2"])[0], k=10, filters={"sources": ["arXiv"]})
+    assert len(hits) == 10
+
+
+def test_first_start_backfills_before_activating(tmp_path):
+    db = _db(tmp_path)
+    embedder = _Embedder()
+    registry, store, migration = _migration(tmp_path, db, embedder)
+    assert registry.active() is None and registry.legacy() is None
+
+    assert migration.run()
+    assert embedder.encoded == 10 and len(store) == 10
+    assert registry.is_active("new-model", DIM)
+
+
+def test_legacy_root_store_serves_until_backfilled(tmp_path):
+    db = _db(tmp_path)
+    registry = IndexRegistry(tmp_path / "faiss")
+    legacy = FAISSVectorStore(DIM, str(registry.root))
+    legacy.add(_Embedder().encode(["Abstract 1"]), [{"id": "p1", "title": "Paper 1", "source": "PubMed"}])
+    record = registry.legacy()
+    assert record["path"] == str(registry.root) and record["legacy"]
+
+    registry, store, migration = _migration(tmp_path, db, source_store=legacy)
+    assert migration.run()
+    assert len(store) == 10
+    assert registry.active()["path"] == str(registry.path_for("new-model", DIM))
+    assert [m["source"] for m in store.metadata if m["id"] == "p1"] == ["PubMed"]
+
+
+def test_search_agent_first_start_backfills(tmp_path, monkeypatch):
+    pytest.importorskip("arxiv")
+    from agents import search_agent
+
+    db = _db(tmp_path)
+    embedder = _Embedder()
+    monkeypatch.setattr(search_agent, "VECTOR_INDEX_ROOT", tmp_path / "faiss")
+    monkeypatch.setattr(search_agent, "EMBEDDING_DIMENSION", DIM)
+    monkeypatch.setattr(search_agent, "EMBEDDING_REEMBED_PAUSE_S", 0)
+    monkeypatch.setattr(search_agent, "PaperDatabase", lambda: db)
+    monkeypatch.setattr(search_agent.SearchAgent, "_embedding_model", staticmethod(lambda name: embedder))
+
+    agent = search_agent.SearchAgent()
+    assert agent.migration.wait(10)
+    assert embedder.encoded == 10 and len(agent.vector_store) == 10
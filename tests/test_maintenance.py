@@ -0,0 +1,90 @@
+"""Tests for retention, incremental vacuum and the maintenance report."""
+
+import sqlite3
+
+from database.connection_pool import ConnectionPool
+from database.maintenance import Maintenance
+from database.sqlite_db import PaperDatabase
+from database.user_profile import UserProfileManager
+
+OLD = "2000-01-01 00:00:00"
+
+
+def _age_papers(db, paper_ids):
+    with db.pool.writer() as conn:
+        conn.executemany("UPDATE papers SET created_at = ? WHERE paper_id = ?",
+                         [(OLD, pid) for pid in paper_ids])
+
+
+def test_prune_deletes_expired_rows_in_batches(tmp_path):
+    db = PaperDatabase(str(tmp_path / "papers.db"), write_behind=False)
+    for i in range(25):
+        db.add_paper({"id": f"p{i}", "title": f"paper {i}"})
+        db.log_query(f"q{i}", "", 0)
+    _age_papers(db, [f"p{i}" for i in range(20)])
+    with db.pool.writer() as conn:
+        conn.execute("UPDATE query_history SET created_at = ? WHERE id <= 12", (OLD,))
+    db.add_bookmark("u", "p0")
+
+    job = Maintenance(db.pool, {"papers": 30, "query_history": 30, "conversation_history": 30},
+                      batch_size=4, pause_seconds=0)
+    assert job.prune() == {"papers": 19, "query_history": 12}
+
+    left = {r[0] for r in db.pool.reader().execute("SELECT paper_id FROM papers")}
+    assert left == {"p0"} | {f"p{i}" for i in range(20, 25)}
+    assert len(db.search_papers("paper")) == 6  # FTS kept in step
+
+
+def test_prune_handles_without_rowid_tables(tmp_path):
+    profiles = UserProfileManager(str(tmp_path / "profiles.db"), write_behind=False)
+    profiles.add_search_to_history("u", "fresh topic", 1)
+    with profiles.pool.writer() as conn:
+        conn.execute("INSERT INTO user_term_stats VALUES ('u', 'stale', 1.0, ?)", (OLD,))
+    deleted = Maintenance(profiles.pool, {"user_term_stats": 365, "papers": 1}).prune()
+    assert deleted == {"user_term_stats": 1}  # no papers table here
+    assert [s["term"] for s in profiles.term_stats("u")] == ["fresh", "topic"]
+
+
+def test_run_reclaims_space(tmp_path):
+    db = PaperDatabase(str(tmp_path / "papers.db"), write_behind=False)
+    ids = [f"p{i}" for i in range(2000)]
+    for pid in ids:
+        db.add_paper({"id": pid, "title": "t", "abstract": "x" * 2000})
+    _age_papers(db, ids)
+
+    report = Maintenance(db.pool, {"papers": 30}, pause_seconds=0).run()
+    assert report["deleted"] == {"papers": 2000}
+    assert report["pages_freed"] > 0
+    assert report["bytes_reclaimed"] > 2000 * 2000
+    assert report["bytes_after"] < report["bytes_before"]
+    conn = db.pool.reader()
+    assert conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+    assert conn.execute("SELECT COUNT(*) FROM sqlite_stat1").fetchone()[0] > 0
+
+
+def test_old_files_are_converted_to_incremental_vacuum(tmp_path):
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE query_history (id INTEGER PRIMARY KEY, query TEXT, created_at TIMESTAMP)")
+    conn.commit()
+    conn.close()
+
+    pool = ConnectionPool(path)
+    assert pool.reader().execute("PRAGMA auto_vacuum").fetchone()[0] == 0
+    Maintenance(pool, {}).run()
+    # A fresh connection: open ones keep the mode they read at startup.
+    assert sqlite3.connect(path).execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+
+def test_new_files_use_incremental_vacuum(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "new.db"))
+    assert pool.reader().execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+
+def test_term_stats_retention_uses_age_index(tmp_path):
+    profiles = UserProfileManager(str(tmp_path / "profiles.db"), write_behind=False)
+    plan = " | ".join(r[-1] for r in profiles.pool.reader().execute(
+        "EXPLAIN QUERY PLAN SELECT user_id, term FROM user_term_stats WHERE last_seen < ? LIMIT ?",
+        (OLD, 10),
+    ))
+    assert "idx_user_term_stats_last_seen" in plan
@@ -0,0 +1,58 @@
+"""Parity of the ONNX Runtime embedding backend against sentence-transformers.
+
+Uses a tiny randomly initialised BERT saved to a temp dir, so the export,
+quantization and pooling path is checked without downloading a model. Skipped
+when torch / onnxruntime / sentence-transformers are not installed.
+"""
+
+import numpy as np
+import pytest
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+st = pytest.importorskip("sentence_transformers")
+
+from sentence_transformers import models as st_models
+
+from models.onnx_embeddings import OnnxSentenceEncoder
+
+WORDS = "the a model data attention is all you need dropout reduces overfitting".split()
+TEXTS = [
+    "attention is all you need",
+    "dropout reduces overfitting",
+    "the model",
+    "data data data data data attention is all you need the model",
+]
+
+
+@pytest.fixture(scope="module")
+def tiny_model(tmp_path_factory):
+    path = tmp_path_factory.mktemp("tinybert")
+    vocab = path / "vocab.txt"
+    vocab.write_text("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + WORDS))
+    transformers.BertTokenizer(str(vocab)).save_pretrained(str(path))
+    config = transformers.BertConfig(
+        vocab_size=5 + len(WORDS), hidden_size=32, num_hidden_layers=2,
+        num_attention_heads=2, intermediate_size=64,
+    )
+    transformers.BertModel(config).save_pretrained(str(path))
+    reference = st.SentenceTransformer(modules=[
+        st_models.Transformer(str(path)),
+        st_models.Pooling(32, "mean"),
+        st_models.Normalize(),
+    ])
+    return str(path), reference.encode(TEXTS, convert_to_numpy=True)
+
+
+def test_fp32_onnx_matches_pytorch(tiny_model, tmp_path):
+    path, reference = tiny_model
+    got = OnnxSentenceEncoder(path, quantize=False, cache_dir=str(tmp_path)).encode(TEXTS, batch_size=3)
+    assert got.shape == reference.shape
+    assert (got * reference).sum(axis=1).min() > 0.9999
+
+
+def test_int8_onnx_stays_close_to_pytorch(tiny_model, tmp_path):
+    path, reference = tiny_model
+    got = OnnxSentenceEncoder(path, quantize=True, cache_dir=str(tmp_path)).encode(TEXTS)
+    assert (got * reference).sum(axis=1).min() > 0.99
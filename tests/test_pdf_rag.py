@@ -1,8 +1,11 @@
 """Tests for full-text chunking and retrieval, using a tiny mock embedder."""
 
+import random
+import re
+
 import numpy as np
 
-from utils.pdf_rag import chunk_text, PaperRAGIndex
+from utils.pdf_rag import chunk_text, iter_chunks, PaperRAGIndex
 
 
 class BagOfWordsEmbedder:
@@ -41,6 +44,58 @@ def test_chunk_text_overlaps_and_covers():
 
 def test_chunk_text_empty():
     assert chunk_text("") == []
+    assert list(iter_chunks("")) == []
+
+
+def _reference_chunks(text, chunk_size, overlap):
+    """The original rescanning implementation, kept to pin down behaviour."""
+    text = re.sub(r"\s+", " ", text).strip()
+    overlap = max(0, min(overlap, chunk_size - 1))
+    boundaries = [m.end() for m in re.finditer(r"[.!?]\s", text)] + [len(text)]
+    chunks, start, n = [], 0, len(text)
+    while start < n:
+        target_end = min(start + chunk_size, n)
+        snapped = next((b for b in boundaries if b >= target_end), target_end)
+        end = min(snapped, n) if snapped - start <= chunk_size * 1.5 else target_end
+        piece = text[start:end].strip()
+        if piece:
+            chunks.append((piece, start, end))
+        if end >= n:
+            break
+        start = max(end - overlap, start + 1)
+    return chunks
+
+
+def test_streaming_chunker_matches_reference():
+    rng = random.Random(0)
+    words = ["alpha", "beta", "gamma.", "delta!", "eps?", "zeta", "  ", "\n", "theta,"]
+    for _ in range(30):
+        text = " ".join(rng.choices(words, k=rng.randint(0, 800)))
+        size = rng.choice([20, 50, 120, 400])
+        overlap = rng.choice([0, 10, 60, 500])
+        assert list(iter_chunks(text, size, overlap)) == _reference_chunks(text, size, overlap)
+
+
+def test_iter_chunks_is_lazy():
+    chunks = iter_chunks("One sentence here. " * 100_000, chunk_size=200, overlap=50)
+    piece, start, end = next(chunks)
+    assert start == 0 and piece.startswith("One sentence")
+
+
+def test_add_paper_embeds_in_batches():
+    class CountingEmbedder(BagOfWordsEmbedder):
+        calls = []
+
+        def encode(self, texts):
+            self.calls.append(len(texts))
+            return super().encode(texts)
+
+    embedder = CountingEmbedder()
+    idx = PaperRAGIndex(embedder, chunk_size=50, overlap=10, embed_batch_size=4)
+    added = idx.add_paper("a", "transformer attention sentence. " * 40, title="A")
+    assert sum(embedder.calls) == added == idx.num_chunks
+    assert max(embedder.calls) == 4 and len(embedder.calls) > 1
+    assert [c.chunk_index for c in idx._chunks] == list(range(added))
 
 
 def test_retrieval_ranks_relevant_chunk_first():
@@ -76,3 +131,69 @@ def test_add_paper_is_idempotent():
     added_again = idx.add_paper("a", "transformer attention model text here please", title="A")
     assert added_first > 0
     assert added_again == 0
+
+
+def test_add_papers_embeds_everything_in_one_call():
+    class CountingEmbedder(BagOfWordsEmbedder):
+        calls = []
+
+        def encode(self, texts):
+            self.calls.append(len(texts))
+            return super().encode(texts)
+
+    embedder = CountingEmbedder()
+    idx = PaperRAGIndex(embedder, chunk_size=50, overlap=10)
+    idx.add_paper("a", "transformer attention", title="A")
+    embedder.calls.clear()
+
+    added = idx.add_papers([
+        {"paper_id": "a", "full_text": "already indexed transformer"},
+        {"paper_id": "b", "full_text": "diffusion noise sentence. " * 10, "title": "B"},
+        {"paper_id": "c", "full_text": "image sample sentence. " * 10, "url": "http://c"},
+        {"paper_id": "b", "full_text": "repeated in the batch"},
+    ])
+    assert embedder.calls == [added] and added > 2
+    assert idx.indexed_paper_ids() == {"a", "b", "c"}
+    assert [c.chunk_index for c in idx._chunks] == list(range(idx.num_chunks))
+    assert idx.retrieve("diffusion noise", k=1)[0].chunk.paper_title == "B"
+    assert idx.add_papers([{"paper_id": "c", "full_text": "again"}]) == 0
+
+
+class RandomEmbedder:
+    """Random unit vectors per text, fixed by the text itself."""
+
+    def encode(self, texts):
+        return np.array([self.encode_single(t) for t in texts], dtype="float32")
+
+    def encode_single(self, text):
+        rng = np.random.default_rng(abs(hash(text)) % 2**32)
+        return rng.normal(size=16).astype("float32")
+
+
+def test_top_k_matches_full_sort():
+    idx = PaperRAGIndex(RandomEmbedder(), chunk_size=40, overlap=0)
+    idx.add_papers({"paper_id": f"p{i}", "full_text": f"paper {i} sentence. " * 3} for i in range(20))
+    q = "some query"
+    all_hits = idx.retrieve(q, k=idx.num_chunks)
+    scores = [h.score for h in all_hits]
+    assert scores == sorted(scores, reverse=True)
+    assert [h.chunk.chunk_index for h in idx.retrieve(q, k=5)] == [
+        h.chunk.chunk_index for h in all_hits[:5]
+    ]
+    restricted = idx.retrieve(q, k=3, paper_ids=["p3", "p7", "missing"])
+    expected = [h for h in all_hits if h.chunk.paper_id in {"p3", "p7"}][:3]
+    assert [h.chunk.chunk_index for h in restricted] == [h.chunk.chunk_index for h in expected]
+    assert idx.retrieve(q, k=3, paper_ids=["missing"]) == []
+
+
+def test_restricted_retrieval_scores_only_that_paper():
+    idx = PaperRAGIndex(RandomEmbedder(), chunk_size=40, overlap=0)
+    idx.add_paper("big", "filler sentence here. " * 200)
+    small = idx.add_paper("small", "short paper text. " * 3)
+    scored = []
+    dot = idx._matrix.dot
+    idx._matrix.dot = lambda q, rows=None: scored.append(rows) or dot(q, rows=rows)
+
+    results = idx.retrieve("query", k=10, paper_ids=["small"])
+    assert len(scored[0]) == small == len(results)
+    assert {r.chunk.paper_id for r in results} == {"small"}
@@ -0,0 +1,106 @@
+"""Tests for scatter-gather search over a sharded vector store."""
+
+import numpy as np
+import pytest
+
+from database.sharded_vector_store import ShardedVectorStore
+from database.vector_store import FAISSVectorStore
+
+
+DIM = 8
+
+
+def _papers(n):
+    return [
+        {"id": f"p{i}", "title": f"Paper {i}", "year": 2000 + i,
+         "source": ["arXiv", "PubMed", "Semantic Scholar"][i % 3]}
+        for i in range(n)
+    ]
+
+
+def _vectors(n, seed=0):
+    return np.random.default_rng(seed).random((n, DIM), dtype=np.float32)
+
+
+def test_sharded_search_matches_monolithic(tmp_path):
+    vecs, papers = _vectors(60), _papers(60)
+    single = FAISSVectorStore(DIM, str(tmp_path / "single"))
+    single.add(vecs, papers)
+    sharded = ShardedVectorStore(DIM, str(tmp_path / "shards"), partition="hash", num_shards=4)
+    assert sharded.add(vecs, papers) == 60
+    assert len(sharded.shard_names()) > 1
+
+    queries = _vectors(5, seed=1)
+    expected = single.search_batch(queries, k=7)
+    got = sharded.search_batch(queries, k=7)
+    for row in range(5):
+        assert [m["id"] for m in got.metadata(row)] == [m["id"] for m in expected.metadata(row)]
+    np.testing.assert_allclose(got.distances, expected.distances, rtol=1e-5)
+    sharded.close()
+
+
+def test_source_partition_and_independent_reload(tmp_path):
+    sharded = ShardedVectorStore(DIM, str(tmp_path), partition="source")
+    sharded.add(_vectors(9), _papers(9))
+    assert sharded.shard_names() == ["arxiv", "pubmed", "semantic_scholar"]
+    sharded.close()
+
+    # A single shard can be opened on its own.
+    pubmed = FAISSVectorStore(DIM, str(tmp_path / "pubmed"))
+    assert {m["source"] for m in pubmed.metadata} == {"PubMed"}
+
+    reopened = ShardedVectorStore(DIM, str(tmp_path), partition="source")
+    assert len(reopened) == 9
+    assert reopened.remove(["p0", "p1"]) == 2
+    hits = reopened.search(_vectors(1, seed=3)[0], k=20, filters={"sources": ["arXiv"]})
+    assert {h["metadata"]["source"] for h in hits} == {"arXiv"}
+    assert len(hits) == 2
+    reopened.close()
+
+
+def test_max_vectors_caps_the_whole_store(tmp_path):
+    sharded = ShardedVectorStore(DIM, str(tmp_path), partition="hash", num_shards=4, max_vectors=10)
+    sharded.add(_vectors(6), _papers(6))
+    sharded.add(_vectors(24, seed=1), _papers(30)[6:])
+    assert len(sharded) == 10
+    assert all(s.max_vectors is None for s in sharded._all_shards())
+    # The first batch was accessed least recently, so it went first.
+    kept = {m["id"] for s in sharded._all_shards() for m in s.metadata}
+    assert kept <= {f"p{i}" for i in range(6, 30)}
+    sharded.close()
+
+
+def test_capped_add_publishes_each_shard_once(tmp_path):
+    sharded = ShardedVectorStore(DIM, str(tmp_path), partition="source", max_vectors=6)
+    sharded.add(_vectors(6), _papers(6))
+    versions = {s.cache_path: s._version for s in sharded._all_shards()}
+    sharded.add(_vectors(3, seed=1), [dict(p, id=f"q{i}") for i, p in enumerate(_papers(3))])
+    assert len(sharded) == 6
+    # The add and the evictions together write one snapshot per shard.
+    assert all(s._version == versions[s.cache_path] + 1 for s in sharded._all_shards())
+    sharded.close()
+
+
+def test_concurrent_shard_lookups_open_one_store(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    sharded = ShardedVectorStore(DIM, str(tmp_path), partition="hash")
+    with ThreadPoolExecutor(8) as pool:
+        stores = list(pool.map(lambda _: sharded.shard("shard_00"), range(32)))
+    assert all(s is stores[0] for s in stores)
+    sharded.close()
+
+
+def test_only_shard_directories_are_opened(tmp_path):
+    single = FAISSVectorStore(DIM, str(tmp_path / "single"))
+    single.add(_vectors(3), _papers(3))
+    with pytest.raises(ValueError):
+        ShardedVectorStore(DIM, str(tmp_path / "single"), partition="source")
+
+    sharded = ShardedVectorStore(DIM, str(tmp_path / "shards"), partition="hash")
+    sharded.add(_vectors(12), _papers(12))
+    (tmp_path / "shards" / "backup").mkdir()
+    (tmp_path / "shards" / ".shard_00.tmp").mkdir()
+    assert all(name.startswith("shard_") for name in sharded.shard_names())
+    assert len(sharded) == 12
+    sharded.close()
@@ -0,0 +1,84 @@
+"""Tests for PaperDatabase search and iteration."""
+
+import pytest
+
+from database.sqlite_db import PaperDatabase
+
+
+PAPERS = [
+    {"id": "attn", "title": "Attention Is All You Need",
+     "abstract": "Transformers replace recurrence with attention.", "citations": 5},
+    {"id": "drop", "title": "Dropout",
+     "abstract": "Dropout prevents overfitting; attention is not discussed.", "citations": 500},
+    {"id": "bert", "title": "BERT",
+     "abstract": "Pre-training deep bidirectional transformers.", "citations": 50},
+]
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = PaperDatabase(str(tmp_path / "papers.db"))
+    for paper in PAPERS:
+        db.add_paper(paper)
+    return db
+
+
+def _ids(rows):
+    return [r["paper_id"] for r in rows]
+
+
+def test_search_ranks_by_bm25_with_title_weight(db):
+    # LIKE ranked "drop" first on citations; a title match now wins.
+    assert _ids(db.search_papers("attention")) == ["attn", "drop"]
+
+
+def test_search_matches_words_not_phrases(db):
+    assert _ids(db.search_papers("recurrence transformers")) == ["attn"]
+    assert sorted(_ids(db.search_papers("transformer"))) == ["attn", "bert"]  # porter stemming
+
+
+def test_search_prefix_and_snippet(db):
+    rows = db.search_papers("bidirect")
+    assert _ids(rows) == ["bert"]
+    assert "[bidirectional]" in rows[0]["snippet"]
+
+
+def test_search_ignores_fts_syntax(db):
+    assert db.search_papers('NEAR("x" OR') == []
+    assert _ids(db.search_papers('"dropout)')) == ["drop"]
+
+
+def test_index_follows_replace_and_delete(db):
+    db.add_paper({"id": "attn", "title": "Attention Is All You Need",
+                  "abstract": "Self-attention layers only."})
+    assert db.search_papers("recurrence") == []
+    assert _ids(db.search_papers("layers")) == ["attn"]
+
+    with db.pool.writer() as conn:
+        conn.execute("DELETE FROM papers WHERE paper_id = 'bert'")
+    assert db.search_papers("bidirectional") == []
+
+
+def test_existing_rows_are_indexed_on_upgrade(tmp_path):
+    path = str(tmp_path / "old.db")
+    db = PaperDatabase(path)
+    db.add_paper(PAPERS[0])
+    with db.pool.writer() as conn:
+        for name in ("papers_fts_insert", "papers_fts_delete", "papers_fts_update"):
+            conn.execute(f"DROP TRIGGER {name}")
+        conn.execute("DROP TABLE papers_fts")
+    db.add_paper(PAPERS[2])
+
+    reopened = PaperDatabase(path)
+    assert sorted(_ids(reopened.search_papers("transformers"))) == ["attn", "bert"]
+
+
+def test_like_fallback_without_fts(db):
+    db.fts_enabled = False
+    assert _ids(db.search_papers("attention")) == ["drop", "attn"]
+
+
+def test_iter_papers_pages_by_rowid(db):
+    pages = list(db.iter_papers(batch_size=2))
+    assert [len(p) for p in pages] == [2, 1]
+    assert [r["paper_id"] for p in pages for r in p] == ["attn", "drop", "bert"]
@@ -0,0 +1,153 @@
+"""Tests for UserProfileManager history paging and topic statistics."""
+
+import time
+
+import pytest
+
+from database.sqlite_db import PaperDatabase
+from database.user_profile import UserProfileManager
+
+
+@pytest.fixture
+def profiles(tmp_path):
+    manager = UserProfileManager(str(tmp_path / "profiles.db"))
+    for i in range(7):
+        manager.add_conversation_message("u", "s1", "user", f"m{i}")
+        manager.add_conversation_message("u", "s2", "user", f"other{i}")
+        manager.add_search_to_history("u", f"q{i}", i)
+        manager.add_search_to_history("v", f"not mine {i}", i)
+    return manager
+
+
+def _plan(manager, sql, params):
+    rows = manager.pool.reader().execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    return " | ".join(r[-1] for r in rows)
+
+
+def test_conversation_pages_walk_back_in_order(profiles):
+    page, cursor = profiles.get_conversation_page("u", "s1", limit=3)
+    assert [m["content"] for m in page] == ["m4", "m5", "m6"]
+    page, cursor = profiles.get_conversation_page("u", "s1", limit=3, before_id=cursor)
+    assert [m["content"] for m in page] == ["m1", "m2", "m3"]
+    page, cursor = profiles.get_conversation_page("u", "s1", limit=3, before_id=cursor)
+    assert [m["content"] for m in page] == ["m0"]
+    assert cursor is None
+
+
+def test_recent_history_helpers_keep_their_shape(profiles):
+    assert [m["content"] for m in profiles.get_conversation_history("u", "s1", limit=2)] == ["m5", "m6"]
+    searches = profiles.get_search_history("u", limit=2)
+    assert [s["query"] for s in searches] == ["q6", "q5"]
+    assert set(searches[0]) == {"query", "results_count", "filters_applied", "created_at"}
+
+
+def test_search_history_pages(profiles):
+    seen, cursor = [], None
+    while True:
+        page, cursor = profiles.get_search_history_page("u", limit=3, before_id=cursor)
+        seen += [s["query"] for s in page]
+        if cursor is None:
+            break
+    assert seen == [f"q{i}" for i in reversed(range(7))]
+
+
+def test_history_queries_use_indexes(profiles):
+    conversation = _plan(
+        profiles,
+        "SELECT id, role, content, metadata, created_at FROM conversation_history "
+        "WHERE user_id = ? AND session_id = ? AND id < ? ORDER BY id DESC LIMIT 10",
+        ("u", "s1", 100),
+    )
+    assert "idx_conversation_user_session" in conversation
+    assert "TEMP B-TREE" not in conversation
+
+    search = _plan(
+        profiles,
+        "SELECT id, query, results_count, filters_applied, created_at FROM search_history "
+        "WHERE user_id = ? AND id < ? ORDER BY id DESC LIMIT 10",
+        ("u", 100),
+    )
+    assert "COVERING INDEX idx_search_history_user" in search
+    assert "TEMP B-TREE" not in search
+
+
+def test_query_history_pages(tmp_path):
+    db = PaperDatabase(str(tmp_path / "papers.db"))
+    for i in range(5):
+        db.log_query(f"q{i}", f"refined {i}", i)
+    page, cursor = db.get_query_history_page(limit=3)
+    assert [r["query"] for r in page] == ["q4", "q3", "q2"]
+    page, cursor = db.get_query_history_page(limit=3, before_id=cursor)
+    assert [r["query"] for r in page] == ["q1", "q0"]
+    assert cursor is None
+
+
+def test_suggestions_come_from_decayed_term_stats(tmp_path):
+    profiles = UserProfileManager(str(tmp_path / "terms.db"), write_behind=False)
+    profiles.add_search_to_history("u", "gnn neural networks", 5)
+    profiles.add_search_to_history("u", "gnn neural networks for molecules", 5)
+    profiles.add_search_to_history("u", "protein folding", 5)
+
+    topics = profiles.get_personalized_suggestions("u")["trending_topics"]
+    assert set(topics[:2]) == {"neural", "networks"}
+    assert set(topics) == {"neural", "networks", "molecules", "protein", "folding"}
+    counts = {s["term"]: s["count"] for s in profiles.term_stats("u")}
+    assert counts["neural"] == pytest.approx(2.0, rel=1e-3)
+
+
+def test_recompute_backfills_with_decay(tmp_path):
+    profiles = UserProfileManager(str(tmp_path / "backfill.db"), write_behind=False)
+    with profiles.pool.writer() as conn:
+        # Two searches a year ago, one today.
+        conn.executemany(
+            "INSERT INTO search_history (user_id, query, created_at) VALUES (?, ?, ?)",
+            [("u", "ancient lore", "2000-01-01 00:00:00"),
+             ("u", "ancient lore", "2000-01-02 00:00:00")],
+        )
+    profiles.add_search_to_history("u", "fresh lore", 1)
+
+    assert profiles.recompute_term_stats("u") == 2
+    assert profiles.get_personalized_suggestions("u")["trending_topics"] == ["fresh", "ancient"]
+    counts = {s["term"]: s["count"] for s in profiles.term_stats("u")}
+    assert counts["fresh"] == pytest.approx(1.0, rel=1e-3)
+    assert counts["ancient"] < 1e-6
+
+
+def test_existing_history_is_backfilled_on_open(tmp_path):
+    path = str(tmp_path / "old.db")
+    profiles = UserProfileManager(path, write_behind=False)
+    profiles.add_search_to_history("u", "diffusion models", 1)
+    with profiles.pool.writer() as conn:
+        conn.execute("DROP TABLE user_term_stats")
+
+    reopened = UserProfileManager(path, write_behind=False)
+    deadline = time.time() + 5
+    while not reopened.term_stats("u") and time.time() < deadline:
+        time.sleep(0.01)
+    assert [s["term"] for s in reopened.term_stats("u")] == ["diffusion", "models"]
+
+
+def test_top_terms_query_uses_index(profiles):
+    plan = _plan(
+        profiles,
+        "SELECT term FROM user_term_stats WHERE user_id = ? ORDER BY weight DESC LIMIT 5",
+        ("u",),
+    )
+    assert "idx_user_term_stats_top" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_new_database_skips_backfill(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(UserProfileManager, "recompute_term_stats",
+                        lambda self, *a, **kw: calls.append(kw))
+    UserProfileManager(str(tmp_path / "fresh.db"), write_behind=False)
+    assert calls == []
+
+
+def test_background_recompute_logs_failures(tmp_path, capsys):
+    profiles = UserProfileManager(str(tmp_path / "broken.db"), write_behind=False)
+    with profiles.pool.writer() as conn:
+        conn.execute("DROP TABLE user_term_stats")
+    profiles.recompute_term_stats(background=True).join(5)
+    assert "Term stats error" in capsys.readouterr().out
@@ -0,0 +1,152 @@
+"""Tests for reduced-precision / PCA vector storage and its recall cost."""
+
+import numpy as np
+import pytest
+
+from database.vector_store import FAISSVectorStore
+from utils.pdf_rag import PaperRAGIndex
+from utils.vector_codec import QuantizedMatrix, VectorCodec, measure_recall
+
+
+DIM = 64
+
+
+def _corpus(n, seed=0, rank=16):
+    # Low intrinsic rank plus noise, like real sentence embeddings.
+    rng = np.random.default_rng(seed)
+    basis = rng.normal(size=(rank, DIM))
+    vecs = rng.normal(size=(n, rank)) @ basis + 0.05 * rng.normal(size=(n, DIM))
+    return (vecs / np.linalg.norm(vecs, axis=1, keepdims=True)).astype("float32")
+
+
+@pytest.fixture(scope="module")
+def data():
+    corpus = _corpus(600)
+    return corpus[:500], corpus[500:]
+
+
+def test_float16_and_int8_keep_recall(data):
+    corpus, queries = data
+    assert measure_recall(VectorCodec("float16"), corpus, queries, k=10) > 0.99
+    assert measure_recall(VectorCodec("int8"), corpus, queries, k=10) > 0.9
+
+
+def test_pca_keeps_recall_on_low_rank_data(data):
+    corpus, queries = data
+    codec = VectorCodec.fit_pca(corpus, 24)
+    assert codec.output_dim(DIM) == 24
+    assert measure_recall(codec, corpus, queries, k=10) > 0.9
+
+
+def test_reduced_precision_shrinks_memory(data):
+    corpus, _ = data
+    sizes = {}
+    for precision in ("float32", "float16", "int8"):
+        matrix = QuantizedMatrix(DIM, precision)
+        matrix.append(corpus)
+        sizes[precision] = matrix.nbytes
+        np.testing.assert_allclose(matrix.rows(0, 3), corpus[:3], atol=0.02)
+    assert sizes["float16"] == sizes["float32"] // 2
+    assert sizes["int8"] < sizes["float32"] // 3
+
+
+def test_codec_round_trips_through_disk(data, tmp_path):
+    corpus, queries = data
+    codec = VectorCodec.fit_pca(corpus, 16, precision="int8")
+    path = tmp_path / "codec.npz"
+    codec.save(path)
+
+    loaded = VectorCodec.load(path)
+    assert loaded.precision == "int8"
+    np.testing.assert_allclose(loaded.transform(queries), codec.transform(queries), rtol=1e-6)
+    assert VectorCodec.from_settings("float16", str(path)).precision == "float16"
+    assert VectorCodec.from_settings("float16", str(tmp_path / "missing.npz")).components is None
+
+
+def test_unknown_precision_is_rejected():
+    with pytest.raises(ValueError):
+        VectorCodec("bfloat16")
+
+
+@pytest.mark.parametrize("precision", ["float16", "int8"])
+def test_vector_store_with_codec(data, tmp_path, precision):
+    corpus, _ = data
+    codec = VectorCodec.fit_pca(corpus, 24, precision=precision)
+    store = FAISSVectorStore(DIM, str(tmp_path), codec=codec)
+    papers = [{"id": f"p{i}", "title": f"Paper {i}"} for i in range(len(corpus))]
+    store.add(corpus, papers)
+    assert store.index.d == 24
+
+    results = store.search(corpus[7], k=3)
+    assert results[0]["metadata"]["id"] == "p7"
+    assert results[0]["distance"] == pytest.approx(0.0, abs=0.05)
+
+
+class _Embedder:
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def encode(self, texts):
+        return np.stack([self.encode_single(t) for t in texts])
+
+    def encode_single(self, text):
+        return self.vectors[int(text.split()[1]) % len(self.vectors)]
+
+
+def test_rag_index_with_int8_codec(data):
+    corpus, _ = data
+    index = PaperRAGIndex(_Embedder(corpus), chunk_size=200, codec=VectorCodec("int8"))
+    for i in range(40):
+        index.add_paper(f"p{i}", f"chunk {i} here.")
+    hits = index.retrieve("chunk 5 here.", k=1)
+    assert hits[0].chunk.paper_id == "p5"
+    assert hits[0].score == pytest.approx(1.0, abs=0.01)
+
+
+@pytest.mark.parametrize("precision", ["float32", "int8"])
+def test_matrix_grows_by_doubling(data, precision):
+    corpus, queries = data
+    matrix = QuantizedMatrix(DIM, precision)
+    capacities = set()
+    for row in corpus:
+        matrix.append(row[None, :])
+        capacities.add(matrix.capacity)
+    assert len(matrix) == len(corpus)
+    # Amortized growth: a handful of reallocations, not one per append.
+    assert len(capacities) <= int(np.log2(len(corpus))) + 1
+    np.testing.assert_allclose(matrix.rows(), corpus, atol=0.02)
+    np.testing.assert_allclose(matrix.rows(-3), corpus[-3:], atol=0.02)
+    np.testing.assert_allclose(matrix.dot(queries[0]), corpus @ queries[0], atol=0.1)
+    np.testing.assert_allclose(matrix.dot(queries[0], rows=np.array([1, 5])),
+                               corpus[[1, 5]] @ queries[0], atol=0.1)
+
+
+@pytest.mark.parametrize("configured", ["int8", "pca"])
+def test_store_keeps_the_codec_it_was_written_with(data, tmp_path, configured):
+    corpus, _ = data
+    papers = [{"id": f"p{i}", "title": f"Paper {i}"} for i in range(len(corpus))]
+    FAISSVectorStore(DIM, str(tmp_path)).add(corpus[:100], papers[:100])
+
+    codec = VectorCodec("int8") if configured == "int8" else VectorCodec.fit_pca(corpus, 24)
+    store = FAISSVectorStore(DIM, str(tmp_path), codec=codec)
+    assert store.codec == VectorCodec()
+    store.add(corpus[100:110], papers[100:110])
+    for i in (3, 105):
+        hit = store.search(corpus[i], k=1)[0]
+        assert hit["metadata"]["id"] == f"p{i}" and hit["distance"] < 1e-5
+
+
+def test_snapshot_without_recorded_codec_is_inferred(data, tmp_path):
+    import pickle
+
+    corpus, _ = data
+    FAISSVectorStore(DIM, str(tmp_path)).add(corpus[:5], [{"id": f"p{i}"} for i in range(5)])
+    (snapshot,) = (tmp_path / "snapshots").iterdir()
+    payload = pickle.loads((snapshot / "metadata.pkl").read_bytes())
+    del payload["codec"]
+    (snapshot / "metadata.pkl").write_bytes(pickle.dumps(payload))
+
+    store = FAISSVectorStore(DIM, str(tmp_path), codec=VectorCodec("int8"))
+    assert store.codec == VectorCodec()
+    with pytest.raises(ValueError):
+        FAISSVectorStore(DIM + 8, str(tmp_path))
@@ -0,0 +1,202 @@
+"""Tests for the FAISS vector store: dedup, removal and bounded growth."""
+
+import threading
+import time
+
+import numpy as np
+
+from database.vector_store import FAISSVectorStore
+
+
+DIM = 8
+
+
+def _papers(n, prefix="p"):
+    return [{"id": f"{prefix}{i}", "title": f"Paper {i}", "year": 2000 + i} for i in range(n)]
+
+
+def _vectors(n, seed=0):
+    return np.random.default_rng(seed).random((n, DIM), dtype=np.float32)
+
+
+def test_add_skips_duplicates(tmp_path):
+    store = FAISSVectorStore(DIM, str(tmp_path))
+    assert store.add(_vectors(3), _papers(3)) == 3
+    assert store.add(_vectors(3), _papers(3)) == 0
+    assert len(store) == 3
+
+
+def test_duplicate_only_add_does_not_publish(tmp_path):
+    store = FAISSVectorStore(DIM, str(tmp_path))
+    store.add(_vectors(3), _papers(3))
+    seen = store._columns["last_seen"].copy()
+    for _ in range(3):
+        store.add(_vectors(3), _papers(3))
+    assert store._version == 1
+    assert (store._columns["last_seen"] >= seen).all()
+
+    # Refreshed times go out with the next real change...
+    store.add(_vectors(1, seed=1), _papers(1, prefix="q"))
+    assert store._version == 2
+    refreshed = store._columns["last_seen"][:3].copy()
+    np.testing.assert_array_equal(FAISSVectorStore(DIM, str(tmp_path))._columns["last_seen"][:3], refreshed)
+    # ...or once the last publish is old enough.
+    store._published_at -= 2 * 3600
+    store.add(_vectors(3), _papers(3))
+    assert store._version == 3
+
+
+def test_remove_keeps_metadata_aligned(tmp_path):
+    store = FAISSVectorStore(DIM, str(tmp_path))
+    vecs = _vectors(5)
+    store.add(vecs, _papers(5))
+    assert store.remove(["p1", "p3", "missing"]) == 2
+    assert len(store) == 3
+    # Each surviving vector must still map to its own metadata.
+    for i in (0, 2, 4):
+        top = store.search(vecs[i], k=1)[0]
+        assert top["metadata"]["id"] == f"p{i}"
+    # A removed paper can be re-added.
+    assert store.add(vecs[1:2], _papers(2)[1:]) == 1
+
+
+def test_expire_drops_papers_not_seen_recently(tmp_path):
+    store = FAISSVectorStore(DIM, str(tmp_path), max_age_days=7)
+    store.add(_vectors(3), _papers(3))
+    later = time.time() + 8 * 86400
+    assert store.expire(now=later) == 3
+    assert len(store) == 0
+
+
+def test_max_vectors_evicts_least_recently_accessed(tmp_path):
+    store = FAISSVectorStore(DIM, str(tmp_path), max_vectors=3)
+    vecs = _vectors(4)
+    store.add(vecs[:3], _papers(3))
+    # Touch p0 and p2 so p1 becomes the LRU victim.
+    store._columns["last_access"][:] = [3.0, 1.0, 2.0]
+    store.add(vecs[3:], _papers(4)[3:])
+    assert len(store) == 3
+    ids = {m["id"] for m in store.metadata}
+    assert ids == {"p0", "p2", "p3"}
+
+
+def test_state_survives_reload(tmp_path):
+    store = FAISSVectorStore(DIM, str(tmp_path))
+    store.add(_vectors(4), _papers(4))
+    store.remove(["p0"])
+    reloaded = FAISSVectorStore(DIM, str(tmp_path))
+    assert len(reloaded) == 3
+    assert len(reloaded._columns["last_seen"]) == 3
+    assert reloaded.add(_vectors(1), _papers(2)[1:]) == 0
+
+
+def test_search_batch_matches_single_search(tmp_path):
+    store = FAISSVectorStore(DIM, str(tmp_path))
+    vecs = _vectors(10)
+    store.add(vecs, _papers(10))
+    batch = store.search_batch(vecs[:4], k=3)
+    assert batch.indices.shape == (4, 3)
+    assert list(batch.indices[:, 0]) == [0, 1, 2, 3]
+    for row in range(4):
+        single = store.search(vecs[row], k=3)
+        assert [r["metadata"]["id"] for r in single] == [m["id"] for m in batch.metadata(row)]
+        assert batch.hydrate(row)[0]["similarity"] == single[0]["similarity"]
+
+
+def test_search_batch_on_empty_store(tmp_path):
+    store = FAISSVectorStore(DIM, str(tmp_path))
+    batch = store.search_batch(_vectors(2), k=5)
+    assert batch.indices.shape == (2, 0)
+    assert batch.hydrate_all() == [[], []]
+
+
+def test_filtered_search_returns_k_matching_hits(tmp_path):
+    store = FAISSVectorStore(DIM, str(tmp_path))
+    papers = [
+        {"id": f"p{i}", "title": f"Paper {i}", "year": 2000 + i, "citations": i * 10,
+         "source": "arXiv" if i % 2 else "PubMed",
+         "fields": ["Computer Science"] if i % 3 == 0 else ["Medicine"]}
+        for i in range(30)
+    ]
+    store.add(_vectors(30), papers)
+    query = _vectors(1, seed=1)[0]
+
+    hits = store.search(query, k=5, filters={"min_year": 2020})
+    assert len(hits) == 5
+    assert all(h["metadata"]["year"] >= 2020 for h in hits)
+
+    hits = store.search(query, k=50, filters={"min_citations": 100, "sources": ["arXiv"]})
+    ids = sorted(int(h["metadata"]["id"][1:]) for h in hits)
+    assert ids == [i for i in range(10, 30) if i % 2]
+
+    hits = store.search(query, k=50, filters={"domains": ["computer"]})
+    assert {h["metadata"]["fields"][0] for h in hits} == {"Computer Science"}
+
+    assert store.search(query, k=5, filters={"min_year": 2100}) == []
+
+
+def test_filtered_search_agrees_with_brute_force(tmp_path):
+    store = FAISSVectorStore(DIM, str(tmp_path))
+    vecs = _vectors(50)
+    store.add(vecs, _papers(50))
+    query = _vectors(1, seed=2)[0]
+    allowed = np.arange(50) >= 40
+    dists = ((vecs - query) ** 2).sum(axis=1)
+    dists[~allowed] = np.inf
+    expected = [f"p{i}" for i in np.argsort(dists)[:3]]
+    hits = store.search(query, k=3, filters={"min_year": 2040})
+    assert [h["metadata"]["id"] for h in hits] == expected
+
+
+def test_reader_picks_up_snapshot_published_by_another_writer(tmp_path):
+    writer = FAISSVectorStore(DIM, str(tmp_path))
+    reader = FAISSVectorStore(DIM, str(tmp_path))
+    vecs = _vectors(3)
+    writer.add(vecs, _papers(3))
+    hits = reader.search(vecs[2], k=1)
+    assert hits[0]["metadata"]["id"] == "p2"
+    assert (tmp_path / "CURRENT").read_text() == "1"
+
+
+def test_concurrent_writers_do_not_lose_additions(tmp_path):
+    import threading
+
+    stores = [FAISSVectorStore(DIM, str(tmp_path)) for _ in range(4)]
+
+    def write(w, store):
+        for i in range(5):
+            store.add(_vectors(1, seed=w * 10 + i), [{"id": f"w{w}-{i}"}])
+
+    threads = [threading.Thread(target=write, args=(w, s)) for w, s in enumerate(stores)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    fresh = FAISSVectorStore(DIM, str(tmp_path))
+    assert len(fresh) == 20
+    assert len(list((tmp_path / "snapshots").iterdir())) <= 3
+
+
+def test_search_does_not_wait_for_snapshot_write(tmp_path):
+    store = FAISSVectorStore(DIM, str(tmp_path))
+    store.add(_vectors(3), _papers(3))
+    writing, release = threading.Event(), threading.Event()
+    publish = store._publish
+
+    def slow_publish(state):
+        writing.set()
+        release.wait(5)
+        publish(state)
+
+    store._publish = slow_publish
+    writer = threading.Thread(target=store.add, args=(_vectors(1, seed=1), _papers(1, prefix="q")))
+    writer.start()
+    assert writing.wait(5)
+    # Served from memory, including the paper whose snapshot is being written.
+    assert {h["metadata"]["id"] for h in store.search(_vectors(1, seed=1)[0], k=4)} == {"p0", "p1", "p2", "q0"}
+    assert not release.is_set()
+    release.set()
+    writer.join(5)
+    assert store._version == 2
+    assert len(FAISSVectorStore(DIM, str(tmp_path))) == 4
@@ -0,0 +1,100 @@
+"""Tests for the write-behind buffer and its use for history/log writes."""
+
+import time
+
+import pytest
+
+from database.connection_pool import ConnectionPool
+from database.user_profile import UserProfileManager
+from database.write_buffer import WriteBehindBuffer, _runs
+
+INSERT = "INSERT INTO t (v) VALUES (?)"
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "buf.db"))
+    with pool.writer() as conn:
+        conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, v TEXT)")
+    return pool
+
+
+def _count(pool):
+    return pool.reader().execute("SELECT COUNT(*) FROM t").fetchone()[0]
+
+
+def test_rows_wait_for_interval_then_flush_together(pool):
+    buffer = WriteBehindBuffer(pool, flush_interval_ms=100, max_rows=1000)
+    for i in range(10):
+        buffer.add(INSERT, (str(i),))
+    assert _count(pool) == 0
+    deadline = time.time() + 5
+    while _count(pool) < 10 and time.time() < deadline:
+        time.sleep(0.01)
+    assert _count(pool) == 10
+    buffer.close()
+
+
+def test_max_rows_triggers_an_early_flush(pool):
+    buffer = WriteBehindBuffer(pool, flush_interval_ms=60_000, max_rows=5)
+    for i in range(5):
+        buffer.add(INSERT, (str(i),))
+    deadline = time.time() + 5
+    while _count(pool) < 5 and time.time() < deadline:
+        time.sleep(0.01)
+    assert _count(pool) == 5
+    buffer.close()
+
+
+def test_close_flushes_and_later_writes_go_direct(pool):
+    buffer = WriteBehindBuffer(pool, flush_interval_ms=60_000)
+    buffer.add(INSERT, ("queued",))
+    buffer.close()
+    assert _count(pool) == 1
+    buffer.add(INSERT, ("after close",))
+    assert _count(pool) == 2
+
+
+def test_flush_pending_only_for_its_key(pool):
+    buffer = WriteBehindBuffer(pool, flush_interval_ms=60_000)
+    buffer.add(INSERT, ("a",), key="session-a")
+    assert not buffer.flush_pending("session-b")
+    assert _count(pool) == 0
+    assert buffer.flush_pending("session-a")
+    assert _count(pool) == 1
+    assert not buffer.flush_pending("session-a")
+    buffer.close()
+
+
+def test_runs_group_consecutive_statements():
+    rows = [("A", (1,), None, 0), ("A", (2,), None, 0), ("B", (3,), None, 0), ("A", (4,), None, 0)]
+    assert list(_runs(rows)) == [("A", [(1,), (2,)]), ("B", [(3,)]), ("A", [(4,)])]
+
+
+def test_bad_row_is_dropped_without_blocking_the_rest(pool):
+    with pool.writer() as conn:
+        conn.execute("CREATE TABLE u (v TEXT NOT NULL)")
+    buffer = WriteBehindBuffer(pool, flush_interval_ms=60_000, max_attempts=3)
+    buffer.add(INSERT, ("before",))
+    buffer.add("INSERT INTO u (v) VALUES (?)", (None,), key="bad")
+    buffer.add(INSERT, ("after",))
+
+    assert buffer.flush() == 2
+    assert _count(pool) == 2
+    assert len(buffer) == 1 and not buffer.dead_letters
+    assert buffer.flush() == 0
+    assert buffer.flush() == 0
+    assert len(buffer) == 0 and len(buffer.dead_letters) == 1
+    assert not buffer.flush_pending("bad")
+    buffer.close()
+
+
+def test_profile_history_reads_its_own_session(tmp_path):
+    profiles = UserProfileManager(str(tmp_path / "profiles.db"))
+    profiles.write_buffer.flush_interval = 60  # never flush on the timer here
+    profiles.add_conversation_message("u", "s", "user", "hello")
+    profiles.add_search_to_history("u", "transformers", 3)
+
+    assert [m["content"] for m in profiles.get_conversation_history("u", "s")] == ["hello"]
+    assert [s["query"] for s in profiles.get_search_history("u")] == ["transformers"]
+    profiles.write_buffer.close()